@@ -27,6 +27,9 @@ const CONFIG = {
 // Files are stored flat in the Icons_SVG folder, loaded from backend API
 let ICONS_FILES = [];
 let ICONS_CACHE_TOKEN = String(Date.now());
+let ICONS_BUNDLE_URL = '';
+let ICONS_BUNDLE = null; // { version, icons: { file: svgText } }
+let _iconsBundlePromise = null;
 const MAX_ICON_PICKER_TOKENS = 5;
 
 // Build hierarchical structure from flat file list
@@ -279,7 +282,7 @@ function cloneIconPickerState() {
 // Fetch icons list from backend
 async function fetchIconsFromBackend({ onlyIfChanged = false, preservePickerState = false } = {}) {
     try {
-        const response = await fetch('/api/icons', { cache: 'no-store' });
+        const response = await fetch('/api/icons', { cache: 'no-cache' });
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}`);
         }
@@ -298,6 +301,8 @@ async function fetchIconsFromBackend({ onlyIfChanged = false, preservePickerStat
 
         ICONS_CACHE_TOKEN = nextVersion;
         ICONS_FILES = nextFiles;
+        ICONS_BUNDLE_URL = data && data.bundle_url ? String(data.bundle_url) : '';
+        loadIconsBundle();
 
         // Rebuild icon tree
         rebuildIconTree({ preservePickerState });
@@ -1740,11 +1745,8 @@ async function downloadCurrentExport() {
         }, 2200);
     } catch (err) {
         console.error('Export failed:', err);
-        const isTimeout = err && err.name === 'AbortError';
         const formatLabel = format === '3mf' ? '3MF' : format.toUpperCase();
-        const msg = isTimeout
-            ? `${formatLabel} export timed out after 90 seconds.`
-            : `Failed to export ${formatLabel}: ${err && err.message ? err.message : 'Unknown error'}`;
+        const msg = `Failed to export ${formatLabel}: ${err && err.message ? err.message : 'Unknown error'}`;
         setSingleExportStatus(msg, 'error');
         alert(msg);
     } finally {
@@ -1868,27 +1870,126 @@ async function generateContourSVGString(tagData) {
             </svg>`;
 }
 
-async function requestSTEPBlob(svgString, size, styleVal) {
+const EXPORT_STAGE_LABELS = {
+    queued: 'Waiting for an export worker',
+    running: 'Starting export',
+    svg_import: 'Importing SVG',
+    layout: 'Placing icons and text',
+    base_plate: 'Building base plate',
+    boolean: 'Cutting content pocket',
+    mesh: 'Meshing',
+    step_export: 'Writing STEP',
+    svg_profile: 'Writing SVG',
+    '3mf_write': 'Writing 3MF'
+};
+
+function reportExportJobProgress(format, event) {
+    if (!_singleExportBusy || !event) return;
+    const label = EXPORT_STAGE_LABELS[event.stage] || event.stage;
+    const pct = Math.round((event.progress || 0) * 100);
+    setSingleExportStatus(`${format.toUpperCase()}: ${label}... (${pct}%)`, 'info');
+}
+
+async function pollExportJob(job, format) {
+    while (true) {
+        const response = await fetch(job.status_url, { cache: 'no-store' });
+        if (!response.ok) throw new Error(await response.text());
+        const status = await response.json();
+        if (status.state === 'done') return;
+        if (status.state === 'error') throw new Error(status.error || 'Export failed');
+        reportExportJobProgress(format, status);
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+}
+
+function waitForExportJob(job, format) {
+    if (typeof EventSource === 'undefined') return pollExportJob(job, format);
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(job.events_url);
+        source.addEventListener('progress', (e) => {
+            reportExportJobProgress(format, JSON.parse(e.data));
+        });
+        source.addEventListener('done', () => {
+            source.close();
+            resolve();
+        });
+        source.addEventListener('failed', (e) => {
+            source.close();
+            const data = JSON.parse(e.data);
+            reject(new Error(data.error || 'Export failed'));
+        });
+        // Connection dropped before a terminal event: fall back to polling.
+        source.onerror = () => {
+            source.close();
+            pollExportJob(job, format).then(resolve, reject);
+        };
+    });
+}
+
+async function requestExportJobBlob(svgString, size, styleVal, format) {
     const formData = new FormData();
     const svgBlob = new Blob([svgString], { type: 'image/svg+xml' });
     formData.append('svg_file', svgBlob, 'label.svg');
     formData.append('width', size.width);
     formData.append('height', size.height);
     formData.append('style', styleVal);
+    formData.append('format', format);
 
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), 90000);
-    let response;
-    try {
-        response = await fetch('/api/export_step', {
-            method: 'POST',
-            body: formData,
-            signal: controller.signal
-        });
-    } finally {
-        clearTimeout(timeoutId);
+    const response = await fetch('/api/jobs', { method: 'POST', body: formData });
+    if (!response.ok) {
+        const err = await response.text();
+        throw new Error(err);
+    }
+    const job = await response.json();
+    await waitForExportJob(job, format);
+
+    const result = await fetch(job.result_url);
+    if (!result.ok) {
+        const err = await result.text();
+        throw new Error(err);
     }
+    return await result.blob();
+}
 
+async function requestSTEPBlob(svgString, size, styleVal) {
+    return requestExportJobBlob(svgString, size, styleVal, 'step');
+}
+
+async function request3MFBlob(svgString, size, styleVal) {
+    return requestExportJobBlob(svgString, size, styleVal, '3mf');
+}
+
+// Vector exports send the layout itself: the server places cached library
+// icon geometry and builds the text runs, instead of importing a flat SVG.
+async function requestLabelSpecBlob(tagData, styleVal, format) {
+    const layout = await computeLabelLayout(tagData);
+    const spec = {
+        name: tagData.name || '',
+        width: layout.width,
+        height: layout.height,
+        style: styleVal,
+        format,
+        icons: layout.icons.map((icon) => ({
+            name: String(icon.svg || '').replace(/^\/+/, ''),
+            x: icon.x,
+            y: icon.y,
+            width: icon.size,
+            height: icon.size
+        })),
+        texts: layout.texts.map((run) => ({
+            text: run.text,
+            x: run.x,
+            y: run.y,
+            size: run.fontSize * SVG_TEXT_SCALE,
+            anchor: run.anchor
+        }))
+    };
+
+    const response = await fetch('/api/export_label', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(spec)
+    });
     if (!response.ok) {
         const err = await response.text();
         throw new Error(err);
@@ -1896,44 +1997,47 @@ async function requestSTEPBlob(svgString, size, styleVal) {
     return await response.blob();
 }
 
-async function request3MFBlob(svgString, size, styleVal) {
+// Ask the server whether an SVG will build before paying for the export;
+// null when the check itself is unavailable.
+async function preflightSVG(svgString) {
     const formData = new FormData();
-    const svgBlob = new Blob([svgString], { type: 'image/svg+xml' });
-    formData.append('svg_file', svgBlob, 'label.svg');
-    formData.append('width', size.width);
-    formData.append('height', size.height);
-    formData.append('style', styleVal);
-
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), 90000);
-    let response;
+    formData.append('svg_file', new Blob([svgString], { type: 'image/svg+xml' }), 'label.svg');
     try {
-        response = await fetch('/api/export_3mf', {
-            method: 'POST',
-            body: formData,
-            signal: controller.signal
-        });
-    } finally {
-        clearTimeout(timeoutId);
+        const response = await fetch('/api/preflight', { method: 'POST', body: formData });
+        if (!response.ok) return null;
+        return await response.json();
+    } catch (err) {
+        return null;
     }
+}
 
-    if (!response.ok) {
-        const err = await response.text();
-        throw new Error(err);
+// Vector SVG for export, or an error when preflight says it would fail or lose
+// geometry, so the caller goes straight to the compat SVG.
+async function preflightedVectorSVG(tagData) {
+    const vectorSvg = await generateSVGString(tagData, true);
+    const report = await preflightSVG(vectorSvg);
+    if (report && !report.ok) {
+        throw new Error(`preflight: ${[...report.errors, ...report.warnings].join('; ')}`);
     }
-    return await response.blob();
+    if (report && report.warnings.length) {
+        console.warn(`SVG preflight: ${report.warnings.join('; ')}`);
+    }
+    return vectorSvg;
 }
 
 async function buildSTEPBlobWithFallback(tagData, size, styleVal, preferredMode) {
     const attempts = preferredMode === 'vector'
-        ? ['vector', 'compat']
+        ? ['spec', 'vector', 'compat']
         : ['compat', 'vector'];
     const errors = [];
 
     for (const mode of attempts) {
         try {
+            if (mode === 'spec') {
+                return await requestLabelSpecBlob(tagData, styleVal, 'step');
+            }
             if (mode === 'vector') {
-                const vectorSvg = await generateSVGString(tagData, true);
+                const vectorSvg = await preflightedVectorSVG(tagData);
                 return await requestSTEPBlob(vectorSvg, size, styleVal);
             }
             const compatSvg = await generateContourSVGString(tagData);
@@ -1948,14 +2052,17 @@ async function buildSTEPBlobWithFallback(tagData, size, styleVal, preferredMode)
 
 async function build3MFBlobWithFallback(tagData, size, styleVal, preferredMode) {
     const attempts = preferredMode === 'vector'
-        ? ['vector', 'compat']
+        ? ['spec', 'vector', 'compat']
         : ['compat', 'vector'];
     const errors = [];
 
     for (const mode of attempts) {
         try {
+            if (mode === 'spec') {
+                return await requestLabelSpecBlob(tagData, styleVal, '3mf');
+            }
             if (mode === 'vector') {
-                const vectorSvg = await generateSVGString(tagData, true);
+                const vectorSvg = await preflightedVectorSVG(tagData);
                 return await request3MFBlob(vectorSvg, size, styleVal);
             }
             const compatSvg = await generateContourSVGString(tagData);
@@ -2041,6 +2148,78 @@ async function runParallelBatchExport(tags, format, styleVal) {
     return results;
 }
 
+// Build the server-side batch spec for one tag. The preferred geometry mode is
+// sent as `svg`, the other one as `fallback_svg` so the server can retry it.
+async function buildBatchLabelSpec(tag, format, styleVal, geometryMode) {
+    const size = CONFIG.baseSizes[tag.size];
+    if (!size) throw new Error(`Invalid tag size: ${tag.size}`);
+
+    const vectorSvg = await generateSVGString(tag, true);
+    let compatSvg = null;
+    try {
+        compatSvg = await generateContourSVGString(tag);
+    } catch (err) {
+        console.warn('Compat SVG generation failed for tag:', tag.id, err);
+    }
+    const preferred = geometryMode === 'vector' ? vectorSvg : (compatSvg || vectorSvg);
+    const fallback = preferred === vectorSvg ? compatSvg : vectorSvg;
+
+    return {
+        name: tag.name || '',
+        svg: preferred,
+        fallback_svg: fallback,
+        width: size.width,
+        height: size.height,
+        style: styleVal,
+        format
+    };
+}
+
+// Export every tag through POST /api/export_batch. The server builds labels on
+// its worker pool and streams the ZIP back, including a manifest.json with
+// per-label status.
+async function runServerBatchExport(tags, format, styleVal) {
+    const geometryMode = getSelectedSTEPGeometryMode();
+    const labels = [];
+    for (let i = 0; i < tags.length; i++) {
+        setBatchExportStatus(`Preparing labels... (${i + 1}/${tags.length})`, 'info', true);
+        labels.push(await buildBatchLabelSpec(tags[i], format, styleVal, geometryMode));
+    }
+
+    setBatchExportStatus(`Exporting ${tags.length} ${format.toUpperCase()} files on the server...`, 'info', true);
+    const response = await fetch('/api/export_batch', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ labels, format })
+    });
+    if (!response.ok) {
+        const err = await response.text();
+        throw new Error(err);
+    }
+
+    const chunks = [];
+    let received = 0;
+    const reader = response.body.getReader();
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        chunks.push(value);
+        received += value.length;
+        setBatchExportStatus(`Receiving ${format.toUpperCase()} files... (${Math.round(received / 1024)} KB)`, 'info', true);
+    }
+    const zipBlob = new Blob(chunks, { type: 'application/zip' });
+
+    let summary = { total: tags.length, succeeded: tags.length, failed: 0 };
+    try {
+        const zip = await JSZip.loadAsync(zipBlob);
+        const manifest = zip.file('manifest.json');
+        if (manifest) summary = JSON.parse(await manifest.async('string'));
+    } catch (err) {
+        console.warn('Could not read batch manifest:', err);
+    }
+    return { zipBlob, summary };
+}
+
 async function exportAllTags() {
     if (_batchExportBusy) return;
     if (state.tags.length === 0) {
@@ -2057,6 +2236,25 @@ async function exportAllTags() {
         }
 
         setBatchExportStatus(`Preparing batch ${format.toUpperCase()} export...`, 'info', true);
+        if (format !== 'svg') {
+            const { zipBlob, summary } = await runServerBatchExport(state.tags, format, styleVal);
+            triggerBlobDownload(zipBlob, `infinitygrid_${format}_labels.zip`);
+            if (summary.failed > 0) {
+                setBatchExportStatus(
+                    `Batch export ready: ${summary.succeeded} of ${summary.total} files (${format.toUpperCase()}). ` +
+                    `${summary.failed} failed, see manifest.json.`,
+                    'error',
+                    false
+                );
+                return;
+            }
+            setBatchExportStatus(`Batch export ready: ${summary.succeeded} files (${format.toUpperCase()}).`, 'success', false);
+            setTimeout(() => {
+                if (!_batchExportBusy) setBatchExportStatus('', 'info', false);
+            }, 3000);
+            return;
+        }
+
         const results = await runParallelBatchExport(state.tags, format, styleVal);
 
         setBatchExportStatus('Creating ZIP archive...', 'info', true);
@@ -2142,19 +2340,20 @@ function deleteTag(tagId) {
 // SVG EXPORT
 // ============================================
 
-async function generateSVGString(tagData, forceBlack = false) {
+// Label layout in mm (origin top-left), shared by the SVG renderer and the
+// structured export spec: icon boxes by library file name and text runs.
+async function computeLabelLayout(tagData) {
     await ensureTextFontLoaded(120);
 
     const size = CONFIG.baseSizes[tagData.size];
     const leftConfig = CONFIG.leftLayouts[tagData.leftLayout];
     const rightConfig = CONFIG.rightLayouts[tagData.rightLayout];
 
-    const contentColor = forceBlack ? 'black' : (tagData.contentColor || 'black');
-    const bgColor = forceBlack ? 'white' : (tagData.backgroundColor || 'white');
-
     // Dimensions in mm
     const width = size.width;
     const height = size.height;
+    const icons = [];
+    const texts = [];
 
     // Spacing constants (in mm)
     const margin = 0.6;
@@ -2167,8 +2366,6 @@ async function generateSVGString(tagData, forceBlack = false) {
     const textScale = (tagData.textSize != null ? tagData.textSize : 100) / 100;
     const textAlign = tagData.textAlign === 'left' ? 'left' : 'center';
 
-    // Start building SVG
-    let svgContent = `<rect x="0" y="0" width="${width}" height="${height}" fill="${bgColor}" />`;
     let currentX = margin;
 
     const hasIcons = leftConfig.iconCount > 0;
@@ -2192,7 +2389,7 @@ async function generateSVGString(tagData, forceBlack = false) {
             for (let i = 0; i < leftConfig.iconCount; i++) {
                 const icon = tagData.icons[i];
                 if (icon) {
-                    svgContent += await createIconSVGElement(icon.svg, iconX, iconY, iconSize, iconSize, contentColor);
+                    icons.push({ svg: icon.svg, x: iconX, y: iconY, size: iconSize });
                 }
                 iconX += iconSize + iconGap;
             }
@@ -2208,9 +2405,9 @@ async function generateSVGString(tagData, forceBlack = false) {
                 const fontSize = calculateFontSize(text, availableTextWidth, textHeight);
                 if (textAlign === 'left') {
                     const leftTextX = getVisualTextStartX(text, margin, fontSize);
-                    svgContent += createTextSVGElement(text, leftTextX, textY + itemHeight / 2, fontSize, 'start', contentColor);
+                    texts.push({ text, x: leftTextX, y: textY + itemHeight / 2, fontSize, anchor: 'start' });
                 } else {
-                    svgContent += createTextSVGElement(text, width / 2, textY + itemHeight / 2, fontSize, 'middle', contentColor);
+                    texts.push({ text, x: width / 2, y: textY + itemHeight / 2, fontSize, anchor: 'middle' });
                 }
             }
         }
@@ -2229,7 +2426,7 @@ async function generateSVGString(tagData, forceBlack = false) {
                 for (let i = 0; i < leftConfig.iconCount; i++) {
                     const icon = tagData.icons[i];
                     if (icon) {
-                        svgContent += await createIconSVGElement(icon.svg, currentX, iconY, iconSize, iconSize, contentColor);
+                        icons.push({ svg: icon.svg, x: currentX, y: iconY, size: iconSize });
                     }
                     iconY += iconHeight + gapBetween;
                 }
@@ -2242,7 +2439,7 @@ async function generateSVGString(tagData, forceBlack = false) {
                 for (let i = 0; i < leftConfig.iconCount; i++) {
                     const icon = tagData.icons[i];
                     if (icon) {
-                        svgContent += await createIconSVGElement(icon.svg, currentX, iconY, iconSize, iconSize, contentColor);
+                        icons.push({ svg: icon.svg, x: currentX, y: iconY, size: iconSize });
                     }
                     currentX += iconSize + (i < leftConfig.iconCount - 1 ? gapBetween : gapIconText);
                 }
@@ -2262,10 +2459,10 @@ async function generateSVGString(tagData, forceBlack = false) {
                     const fontSize = calculateFontSize(text, availableTextWidth, textHeight);
                     if (textAlign === 'center') {
                         const centerTextX = textX + (availableTextWidth / 2);
-                        svgContent += createTextSVGElement(text, centerTextX, height / 2, fontSize, 'middle', contentColor);
+                        texts.push({ text, x: centerTextX, y: height / 2, fontSize, anchor: 'middle' });
                     } else {
                         const visualTextX = getVisualTextStartX(text, textX, fontSize);
-                        svgContent += createTextSVGElement(text, visualTextX, height / 2, fontSize, 'start', contentColor);
+                        texts.push({ text, x: visualTextX, y: height / 2, fontSize, anchor: 'start' });
                     }
                 }
             } else {
@@ -2278,10 +2475,10 @@ async function generateSVGString(tagData, forceBlack = false) {
                         const fontSize = calculateFontSize(text, availableTextWidth, lineHeight);
                         if (textAlign === 'center') {
                             const centerTextX = textX + (availableTextWidth / 2);
-                            svgContent += createTextSVGElement(text, centerTextX, textY, fontSize, 'middle', contentColor);
+                            texts.push({ text, x: centerTextX, y: textY, fontSize, anchor: 'middle' });
                         } else {
                             const visualTextX = getVisualTextStartX(text, textX, fontSize);
-                            svgContent += createTextSVGElement(text, visualTextX, textY, fontSize, 'start', contentColor);
+                            texts.push({ text, x: visualTextX, y: textY, fontSize, anchor: 'start' });
                         }
                     }
                 }
@@ -2289,6 +2486,25 @@ async function generateSVGString(tagData, forceBlack = false) {
         }
     }
 
+    return { width, height, icons, texts };
+}
+
+async function generateSVGString(tagData, forceBlack = false) {
+    const layout = await computeLabelLayout(tagData);
+    const { width, height } = layout;
+
+    const contentColor = forceBlack ? 'black' : (tagData.contentColor || 'black');
+    const bgColor = forceBlack ? 'white' : (tagData.backgroundColor || 'white');
+
+    // Start building SVG
+    let svgContent = `<rect x="0" y="0" width="${width}" height="${height}" fill="${bgColor}" />`;
+    for (const icon of layout.icons) {
+        svgContent += await createIconSVGElement(icon.svg, icon.x, icon.y, icon.size, icon.size, contentColor);
+    }
+    for (const run of layout.texts) {
+        svgContent += createTextSVGElement(run.text, run.x, run.y, run.fontSize, run.anchor, contentColor);
+    }
+
     // Create final SVG
     return `<?xml version="1.0" encoding="UTF-8"?>
 <svg xmlns="http://www.w3.org/2000/svg"
@@ -2317,14 +2533,50 @@ async function exportSVG() {
     await downloadTagSVG(buildCurrentTagForExport());
 }
 
+// The whole icon library in one versioned, immutable response.
+function loadIconsBundle() {
+    if (ICONS_BUNDLE && ICONS_BUNDLE.version === ICONS_CACHE_TOKEN) {
+        return Promise.resolve(ICONS_BUNDLE);
+    }
+    if (!ICONS_BUNDLE_URL) return Promise.resolve(null);
+    if (!_iconsBundlePromise) {
+        _iconsBundlePromise = fetch(ICONS_BUNDLE_URL)
+            .then((response) => {
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.json();
+            })
+            .then((bundle) => {
+                ICONS_BUNDLE = bundle;
+                return bundle;
+            })
+            .catch((e) => {
+                console.error('Failed to load icon bundle:', e);
+                return null;
+            })
+            .finally(() => {
+                _iconsBundlePromise = null;
+            });
+    }
+    return _iconsBundlePromise;
+}
+
+async function getIconSVGText(svgPath) {
+    const file = String(svgPath || '').replace(/^\/+/, '');
+    const bundle = await loadIconsBundle();
+    if (bundle && bundle.icons && Object.prototype.hasOwnProperty.call(bundle.icons, file)) {
+        return bundle.icons[file];
+    }
+    const response = await fetch(buildIconUrl(svgPath, true), { cache: 'no-cache' });
+    return response.ok ? await response.text() : null;
+}
+
 let _iconIdCounter = 0;
 
 async function createIconSVGElement(svgPath, x, y, w, h) {
-    // Try to fetch and embed the SVG content
+    // Embed the SVG content, from the icon bundle when available
     try {
-        const response = await fetch(buildIconUrl(svgPath, true), { cache: 'no-store' });
-        if (response.ok) {
-            let svgText = await response.text();
+        const svgText = await getIconSVGText(svgPath);
+        if (svgText) {
             const parser = new DOMParser();
             const doc = parser.parseFromString(svgText, 'image/svg+xml');
             const svgEl = doc.querySelector('svg');
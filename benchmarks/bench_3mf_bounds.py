@@ -0,0 +1,110 @@
+"""
+Micro-benchmark for 3MF object bounds and package writing.
+
+Bounds for a text-heavy mesh, two ways:
+
+- legacy: parse the whole model with ``ET.fromstring`` and ``float()`` every
+  ``<vertex>`` attribute (the original ``_extract_object_bounds``)
+- native: min/max over the tessellation arrays ``server.py`` writes from
+
+Package writing: build123d ``Mesher.write_stream`` (the old first step
+before post-processing) against ``_write_label_3mf``.
+
+    python benchmarks/bench_3mf_bounds.py --text "M6x20 DIN912 A2" --copies 3
+"""
+import argparse
+import copy
+import io
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+import numpy as np
+from build123d import Location, Mesher, Text, extrude
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import server  # noqa: E402
+
+NS = server.THREEMF_CORE_NS
+
+def make_parts(text: str, copies: int):
+    part = extrude(Text(text, font_size=4), amount=0.2)
+    parts = []
+    for i in range(copies):
+        placed = part.moved(Location((0, i * 6, 0)))
+        placed.label = f"Text_{i + 1}"
+        parts.append(placed)
+    return parts
+
+def legacy_bounds(model: bytes):
+    root = ET.fromstring(model)
+    result = []
+    for obj in root.find(f"{{{NS}}}resources").findall(f"{{{NS}}}object"):
+        mesh_node = obj.find(f"{{{NS}}}mesh")
+        if mesh_node is None:
+            continue
+        xs, ys, zs = [], [], []
+        for v in mesh_node.find(f"{{{NS}}}vertices").findall(f"{{{NS}}}vertex"):
+            try:
+                xs.append(float(v.attrib.get("x", "0")))
+                ys.append(float(v.attrib.get("y", "0")))
+                zs.append(float(v.attrib.get("z", "0")))
+            except Exception:
+                continue
+        result.append(((min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs))))
+    return np.array(result)
+
+def native_bounds(meshes: list):
+    return np.array([(v.min(axis=0), v.max(axis=0)) for _, _, v, _ in meshes])
+
+def mesher_write(parts: list):
+    mesh = Mesher()
+    for part in parts:
+        mesh.add_shape(part)
+    raw = io.BytesIO()
+    mesh.write_stream(raw, "3mf")
+    return raw.getvalue()
+
+def native_write(parts: list):
+    # Fresh copies so every run meshes from scratch, as Mesher does.
+    meshes = [(p.label, i % 2, *server._tessellate_part(copy.deepcopy(p))) for i, p in enumerate(parts)]
+    return server._write_label_3mf(meshes)
+
+def main():
+    parser = argparse.ArgumentParser(description="3MF bounds and writer micro-benchmark")
+    parser.add_argument("--text", default="M6x20 DIN912 stainless hex socket cap screws")
+    parser.add_argument("--copies", type=int, default=2, help="text meshes in the model")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    parts = make_parts(args.text, args.copies)
+    meshes = [(p.label, 0, *server._tessellate_part(p)) for p in parts]
+    package = server._write_label_3mf(meshes)
+    with zipfile.ZipFile(io.BytesIO(package)) as zf:
+        model = zf.read("3D/3dmodel.model")
+    if not np.allclose(legacy_bounds(model), native_bounds(meshes), atol=1e-6):
+        raise SystemExit("native bounds differ from the legacy implementation")
+
+    vertices = sum(len(v) for _, _, v, _ in meshes)
+    print(f"model: {len(meshes)} object(s), {vertices} vertices, {len(model) / 1e6:.1f} MB XML")
+    groups = {
+        "bounds": {
+            "legacy (DOM + float loop)": lambda: legacy_bounds(model),
+            "native (tessellation arrays)": lambda: native_bounds(meshes),
+        },
+        "write": {
+            "Mesher.write_stream": lambda: mesher_write(parts),
+            "_write_label_3mf": lambda: native_write(parts),
+        },
+    }
+    for group, variants in groups.items():
+        timings = {name: min(timeit.repeat(fn, number=1, repeat=args.repeat)) for name, fn in variants.items()}
+        baseline = next(iter(timings.values()))
+        print(f"{group}:")
+        for name, best in timings.items():
+            print(f"  {name:30s} {best * 1000:9.2f} ms  {baseline / best:7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Export benchmark over the label corpus in ``benchmarks/corpus``.
+
+Suites, each run per corpus label:
+
+- parts: ``_build_label_parts_from_svg`` (SVG import, base plate, pocket boolean)
+- workers: ``build_step_worker`` / ``build_3mf_worker`` called the way the
+  export pool calls them, with per-stage timings
+- http: ``POST /api/export_step`` / ``/api/export_3mf`` through the app with
+  the worker pool running and the result cache disabled
+
+Every (suite, target, label) runs in a fresh process so peak RSS is its own;
+in-process suites first warm up like a pool worker (``_warm_up_worker``).
+Reports p50/p95 latency, peak RSS, output size and 3MF triangle count. A
+label that fails (for example an HTTP 504 past ``EXPORT_JOB_TIMEOUT``) is
+recorded with its error instead of stopping the run. Everything runs
+offline on the CPU.
+
+    python benchmarks/bench_export.py --save benchmarks/baselines/local.json
+    python benchmarks/bench_export.py --suite workers --compare benchmarks/baselines/local.json
+    python benchmarks/bench_export.py --suite workers --engine fast
+
+``--compare`` exits non-zero when a p50 is slower than the baseline by more
+than ``--tolerance`` or an output size or triangle count changed. Timings
+only compare meaningfully against a baseline from the same machine and
+mesh engine (``--engine``; the parts suite always runs OCCT).
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+CORPUS_DIR = BENCH_DIR / "corpus"
+SUITES = {
+    "parts": ("parts",),
+    "workers": ("step", "3mf"),
+    "http": ("step", "3mf"),
+}
+
+def _import_server():
+    sys.path.insert(0, str(BENCH_DIR.parent))
+    import server
+    return server
+
+def _peak_rss_bytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _percentile(values: list, fraction: float):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def _run_parts(label: dict, svg_text: str, runs: int, quality: str, engine: str):
+    server = _import_server()
+    server._warm_up_worker()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        server._build_label_parts_from_svg(svg_text, label["width"], label["height"], label["style"])
+        timings.append(time.perf_counter() - started)
+    return timings, [], None, None
+
+def _run_worker(target: str, label: dict, svg_text: str, runs: int, quality: str, engine: str):
+    server = _import_server()
+    worker = {"step": server.build_step_worker, "3mf": server.build_3mf_worker}[target]
+    server._warm_up_worker()
+    timings = []
+    stages = []
+    payload = None
+    for _ in range(runs):
+        queue = server._ResultQueue()
+        started = time.perf_counter()
+        worker(svg_text, label["width"], label["height"], label["style"], quality, engine, queue)
+        timings.append(time.perf_counter() - started)
+        status, payload = queue.items[0]
+        if status != "ok":
+            raise RuntimeError(payload)
+        stages.append(queue.stage_seconds())
+    triangles = server._3mf_triangle_count(payload) if target == "3mf" else None
+    return timings, stages, len(payload), triangles
+
+def _run_http(target: str, label: dict, svg_text: str, runs: int, quality: str, engine: str):
+    os.environ["EXPORT_CACHE_MAX_MB"] = "0"
+    os.environ.pop("EXPORT_CACHE_DIR", None)
+    os.environ.setdefault("EXPORT_WORKERS", "1")
+    # Keep the one worker alive so its memory can be read after the runs.
+    os.environ["EXPORT_WORKER_MAX_JOBS"] = "0"
+    os.environ["EXPORT_WORKER_MAX_RSS_MB"] = "0"
+    server = _import_server()
+    from fastapi.testclient import TestClient
+
+    timings = []
+    response = None
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + server.EXPORT_WORKER_READY_TIMEOUT
+        while client.get("/api/ready").status_code != 200:
+            if time.monotonic() > deadline:
+                raise RuntimeError("export workers did not become ready")
+            time.sleep(0.2)
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = client.post(
+                f"/api/export_{target}",
+                files={"svg_file": ("label.svg", svg_text, "image/svg+xml")},
+                data={"width": str(label["width"]), "height": str(label["height"]),
+                      "style": label["style"], "quality": quality, "engine": engine},
+            )
+            timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+        metrics = client.get("/metrics").text
+    worker_rss = [
+        int(line.rsplit(" ", 1)[1]) for line in metrics.splitlines()
+        if line.startswith("export_worker_rss_bytes{")
+    ]
+    triangles = response.headers.get("X-Mesh-Triangles")
+    result = (timings, [], len(response.content), int(triangles) if triangles else None)
+    return result, max(worker_rss, default=0)
+
+def run_case(suite: str, target: str, label: dict, repeat: int, warmup: int, quality: str, engine: str):
+    """Entry point of the per-case child process."""
+    svg_text = (CORPUS_DIR / label["file"]).read_text(encoding="utf-8")
+    runs = warmup + repeat
+    worker_rss = None
+    try:
+        if suite == "parts":
+            timings, stages, size, triangles = _run_parts(label, svg_text, runs, quality, engine)
+        elif suite == "workers":
+            timings, stages, size, triangles = _run_worker(target, label, svg_text, runs, quality, engine)
+        else:
+            (timings, stages, size, triangles), worker_rss = _run_http(
+                target, label, svg_text, runs, quality, engine
+            )
+    except Exception as e:
+        return {"error": str(e)[:300], "peak_rss_mb": round(_peak_rss_bytes() / 2**20, 1)}
+
+    timings = timings[warmup:]
+    stage_totals = {}
+    for run in stages[warmup:]:
+        for stage, seconds in run:
+            stage_totals.setdefault(stage, []).append(seconds)
+    result = {
+        "runs": len(timings),
+        "p50_s": round(_percentile(timings, 0.5), 4),
+        "p95_s": round(_percentile(timings, 0.95), 4),
+        "peak_rss_mb": round(_peak_rss_bytes() / 2**20, 1),
+        "output_bytes": size,
+        "triangles": triangles,
+    }
+    if worker_rss is not None:
+        # The HTTP process only parses and forwards; the work happens in the worker.
+        result["worker_rss_mb"] = round(worker_rss / 2**20, 1)
+    if stage_totals:
+        result["stages_p50_s"] = {stage: round(_percentile(v, 0.5), 4) for stage, v in stage_totals.items()}
+    return result
+
+def _environment(args):
+    try:
+        from importlib.metadata import version
+        build123d_version = version("build123d")
+    except Exception:
+        build123d_version = None
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "build123d": build123d_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "quality": args.quality,
+        "engine": args.engine,
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Print changes against ``baseline``; return the number of regressions."""
+    regressions = 0
+    print(f"\nagainst baseline from {baseline['environment'].get('created')} ({baseline['environment'].get('platform')}):")
+    for key, current in results.items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            print(f"  {key:42s} new")
+            continue
+        if "error" in current or "error" in previous:
+            failed_now = "error" in current and "error" not in previous
+            regressions += failed_now
+            state = lambda result: "error" if "error" in result else f"{result['p50_s']:.3f}s"
+            print(f"  {key:42s} {state(previous)} -> {state(current)} {'FAILED' if failed_now else ''}")
+            continue
+        ratio = current["p50_s"] / previous["p50_s"] if previous["p50_s"] else 1.0
+        notes = []
+        if ratio > 1 + tolerance:
+            notes.append("SLOWER")
+        for field in ("output_bytes", "triangles"):
+            if current.get(field) != previous.get(field):
+                notes.append(f"{field} {previous.get(field)} -> {current.get(field)}")
+        regressions += bool(notes)
+        print(f"  {key:42s} p50 {previous['p50_s']:8.3f}s -> {current['p50_s']:8.3f}s ({ratio:5.2f}x) {' '.join(notes)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Export benchmark over the label corpus")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suite(s) to run, default all")
+    parser.add_argument("--case", action="append", help="corpus label(s) to run, default all")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--warmup", type=int, default=0, help="untimed runs per case")
+    parser.add_argument("--quality", default="normal", help="3MF tessellation preset")
+    parser.add_argument("--engine", default="occt", choices=("occt", "fast"), help="3MF mesh engine")
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown for --compare")
+    args = parser.parse_args()
+
+    corpus = json.loads((CORPUS_DIR / "manifest.json").read_text(encoding="utf-8"))
+    if args.case:
+        corpus = [label for label in corpus if label["name"] in args.case]
+        if not corpus:
+            raise SystemExit(f"no corpus labels named {', '.join(args.case)}")
+
+    results = {}
+    print(f"{'case':42s} {'p50':>8s} {'p95':>8s} {'peak RSS':>9s} {'bytes':>10s} {'triangles':>9s}")
+    for suite in args.suite or list(SUITES):
+        for target in SUITES[suite]:
+            for label in corpus:
+                key = f"{suite}/{target}/{label['name']}"
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    result = executor.submit(
+                        run_case, suite, target, label, args.repeat, args.warmup, args.quality, args.engine
+                    ).result()
+                results[key] = result
+                if "error" in result:
+                    print(f"{key:42s} error: {result['error']}")
+                    continue
+                rss = result.get("worker_rss_mb", result["peak_rss_mb"])
+                print(
+                    f"{key:42s} {result['p50_s']:7.3f}s {result['p95_s']:7.3f}s {rss:7.1f}MB "
+                    f"{result['output_bytes'] or '-':>10} {result['triangles'] or '-':>9}"
+                )
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(
+            json.dumps({"environment": _environment(args), "results": results}, indent=2) + "\n",
+            encoding="utf-8"
+        )
+        print(f"\nsaved {args.save}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(results, baseline, args.tolerance):
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
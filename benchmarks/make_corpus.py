@@ -0,0 +1,174 @@
+"""
+Regenerate the benchmark corpus in ``benchmarks/corpus``.
+
+Compat fixtures are rasterised the way the editor's compat export does it
+(``generateContourSVGString`` in ``assets/js/app.js``): icons from ``Icons/``
+and text in the bundled label font are drawn at 28 px/mm, and each run of
+dark pixels becomes a rectangle, merged with identical runs on the rows
+below. The vector fixture places a library SVG icon with a transform, as
+vector mode does. Layout is a simplified version of ``computeLabelLayout``.
+
+    python benchmarks/make_corpus.py
+
+The output is committed, so benchmarks never depend on this script or on
+Pillow; rerun it only to change the corpus, then refresh the baselines.
+"""
+import json
+import re
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+ROOT = Path(__file__).resolve().parent.parent
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+FONT_PATH = ROOT / "assets" / "fonts" / "BungeeOutline-Regular.ttf"
+PX_PER_MM = 28
+MARGIN = 0.6
+GAP = 0.6
+# CONFIG.baseSizes in assets/js/app.js
+SIZES = {"1u": (34.5, 10.5), "2u": (76.5, 10.5), "3u": (118.5, 10.5)}
+
+CASES = [
+    {"name": "icon_only_1u", "size": "1u", "style": "flush",
+     "icons": ["mechanical_nut_hex.png"], "lines": [],
+     "description": "single icon, no text"},
+    {"name": "icon_short_text_1u", "size": "1u", "style": "raised",
+     "icons": ["mechanical_screw_pan_head.png"], "lines": ["M3x8"],
+     "description": "icon and a short size code"},
+    {"name": "two_icons_text_2u", "size": "2u", "style": "flush",
+     "icons": ["mechanical_Head_Hex.png", "mechanical_screw_machine_countersunk.png"], "lines": ["M5x16"],
+     "description": "two icons and text"},
+    {"name": "long_text_2u", "size": "2u", "style": "raised",
+     "icons": ["mechanical_screw_round_head.png"], "lines": ["M6x20 DIN912 A2"],
+     "description": "icon and a long line of text"},
+    {"name": "dense_multiline_3u", "size": "3u", "style": "flush",
+     "icons": ["mechanical_nut_hex.png", "electrical_header_male.png"],
+     "lines": ["JST-XH 2.54 4 PIN", "CRIMP HOUSING + TERMINALS"],
+     "description": "two icons and two dense text lines"},
+    {"name": "text_only_3u", "size": "3u", "style": "raised",
+     "icons": [], "lines": ["STAINLESS HEX SOCKET CAP SCREWS"],
+     "description": "full-width text, no icon"},
+]
+
+VECTOR_CASES = [
+    {"name": "vector_icon_1u", "size": "1u", "style": "raised",
+     "icon": "mechanical_screw_pan_head.svg",
+     "description": "vector-mode SVG: one library icon placed with a transform"},
+]
+
+def _fit_font(text: str, max_width: int, max_height: int):
+    size = max_height
+    while size > 4:
+        font = ImageFont.truetype(str(FONT_PATH), size)
+        left, top, right, bottom = font.getbbox(text)
+        if right - left <= max_width and bottom - top <= max_height:
+            return font
+        size -= 1
+    return ImageFont.truetype(str(FONT_PATH), size)
+
+def _render(case: dict):
+    width, height = SIZES[case["size"]]
+    px = lambda mm: int(round(mm * PX_PER_MM))
+    image = Image.new("L", (px(width), px(height)), 255)
+    draw = ImageDraw.Draw(image)
+
+    x = MARGIN
+    icon_size = height - 2 * MARGIN
+    for icon_name in case["icons"]:
+        icon = Image.open(ROOT / "Icons" / icon_name).convert("RGBA").resize((px(icon_size), px(icon_size)))
+        ink = Image.new("L", icon.size, 0)
+        image.paste(ink, (px(x), px(MARGIN)), icon.getchannel("A"))
+        x += icon_size + GAP
+
+    lines = case["lines"]
+    if lines:
+        text_width = width - MARGIN - x
+        line_height = (height - 2 * MARGIN) / len(lines)
+        for i, line in enumerate(lines):
+            font = _fit_font(line, px(text_width), px(line_height * 0.9))
+            center_y = MARGIN + line_height * (i + 0.5)
+            draw.text((px(x + text_width / 2), px(center_y)), line, font=font, fill=0, anchor="mm")
+    return image, width, height
+
+def _runs_to_rects(image: Image.Image):
+    """Python port of ``rasterRunsToRects``."""
+    width, height = image.size
+    pixels = image.load()
+    active = {}
+    rects = []
+    for y in range(height):
+        runs = []
+        x = 0
+        while x < width:
+            if pixels[x, y] >= 140:
+                x += 1
+                continue
+            x0 = x
+            while x < width and pixels[x, y] < 140:
+                x += 1
+            runs.append((x0, x - 1))
+        next_keys = set(runs)
+        for key in runs:
+            if key in active:
+                active[key]["h"] += 1
+            else:
+                active[key] = {"x": key[0], "y": y, "w": key[1] - key[0] + 1, "h": 1}
+        for key in [key for key in active if key not in next_keys]:
+            rects.append(active.pop(key))
+    rects.extend(active.values())
+    return rects
+
+def _compat_svg(case: dict):
+    image, width, height = _render(case)
+    paths = []
+    for r in _runs_to_rects(image):
+        x0, y0 = r["x"] / PX_PER_MM, r["y"] / PX_PER_MM
+        x1, y1 = (r["x"] + r["w"]) / PX_PER_MM, (r["y"] + r["h"]) / PX_PER_MM
+        paths.append(
+            f'<path fill="black" d="M {x0:.3f} {y0:.3f} L {x1:.3f} {y0:.3f} '
+            f'L {x1:.3f} {y1:.3f} L {x0:.3f} {y1:.3f} Z" />'
+        )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}mm" height="{height}mm" '
+        f'viewBox="0 0 {width} {height}">\n' + "\n".join(paths) + "\n</svg>\n"
+    ), len(paths)
+
+def _vector_svg(case: dict):
+    width, height = SIZES[case["size"]]
+    icon = (ROOT / "Icons_SVG" / case["icon"]).read_text(encoding="utf-8")
+    view_box = [float(v) for v in re.search(r'viewBox="([^"]+)"', icon).group(1).replace(",", " ").split()]
+    inner = re.sub(r"^.*?<svg[^>]*>|</svg>\s*$", "", icon, flags=re.S)
+    size = height - 2 * MARGIN
+    scale = size / max(view_box[2], view_box[3])
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'<g transform="translate({MARGIN} {MARGIN}) scale({scale:.6f}) translate({-view_box[0]} {-view_box[1]})">'
+        f"{inner}</g></svg>\n"
+    )
+
+def main():
+    CORPUS_DIR.mkdir(exist_ok=True)
+    manifest = []
+    for case in CASES:
+        svg, rect_count = _compat_svg(case)
+        (CORPUS_DIR / f"{case['name']}.svg").write_text(svg, encoding="utf-8")
+        width, height = SIZES[case["size"]]
+        manifest.append({
+            "name": case["name"], "file": f"{case['name']}.svg", "mode": "compat",
+            "width": width, "height": height, "style": case["style"],
+            "description": case["description"], "rects": rect_count,
+        })
+        print(f"{case['name']}: {rect_count} rects")
+    for case in VECTOR_CASES:
+        (CORPUS_DIR / f"{case['name']}.svg").write_text(_vector_svg(case), encoding="utf-8")
+        width, height = SIZES[case["size"]]
+        manifest.append({
+            "name": case["name"], "file": f"{case['name']}.svg", "mode": "vector",
+            "width": width, "height": height, "style": case["style"],
+            "description": case["description"],
+        })
+        print(f"{case['name']}: vector")
+    (CORPUS_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
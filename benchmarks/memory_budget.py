@@ -0,0 +1,215 @@
+"""
+Memory of the whole export stack against a container limit.
+
+Starts ``server.py`` the way the container does, waits for the workers to
+warm up and reads the proportional set size (Pss) of every process in the
+tree: web tier, multiprocessing resource tracker, fork server and export
+workers. Pss splits shared pages between the processes that map them, so
+the sum is what the stack costs as a whole. Then runs every corpus label
+as STEP and 3MF, one structured label spec and one plate while sampling
+the total, and reports idle and peak, plus the private memory workers
+report after each request (what ``EXPORT_WORKER_MAX_RSS_MB`` checks).
+``EXPORT_MEMORY_BUDGET_MB`` is checked against the Pss_Anon total.
+
+    EXPORT_MEMORY_BUDGET_MB=512 python benchmarks/memory_budget.py --limit-mb 1024
+
+Server settings come from the environment as usual (the result cache is
+disabled so every request builds). Exits non-zero when the peak exceeds
+``--limit-mb``. Linux only: it reads ``/proc``.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+CORPUS_DIR = BENCH_DIR / "corpus"
+
+def process_tree(pid: int, parent: int = 0):
+    """``[(pid, parent pid), ...]`` for ``pid`` and all of its descendants."""
+    pids = [(pid, parent)]
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except FileNotFoundError:
+        return pids
+    for task in tasks:
+        try:
+            children = Path(f"/proc/{pid}/task/{task}/children").read_text().split()
+        except OSError:
+            continue
+        for child in children:
+            pids.extend(process_tree(int(child), pid))
+    return pids
+
+def process_memory(pid: int):
+    """``(Pss, Pss_Anon)`` of one process in bytes, None once it has exited."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in ("Pss", "Pss_Anon"):
+                    values[name] = int(rest.split()[0]) * 1024
+    except OSError:
+        return None
+    return values.get("Pss", 0), values.get("Pss_Anon", 0)
+
+def process_role(pid: int, parent: int, root: int):
+    if pid == root:
+        return "web"
+    if parent != root:
+        # Forked by the fork server.
+        return "worker"
+    try:
+        cmdline = Path(f"/proc/{pid}/cmdline").read_text().replace("\0", " ")
+    except OSError:
+        return "?"
+    if "resource_tracker" in cmdline:
+        return "resource tracker"
+    if "forkserver" in cmdline:
+        return "fork server"
+    # Spawned directly (EXPORT_START_METHOD=spawn).
+    return "worker"
+
+def tree_memory(root: int):
+    rows = []
+    for pid, parent in process_tree(root):
+        memory = process_memory(pid)
+        if memory is not None:
+            rows.append((pid, process_role(pid, parent, root), *memory))
+    return rows
+
+def _request(url: str, data=None, headers=None, timeout=300):
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def _multipart(fields: dict, svg_text: str):
+    boundary = "memorybudget"
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="svg_file"; filename="label.svg"\r\n'
+        f"Content-Type: image/svg+xml\r\n\r\n{svg_text}\r\n--{boundary}--\r\n"
+    )
+    return "".join(parts).encode("utf-8"), {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+def _worker_private_mb(base_url: str):
+    """Largest private memory the workers reported after their last job (what recycling checks)."""
+    _, metrics = _request(f"{base_url}/metrics")
+    values = [
+        int(line.rsplit(" ", 1)[1]) for line in metrics.decode("utf-8").splitlines()
+        if line.startswith("export_worker_rss_bytes{")
+    ]
+    return max(values, default=0) / 2**20
+
+def workload(base_url: str, corpus: list):
+    """Run the memory workload, printing status, time and worker memory per request."""
+    requests = []
+    for label in corpus:
+        svg_text = (CORPUS_DIR / label["file"]).read_text(encoding="utf-8")
+        fields = {"width": label["width"], "height": label["height"], "style": label["style"]}
+        for fmt in ("step", "3mf"):
+            requests.append((f"{fmt}/{label['name']}", f"/api/export_{fmt}", *_multipart(fields, svg_text)))
+    spec = {
+        "width": 76.5, "height": 10.5, "style": "raised", "format": "3mf",
+        "icons": [{"name": "mechanical_screw_pan_head.svg", "x": 0.6, "y": 0.6, "width": 9.3, "height": 9.3}],
+        "texts": [{"text": "M6x20 DIN912 A2", "x": 11, "y": 5.25, "size": 4}],
+    }
+    plate = {"labels": [
+        {"svg": (CORPUS_DIR / label["file"]).read_text(encoding="utf-8"),
+         "width": label["width"], "height": label["height"], "style": label["style"], "copies": 2}
+        for label in corpus[:3]
+    ]}
+    json_headers = {"Content-Type": "application/json"}
+    requests.append(("label_spec", "/api/export_label", json.dumps(spec).encode("utf-8"), json_headers))
+    requests.append(("plate", "/api/export_plate", json.dumps(plate).encode("utf-8"), json_headers))
+
+    print(f"\n{'request':36s} {'status':>6s} {'time':>7s} {'worker private':>15s}")
+    failed = []
+    for name, path, data, headers in requests:
+        started = time.perf_counter()
+        status, _ = _request(f"{base_url}{path}", data, headers)
+        print(f"  {name:34s} {status:6d} {time.perf_counter() - started:6.1f}s {_worker_private_mb(base_url):14.1f}M")
+        if status != 200:
+            failed.append(f"{name} ({status})")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory of the export stack against a container limit")
+    parser.add_argument("--limit-mb", type=float, default=1024, help="container memory limit to check against")
+    parser.add_argument("--port", type=int, default=3190)
+    parser.add_argument("--interval", type=float, default=0.1, help="sampling interval, seconds")
+    args = parser.parse_args()
+
+    corpus = json.loads((CORPUS_DIR / "manifest.json").read_text(encoding="utf-8"))
+    env = dict(os.environ, PORT=str(args.port), HOST="127.0.0.1", EXPORT_CACHE_MAX_MB="0")
+    env.pop("EXPORT_CACHE_DIR", None)
+    server = subprocess.Popen(
+        [sys.executable, "server.py"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        deadline = time.monotonic() + 180
+        while True:
+            try:
+                if _request(f"{base_url}/api/ready", timeout=5)[0] == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise SystemExit("server did not become ready")
+            time.sleep(0.5)
+        time.sleep(1)
+
+        idle = tree_memory(server.pid)
+        print(f"{'idle':24s} {'Pss':>9s} {'Pss_Anon':>9s}")
+        for pid, role, pss, anon in idle:
+            print(f"  {role:22s} {pss / 2**20:8.1f}M {anon / 2**20:8.1f}M  (pid {pid})")
+        idle_total = sum(row[2] for row in idle)
+        print(f"  {'total':22s} {idle_total / 2**20:8.1f}M {sum(row[3] for row in idle) / 2**20:8.1f}M")
+
+        peak = [idle_total, idle]
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(args.interval):
+                rows = tree_memory(server.pid)
+                total = sum(row[2] for row in rows)
+                if total > peak[0]:
+                    peak[:] = [total, rows]
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        failed = workload(base_url, corpus)
+        stop.set()
+        sampler.join()
+        print(f"\n{'peak':24s} {'Pss':>9s} {'Pss_Anon':>9s}")
+        for pid, role, pss, anon in peak[1]:
+            print(f"  {role:22s} {pss / 2**20:8.1f}M {anon / 2**20:8.1f}M  (pid {pid})")
+        print(
+            f"  {'total':22s} {peak[0] / 2**20:8.1f}M {sum(row[3] for row in peak[1]) / 2**20:8.1f}M"
+            f"  limit {args.limit_mb:g}M"
+        )
+    finally:
+        server.terminate()
+        server.wait()
+    if failed:
+        print(f"failed: {', '.join(failed)}")
+    if peak[0] > args.limit_mb * 2**20 or failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
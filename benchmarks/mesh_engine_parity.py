@@ -0,0 +1,105 @@
+"""
+Parity check of the fast 3MF mesh engine against OCCT over the label corpus.
+
+For each corpus label both engines build the label meshes in this process
+(``_label_meshes`` on the OCCT parts, ``_fast_label_meshes`` from the SVG),
+and each part is compared:
+
+- volume, within ``--volume-tolerance`` (relative); the fast engine
+  approximates the base chamfers, everything else should match closely
+- bounding box, within ``--bounds-tolerance`` mm
+- closed surface: every fast-engine edge has a reversed twin
+
+Prints latency and triangles of both engines and exits non-zero on any
+mismatch.
+
+    python benchmarks/mesh_engine_parity.py
+    python benchmarks/mesh_engine_parity.py --case vector_icon_1u --quality draft
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+CORPUS_DIR = BENCH_DIR / "corpus"
+sys.path.insert(0, str(BENCH_DIR.parent))
+import server  # noqa: E402
+
+def mesh_volume(vertices, triangles):
+    a, b, c = (vertices[triangles[:, k]] for k in range(3))
+    return float(np.einsum("ij,ij->i", a, np.cross(b, c)).sum() / 6)
+
+def open_edges(triangles):
+    edges = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+    count = int(triangles.max()) + 1
+    return int(np.count_nonzero(~np.isin(edges[:, 1] * count + edges[:, 0], edges[:, 0] * count + edges[:, 1])))
+
+def compare_label(label: dict, quality: str, volume_tolerance: float, bounds_tolerance: float):
+    """Print one label's comparison; return its list of problems."""
+    svg_text = (CORPUS_DIR / label["file"]).read_text(encoding="utf-8")
+    w, h, style = label["width"], label["height"], label["style"]
+
+    started = time.perf_counter()
+    base_part, content_part = server._build_label_parts_from_svg(svg_text, w, h, style)
+    occt = server._label_meshes(base_part, content_part, quality=quality)
+    occt_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    fast = server._fast_label_meshes(svg_text, float(w), float(h), style, quality=quality)
+    fast_seconds = time.perf_counter() - started
+
+    print(f"{label['name']}: occt {occt_seconds:.3f}s, fast {fast_seconds:.3f}s ({occt_seconds / fast_seconds:.0f}x)")
+    problems = []
+    if [m[0] for m in occt] != [m[0] for m in fast]:
+        return [f"parts differ: {[m[0] for m in occt]} vs {[m[0] for m in fast]}"]
+    for (name, _, occt_vertices, occt_triangles), (_, _, vertices, triangles) in zip(occt, fast):
+        occt_volume = mesh_volume(occt_vertices, occt_triangles)
+        volume = mesh_volume(vertices, triangles)
+        bounds_error = float(np.abs(np.concatenate([
+            vertices.min(axis=0) - occt_vertices.min(axis=0),
+            vertices.max(axis=0) - occt_vertices.max(axis=0),
+        ])).max())
+        unpaired = open_edges(triangles)
+        print(
+            f"  {name:16s} volume {occt_volume:10.4f} -> {volume:10.4f} mm3, "
+            f"bounds off by {bounds_error:.4f} mm, triangles {len(occt_triangles)} -> {len(triangles)}, "
+            f"open edges {unpaired}"
+        )
+        if abs(volume - occt_volume) > volume_tolerance * abs(occt_volume):
+            problems.append(f"{name} volume {volume:.4f} vs {occt_volume:.4f}")
+        if bounds_error > bounds_tolerance:
+            problems.append(f"{name} bounds off by {bounds_error:.4f} mm")
+        if unpaired:
+            problems.append(f"{name} has {unpaired} open edges")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast mesh engine parity check against OCCT")
+    parser.add_argument("--case", action="append", help="corpus label(s) to check, default all")
+    parser.add_argument("--quality", default="normal", choices=sorted(server.THREEMF_QUALITY_PRESETS))
+    parser.add_argument("--volume-tolerance", type=float, default=0.001, help="relative volume difference allowed")
+    parser.add_argument("--bounds-tolerance", type=float, default=0.01, help="bounding box difference allowed, mm")
+    args = parser.parse_args()
+
+    corpus = json.loads((CORPUS_DIR / "manifest.json").read_text(encoding="utf-8"))
+    if args.case:
+        corpus = [label for label in corpus if label["name"] in args.case]
+        if not corpus:
+            raise SystemExit(f"no corpus labels named {', '.join(args.case)}")
+
+    server._warm_up_worker()
+    failures = {}
+    for label in corpus:
+        problems = compare_label(label, args.quality, args.volume_tolerance, args.bounds_tolerance)
+        if problems:
+            failures[label["name"]] = problems
+    for name, problems in failures.items():
+        print(f"FAILED {name}: {'; '.join(problems)}")
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,132 @@
+import asyncio
+import contextvars
+import copy
+import hashlib
+import io
 import json
+import math
+import multiprocessing
 import os
-import tempfile
+import gzip
+import re
+import shutil
+import signal
+import time
+import uuid
 import zipfile
 import mimetypes
 import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import List, Optional
 from fastapi import FastAPI, Request, HTTPException, Form, File, UploadFile
-from fastapi.responses import FileResponse, JSONResponse, Response
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from build123d import BuildPart, BuildSketch, import_svg, extrude, Compound, export_step, Color, Plane, add, Mesher
+from pydantic import BaseModel
+import numpy as np
 import uvicorn
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 PORT = int(os.environ.get("PORT", "3000"))
 HOST = os.environ.get("HOST", "0.0.0.0")
 BASE_DIR = Path(__file__).parent.resolve()
 ICONS_FOLDER = BASE_DIR / "Icons_SVG"
+# Seconds between icon folder checks (0 disables the watcher).
+ICONS_POLL_SECONDS = float(os.environ.get("ICONS_POLL_SECONDS", "2"))
+# Per-worker budget for imported icon faces reused by structured label exports.
+ICON_GEOMETRY_CACHE_MB = max(0, float(os.environ.get("ICON_GEOMETRY_CACHE_MB", "16")))
+TEXT_FONT_PATH = BASE_DIR / "assets" / "fonts" / "BungeeOutline-Regular.ttf"
 TMP_DIR = Path(os.environ.get("TMPDIR", "/tmp"))
+# Exports run entirely in memory; the one disk spill left is the multipart
+# parser spooling uploads over 1 MB into TMP_DIR. Those reserve their size
+# against this budget (default: half of TMP_DIR's filesystem) and wait up to
+# EXPORT_SCRATCH_WAIT seconds for room instead of filling a small tmpfs.
+EXPORT_SCRATCH_MB = max(0.0, float(os.environ.get("EXPORT_SCRATCH_MB", "0")))
+EXPORT_SCRATCH_WAIT = max(0.0, float(os.environ.get("EXPORT_SCRATCH_WAIT", "30")))
+
+# Export worker pool. CAD builds run in pre-forked processes so a long OCCT
+# build never blocks the event loop serving the UI, icons and static assets.
+EXPORT_WORKERS = max(1, int(os.environ.get("EXPORT_WORKERS", "1")))
+EXPORT_JOB_TIMEOUT = float(os.environ.get("EXPORT_JOB_TIMEOUT", "80"))
+EXPORT_QUEUE_LIMIT = max(0, int(os.environ.get("EXPORT_QUEUE_LIMIT", "8")))
+EXPORT_WORKER_MAX_JOBS = max(0, int(os.environ.get("EXPORT_WORKER_MAX_JOBS", "50")))
+EXPORT_WORKER_MAX_RSS_MB = max(0, int(os.environ.get("EXPORT_WORKER_MAX_RSS_MB", "256")))
+# Anonymous memory of the whole stack (web tier, fork server, workers) as the
+# sum of their Pss_Anon, so pages shared with the fork server count once;
+# file-backed pages (the CAD libraries) can be reclaimed and are left out. A
+# worker that leaves the total above this after a job is recycled; 0
+# disables. Size the container limit for this plus one job's peak
+# (benchmarks/memory_budget.py).
+EXPORT_MEMORY_BUDGET_MB = max(0, int(os.environ.get("EXPORT_MEMORY_BUDGET_MB", "0")))
+# Warm-up: each worker loads the CAD stack and builds a throwaway label before
+# it takes jobs; /api/ready reports 503 until at least one worker is warm.
+EXPORT_WORKER_WARMUP = os.environ.get("EXPORT_WORKER_WARMUP", "1").strip().lower() not in ("0", "false", "no")
+EXPORT_WORKER_READY_TIMEOUT = float(os.environ.get("EXPORT_WORKER_READY_TIMEOUT", "120"))
+# A worker that fails to start is retried after 1s, doubling up to this cap.
+EXPORT_WORKER_RESPAWN_MAX_DELAY = max(1.0, float(os.environ.get("EXPORT_WORKER_RESPAWN_MAX_DELAY", "30")))
+EXPORT_START_METHOD = os.environ.get(
+    "EXPORT_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Default 3MF tessellation preset (draft, normal or fine); requests may override it.
+EXPORT_MESH_QUALITY = os.environ.get("EXPORT_MESH_QUALITY", "normal").strip().lower()
+# Default 3MF mesh engine: "occt" tessellates the CAD parts, "fast" builds the
+# meshes straight from the SVG polygons (see _fast_label_meshes).
+EXPORT_MESH_ENGINE = os.environ.get("EXPORT_MESH_ENGINE", "occt").strip().lower()
+
+# Rasterised compat SVGs are merged into outline polygons before CAD import,
+# and the outlines simplified within this many mm: the default is about one
+# pixel of the editor's 28 px/mm raster, 0 keeps the exact pixel staircase.
+EXPORT_COMPAT_MERGE = os.environ.get("EXPORT_COMPAT_MERGE", "1").strip().lower() not in ("0", "false", "no")
+EXPORT_COMPAT_SIMPLIFY_MM = max(0.0, float(os.environ.get("EXPORT_COMPAT_SIMPLIFY_MM", "0.04")))
+
+# Export result cache. Entries are keyed on the request content plus a hash of
+# this file and the geometry settings, so a deploy with different geometry
+# code or settings never serves stale output.
+EXPORT_CACHE_MAX_MB = max(0, int(os.environ.get("EXPORT_CACHE_MAX_MB", "32")))
+EXPORT_CACHE_DIR = os.environ.get("EXPORT_CACHE_DIR", "").strip()
+EXPORT_CACHE_DISK_MAX_MB = max(0, int(os.environ.get("EXPORT_CACHE_DISK_MAX_MB", "256")))
+EXPORT_CODE_VERSION = hashlib.sha256(
+    Path(__file__).read_bytes() + f"|{EXPORT_COMPAT_MERGE}|{EXPORT_COMPAT_SIMPLIFY_MM}".encode()
+).hexdigest()[:16]
 
 # Ensure font files under /assets are served with correct MIME types.
 mimetypes.add_type("font/woff2", ".woff2")
 mimetypes.add_type("font/ttf", ".ttf")
 mimetypes.add_type("font/otf", ".otf")
 
-app = FastAPI(title="InfinityGrid Sticker Designer API")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Workers warm up in the background; the CAD stack is never imported here.
+    export_pool.start()
+    icon_index.refresh(compress=False)
+    assets = static_assets.load()
+    print(f"Static assets: {assets} file(s) fingerprinted")
+    # Until this finishes, icons and assets are served uncompressed.
+    precompress = asyncio.create_task(asyncio.to_thread(_precompress_static_payloads))
+    icon_watcher = None
+    if ICONS_POLL_SECONDS > 0:
+        icon_watcher = asyncio.create_task(_watch_icon_library())
+    try:
+        yield
+    finally:
+        if icon_watcher is not None:
+            icon_watcher.cancel()
+        precompress.cancel()
+        export_pool.shutdown()
+
+app = FastAPI(title="InfinityGrid Sticker Designer API", lifespan=lifespan)
 THREEMF_CORE_NS = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
 THREEMF_MATERIAL_NS = "http://schemas.microsoft.com/3dmanufacturing/material/2015/02"
 BAMBU_NS = "http://schemas.bambulab.com/package/2021"
 
-@app.middleware("http")
-async def disable_icon_cache(request: Request, call_next):
-    response = await call_next(request)
-    if request.url.path.startswith("/icons/"):
-        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-    return response
-
 def _save_failed_svg_debug(filename: str, svg_content: str):
     if not svg_content:
         return
@@ -66,22 +156,35 @@ def _set_shape_metadata(shape, *, label=None, material=None, color=None):
         except Exception:
             pass
 
-def _build_label_parts_from_svg(svg_path: Path, w, h, sty):
-    base_color = Color(0, 0, 0)
-    content_color = Color(1, 1, 1)
-    base_thickness = 0.8
-    svg_width_val = float(w)
-    svg_height_val = float(h)
+# Base plate geometry. The plate only depends on the label width, so each
+# worker keeps finished (chamfered) plates and reuses them across exports.
+BASE_PLATE_THICKNESS = 0.8
+BASE_PLATE_WIDTH = 11.5
+BASE_PLATE_CHAMFER = 0.2
+BASE_PLATE_CORNER_RADIUS = 0.9
+# Side tabs: a narrower strip sticking out past both ends of the label body.
+BASE_PLATE_TAB_WIDTH = 5.7
+BASE_PLATE_TAB_OVERHANG = 1.0
+BASE_PLATE_TAB_RADIUS = 0.2
+BASE_PLATE_CACHE_SIZE = 16
+# Label widths offered by the editor (1u/2u/3u in assets/js/app.js).
+COMMON_LABEL_WIDTHS = (34.5, 76.5, 118.5)
+_base_plate_cache = OrderedDict()
+
+def _base_plate_outline(length, base_width_val, corner_radius):
+    """2D outline of the base plate (label body plus the two side tabs)."""
+    from build123d import BuildSketch, RectangleRounded
+
+    with BuildSketch() as sketch:
+        RectangleRounded(length, base_width_val, corner_radius)
+        RectangleRounded(length + 2 * BASE_PLATE_TAB_OVERHANG, BASE_PLATE_TAB_WIDTH, BASE_PLATE_TAB_RADIUS)
+    return sketch.sketch
+
+def _build_base_plate(length, base_width_val, base_thickness, chamfer_val, corner_radius):
+    from build123d import Axis, BuildPart, Color, add, chamfer, extrude
 
     with BuildPart() as base:
-        length = svg_width_val + 1.3
-        base_width_val = 11.5
-        chamfer_val = 0.2
-        corner_radius = 0.9
-        with BuildSketch() as _sketch:
-            from build123d import RectangleRounded, chamfer, Axis
-            RectangleRounded(length, base_width_val, corner_radius)
-            RectangleRounded(length + 2, 5.7, 0.2)
+        add(_base_plate_outline(length, base_width_val, corner_radius))
         extrude(amount=base_thickness)
         top_edges = base.faces().sort_by(Axis.Z)[-1].outer_wire().edges()
         bottom_edges = base.faces().sort_by(Axis.Z)[0].outer_wire().edges()
@@ -89,46 +192,395 @@ def _build_label_parts_from_svg(svg_path: Path, w, h, sty):
             chamfer(top_edges + bottom_edges, length=chamfer_val)
         except Exception as e:
             print(f"Warning: Chamfer failed on base: {e}")
-        _set_shape_metadata(
-            base.part,
-            label="Base_Black",
-            material="Base_Black",
-            color=base_color
-        )
+    _set_shape_metadata(
+        base.part,
+        label="Base_Black",
+        material="Base_Black",
+        color=Color(0, 0, 0)
+    )
+    return base.part
+
+def _base_plate_length(svg_width_val: float):
+    return round(svg_width_val + 1.3, 3)
+
+def _get_base_plate(svg_width_val: float):
+    """Copy of the chamfered base plate for a label ``svg_width_val`` wide."""
+    key = (
+        _base_plate_length(svg_width_val),
+        BASE_PLATE_WIDTH,
+        BASE_PLATE_THICKNESS,
+        BASE_PLATE_CHAMFER,
+        BASE_PLATE_CORNER_RADIUS,
+    )
+    plate = _base_plate_cache.get(key)
+    if plate is None:
+        plate = _build_base_plate(*key)
+        _base_plate_cache[key] = plate
+        while len(_base_plate_cache) > BASE_PLATE_CACHE_SIZE:
+            _base_plate_cache.popitem(last=False)
+    else:
+        _base_plate_cache.move_to_end(key)
+    return copy.copy(plate)
 
-    from build123d import Locations
+def _warm_base_plate_cache():
+    for width in COMMON_LABEL_WIDTHS:
+        _get_base_plate(width)
 
-    def build_svg_part(z_offset: float, depth: float):
-        with BuildPart() as p:
-            with BuildSketch(Plane.XY.offset(z_offset)):
-                with Locations((-svg_width_val / 2, -svg_height_val / 2)):
-                    add(import_svg(str(svg_path)))
-            extrude(amount=depth)
-        return p.part
+WARMUP_LABEL_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="34.5mm" height="10.5mm" viewBox="0 0 34.5 10.5">'
+    '<path d="M 2 2 L 8 2 L 8 8 L 2 8 Z"/></svg>'
+)
 
-    # Always cut a pocket from the base where content goes, so the exported bodies
-    # don't share coplanar faces that some slicers treat as interference.
+def _warm_up_worker():
+    """Load the CAD stack and run one throwaway label through the whole pipeline."""
+    _warm_base_plate_cache()
+    _export_formats(WARMUP_LABEL_SVG, COMMON_LABEL_WIDTHS[0], 10.5, "flush", ["3mf"])
+    _export_formats(WARMUP_LABEL_SVG, COMMON_LABEL_WIDTHS[0], 10.5, "flush", ["3mf"], engine="fast")
+
+# Compat SVGs (generateContourSVGString in app.js) are one rectangle path per
+# run of dark raster pixels, thousands per label. Importing them as is makes
+# thousands of coplanar faces that BuildSketch then fuses one by one. Such
+# input is detected and unioned on its coordinate grid into a few outline
+# polygons with holes, optionally simplified, before any CAD work.
+SVG_RECT_PATH_RE = re.compile(
+    r'<path\s+(?:fill="[^"]*"\s+)?d="\s*M\s*(-?[\d.]+)[\s,]+(-?[\d.]+)\s*L\s*(-?[\d.]+)[\s,]+(-?[\d.]+)'
+    r'\s*L\s*(-?[\d.]+)[\s,]+(-?[\d.]+)\s*L\s*(-?[\d.]+)[\s,]+(-?[\d.]+)\s*Z\s*"\s*/>'
+)
+SVG_ROOT_OPEN_RE = re.compile(r'^\s*(?:<\?xml[^>]*\?>\s*)?<svg\b([^>]*)>', re.S)
+SVG_VIEW_BOX_ATTR_RE = re.compile(r'\bviewBox="([^"]+)"')
+
+def _compat_svg_rects(svg_text: str):
+    """
+    ``(view_box, rects)`` when ``svg_text`` holds nothing but axis-aligned
+    rectangle paths, else None. Rects are ``(x0, y0, x1, y1)`` in SVG units.
+    """
+    root = SVG_ROOT_OPEN_RE.match(svg_text)
+    if root is None:
+        return None
+    view_box = SVG_VIEW_BOX_ATTR_RE.search(root.group(1))
+    if view_box is None:
+        return None
+    try:
+        view_box = [float(v) for v in view_box.group(1).replace(",", " ").split()]
+    except ValueError:
+        return None
+    body = svg_text[root.end():].strip()
+    if not body.endswith("</svg>") or len(view_box) != 4:
+        return None
+    body = body[:-len("</svg>")]
+
+    rects = []
+    position = 0
+    for match in SVG_RECT_PATH_RE.finditer(body):
+        if body[position:match.start()].strip():
+            return None
+        x0, y0, x1, y1, x2, y2, x3, y3 = (float(v) for v in match.groups())
+        if y0 != y1 or x1 != x2 or y2 != y3 or x3 != x0 or x0 == x1 or y0 == y2:
+            return None
+        rects.append((min(x0, x1), min(y0, y2), max(x0, x1), max(y0, y2)))
+        position = match.end()
+    if body[position:].strip() or not rects:
+        return None
+    return view_box, rects
+
+def _ring_area(ring):
+    xs, ys = np.asarray(ring, dtype=np.float64).T
+    return 0.5 * float(np.dot(xs, np.roll(ys, -1)) - np.dot(np.roll(xs, -1), ys))
+
+def _point_in_ring(point, ring):
+    xs, ys = np.asarray(ring, dtype=np.float64).T
+    x_next, y_next = np.roll(xs, -1), np.roll(ys, -1)
+    px, py = point
+    crosses = (ys > py) != (y_next > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = xs + (py - ys) * (x_next - xs) / (y_next - ys)
+    return bool(np.count_nonzero(crosses & (px < x_at)) % 2)
+
+def _split_ring(ring):
+    """Split a closed ring that passes a vertex more than once into simple rings."""
+    rings = []
+    stack = []
+    seen = {}
+    for point in ring:
+        if point in seen:
+            start = seen[point]
+            rings.append(stack[start:])
+            for dropped in stack[start + 1:]:
+                del seen[dropped]
+            del stack[start + 1:]
+        else:
+            seen[point] = len(stack)
+            stack.append(point)
+    rings.append(stack)
+    return rings
+
+def _rect_union_rings(rects):
+    """
+    Boundary rings of a union of axis-aligned rectangles.
+
+    Rectangles are rasterised onto the grid of their own edge coordinates and
+    the covered region's boundary is traced cell edge by cell edge; collinear
+    points are dropped. Where two cells touch only at a corner the trace
+    turns so each ring stays simple.
+    """
+    xs = np.unique([v for r in rects for v in (r[0], r[2])])
+    ys = np.unique([v for r in rects for v in (r[1], r[3])])
+    # One spare row/column so neighbour lookups past the last cell read False.
+    grid = np.zeros((len(ys), len(xs)), dtype=bool)
+    for x0, y0, x1, y1 in rects:
+        i0, i1 = np.searchsorted(xs, (x0, x1))
+        j0, j1 = np.searchsorted(ys, (y0, y1))
+        grid[j0:j1, i0:i1] = True
+
+    # Boundary edges between grid corners (i, j), directed so the covered
+    # cell is on the same side of every edge.
+    outgoing = {}
+    rows, cols = np.nonzero(grid)
+    for j, i in zip(rows.tolist(), cols.tolist()):
+        if j == 0 or not grid[j - 1, i]:
+            outgoing.setdefault((i + 1, j), []).append((i, j))
+        if not grid[j + 1, i]:
+            outgoing.setdefault((i, j + 1), []).append((i + 1, j + 1))
+        if i == 0 or not grid[j, i - 1]:
+            outgoing.setdefault((i, j), []).append((i, j + 1))
+        if not grid[j, i + 1]:
+            outgoing.setdefault((i + 1, j + 1), []).append((i + 1, j))
+
+    rings = []
+    while outgoing:
+        start = next(iter(outgoing))
+        ring = [start]
+        previous, current = None, start
+        while True:
+            candidates = outgoing[current]
+            if len(candidates) == 1 or previous is None:
+                following = candidates.pop()
+            else:
+                dx, dy = current[0] - previous[0], current[1] - previous[1]
+                following = max(
+                    candidates, key=lambda p: dx * (p[1] - current[1]) - dy * (p[0] - current[0])
+                )
+                candidates.remove(following)
+            if not candidates:
+                del outgoing[current]
+            previous, current = current, following
+            if current == start:
+                break
+            ring.append(current)
+        for simple_ring in _split_ring(ring):
+            points = [(float(xs[i]), float(ys[j])) for i, j in simple_ring]
+            corners = [
+                b for a, b, c in zip(points[-1:] + points[:-1], points, points[1:] + points[:1])
+                if (b[0] - a[0]) * (c[1] - b[1]) != (b[1] - a[1]) * (c[0] - b[0])
+            ]
+            if len(corners) >= 4:
+                rings.append(corners)
+    return rings
+
+def _rect_union_polygons(rects):
+    """Union of axis-aligned rectangles as ``[(outer ring, [hole rings]), ...]``."""
+    rings = _rect_union_rings(rects)
+    span = max(
+        1.0,
+        max(r[2] for r in rects) - min(r[0] for r in rects),
+        max(r[3] for r in rects) - min(r[1] for r in rects),
+    )
+    # Traced this way outer boundaries wind negative (y down) and holes positive.
+    outers = [(ring, abs(_ring_area(ring))) for ring in rings if _ring_area(ring) < 0]
+    polygons = {id(ring): (ring, []) for ring, _ in outers}
+    outers.sort(key=lambda item: item[1])
+    for hole in (ring for ring in rings if _ring_area(ring) > 0):
+        # A point just inside the covered cell along the hole's first edge
+        # belongs to the face the hole is cut from.
+        (ax, ay), (bx, by) = hole[0], hole[1]
+        mx, my = (ax + bx) / 2, (ay + by) / 2
+        step = 1e-6 * span
+        length = math.hypot(bx - ax, by - ay)
+        probes = [(mx - (by - ay) / length * step, my + (bx - ax) / length * step),
+                  (mx + (by - ay) / length * step, my - (bx - ax) / length * step)]
+        inside = [p for p in probes if _point_in_ring(p, hole)]
+        probe = probes[0] if inside == [probes[1]] else probes[1]
+        for ring, _ in outers:
+            if _point_in_ring(probe, ring):
+                polygons[id(ring)][1].append(hole)
+                break
+    return list(polygons.values())
+
+def _simplify_ring(ring, tolerance: float):
+    """Douglas-Peucker on a closed ring; keeps at least a triangle."""
+    points = np.asarray(ring, dtype=np.float64)
+    if tolerance <= 0 or len(points) <= 4:
+        return ring
+    # Split the ring at its first point and the point farthest from it.
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, far]] = True
+    spans = [(0, far), (far, len(points))]
+    while spans:
+        first, last = spans.pop()
+        end = points[last % len(points)]
+        inner = points[first + 1:last]
+        if not len(inner):
+            continue
+        direction = end - points[first]
+        length = math.hypot(*direction)
+        offsets = inner - points[first]
+        if length:
+            distances = np.abs(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0]) / length
+        else:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            spans += [(first, split), (split, last)]
+    simplified = [tuple(p) for p in points[keep]]
+    return simplified if len(simplified) >= 3 else ring
+
+def _compat_svg_faces(view_box, rects, tolerance: float = 0.0):
+    """Faces of the merged rectangles, in the same coordinates ``import_svg`` produces."""
+    from build123d import Face, Wire
+
+    view_x, view_y, _, view_height = view_box
+
+    def polygon(ring, tolerance):
+        # SVG y grows downwards; import_svg flips it and aligns the viewBox to the origin.
+        points = [(x - view_x, view_y + view_height - y) for x, y in _simplify_ring(ring, tolerance)]
+        if _ring_area(points) < 0:
+            points.reverse()
+        return Face(Wire.make_polygon(points, close=True))
+
+    def outline_face(outer, holes, tolerance):
+        face = polygon(outer, tolerance)
+        if holes:
+            face = face - [polygon(hole, tolerance) for hole in holes]
+        return face
+
+    faces = []
+    for outer, holes in _rect_union_polygons(rects):
+        face = outline_face(outer, holes, tolerance)
+        if tolerance and not face.is_valid:
+            # Simplifying can fold a thin outline onto itself; keep that one exact.
+            face = outline_face(outer, holes, 0.0)
+        faces.extend(face.faces())
+    return faces
+
+class SvgRejected(Exception):
+    """The label SVG cannot produce any geometry; answered with 422."""
+
+def _svg_faces(svg_text: str):
+    """Faces ``import_svg`` makes of ``svg_text``; compat input is merged first."""
+    from build123d import Face, import_svg
+
+    compat = _compat_svg_rects(svg_text) if EXPORT_COMPAT_MERGE else None
+    faces = None
+    if compat is not None:
+        try:
+            faces = _compat_svg_faces(*compat, EXPORT_COMPAT_SIMPLIFY_MM)
+        except Exception as e:
+            print(f"Warning: compat SVG merge failed, importing rectangles as is: {e}")
+    if faces is None:
+        faces = import_svg(io.StringIO(svg_text))
+    if not any(isinstance(face, Face) for face in faces):
+        raise SvgRejected("SVG has no closed, filled shapes to build")
+    return faces
+
+def _import_svg_sketch(svg_text: str, svg_width_val: float, svg_height_val: float):
+    """Faces of the label SVG, centered on the origin in the XY plane."""
+    from build123d import BuildSketch, Locations, add
+
+    faces = _svg_faces(svg_text)
+    with BuildSketch() as sketch:
+        with Locations((-svg_width_val / 2, -svg_height_val / 2)):
+            add(faces)
+    return sketch.sketch
+
+# Rough build time from the face edge count, fitted on the benchmark corpus
+# (benchmarks/bench_export.py, single CPU); the pocket boolean dominates and
+# grows faster than linearly with the edges. Only used for the preflight
+# estimate.
+PREFLIGHT_SECONDS_PER_EDGE = 0.004
+PREFLIGHT_SECONDS_PER_EDGE_SQUARED = 9e-7
+
+def _svg_face_report(svg_text: str, progress=None):
+    """Face construction summary of ``svg_text`` for /api/preflight."""
+    from build123d import Face
+    from OCP.BRepCheck import BRepCheck_Status, BRepCheck_Wire
+    from OCP.TopoDS import TopoDS_Edge
+
+    _report_stage(progress, "svg_import")
+    faces = [face for face in _svg_faces(svg_text) if isinstance(face, Face)]
+    wires = [(face, wire) for face in faces for wire in face.wires()]
+    edges = sum(len(wire.edges()) for _, wire in wires)
+    self_intersections = sum(
+        1 for face, wire in wires
+        if BRepCheck_Wire(wire.wrapped).SelfIntersect(face.wrapped, TopoDS_Edge(), TopoDS_Edge())
+        == BRepCheck_Status.BRepCheck_SelfIntersectingWire
+    )
+    return {
+        "faces": len(faces),
+        "contours": len(wires),
+        "edges": edges,
+        "self_intersections": self_intersections,
+        "estimated_seconds": round(
+            edges * PREFLIGHT_SECONDS_PER_EDGE + edges ** 2 * PREFLIGHT_SECONDS_PER_EDGE_SQUARED, 1
+        ),
+    }
+
+def _extrude_sketch(sketch, z_offset: float, depth: float):
+    from build123d import Location, extrude
+
+    return extrude(sketch.moved(Location((0, 0, z_offset))), amount=depth)
+
+def _report_stage(progress, stage: str):
+    if progress is not None:
+        progress(stage)
+
+def _build_label_parts_from_svg(svg_text: str, w, h, sty, progress=None):
+    # Parse the SVG into faces once; cutter and content are both extruded from
+    # this face set and only differ in z offset and depth.
+    _report_stage(progress, "svg_import")
+    content_sketch = _import_svg_sketch(svg_text, float(w), float(h))
+    return _build_label_parts(content_sketch, w, sty, progress)
+
+def _label_layers(sty):
+    """``(pocket_depth, content_z, content_depth)`` of a label style, in mm."""
+    base_thickness = BASE_PLATE_THICKNESS
     if sty == "flush":
         # Flush: content top sits at the base top (z = base_thickness).
         inlay_depth = 0.2
         floor_clearance = 0.02
         pocket_depth = inlay_depth + floor_clearance
-        cutter_part = build_svg_part(base_thickness - pocket_depth, pocket_depth)
-        content_part = build_svg_part(base_thickness - inlay_depth, inlay_depth)
-        base.part -= cutter_part
-    else:
-        # Raised: preserve 0.2 mm visible height above base, but sink a small
-        # anchor into the base pocket to avoid coplanar-body ambiguity.
-        raised_height = 0.2
-        anchor_depth = 0.04
-        floor_clearance = 0.01
-        pocket_depth = anchor_depth + floor_clearance
-        cutter_part = build_svg_part(base_thickness - pocket_depth, pocket_depth)
-        content_part = build_svg_part(
-            base_thickness - anchor_depth,
-            raised_height + anchor_depth
-        )
-        base.part -= cutter_part
+        return pocket_depth, base_thickness - inlay_depth, inlay_depth
+    # Raised: preserve 0.2 mm visible height above base, but sink a small
+    # anchor into the base pocket to avoid coplanar-body ambiguity.
+    raised_height = 0.2
+    anchor_depth = 0.04
+    floor_clearance = 0.01
+    pocket_depth = anchor_depth + floor_clearance
+    return pocket_depth, base_thickness - anchor_depth, raised_height + anchor_depth
+
+def _build_label_parts(content_sketch, w, sty, progress=None):
+    """Base and content parts for a label whose content faces are ``content_sketch``."""
+    from build123d import Color
+
+    base_color = Color(0, 0, 0)
+    content_color = Color(1, 1, 1)
+    base_thickness = BASE_PLATE_THICKNESS
+
+    _report_stage(progress, "base_plate")
+    base_part = _get_base_plate(float(w))
+
+    def build_svg_part(z_offset: float, depth: float):
+        return _extrude_sketch(content_sketch, z_offset, depth)
+
+    # Always cut a pocket from the base where content goes, so the exported bodies
+    # don't share coplanar faces that some slicers treat as interference.
+    _report_stage(progress, "boolean")
+    pocket_depth, content_z, content_depth = _label_layers(sty)
+    cutter_part = build_svg_part(base_thickness - pocket_depth, pocket_depth)
+    content_part = build_svg_part(content_z, content_depth)
+    base_part = base_part - cutter_part
 
     _set_shape_metadata(
         content_part,
@@ -137,7 +589,7 @@ def _build_label_parts_from_svg(svg_path: Path, w, h, sty):
         color=content_color
     )
 
-    base_solids = base.part.solids()
+    base_solids = base_part.solids()
     for i, solid in enumerate(base_solids):
         _set_shape_metadata(
             solid,
@@ -155,303 +607,371 @@ def _build_label_parts_from_svg(svg_path: Path, w, h, sty):
             color=content_color
         )
 
-    return base.part, content_part
-
-def _apply_3mf_materials(three_mf_path: Path, base_item_count: int, content_item_count: int):
-    ET.register_namespace("", THREEMF_CORE_NS)
-    ET.register_namespace("m", THREEMF_MATERIAL_NS)
-
-    with zipfile.ZipFile(three_mf_path, "r") as zin:
-        entries = {name: zin.read(name) for name in zin.namelist()}
-
-    model_path = next((name for name in entries if name.lower().endswith(".model")), None)
-    if not model_path:
-        return
-
-    root = ET.fromstring(entries[model_path])
-    root.set("xmlns:BambuStudio", BAMBU_NS)
-    resources = root.find(f"{{{THREEMF_CORE_NS}}}resources")
-    build = root.find(f"{{{THREEMF_CORE_NS}}}build")
-    if resources is None or build is None:
-        return
-
-    items = build.findall(f"{{{THREEMF_CORE_NS}}}item")
-    required_items = max(0, int(base_item_count)) + max(0, int(content_item_count))
-    if required_items <= 0 or len(items) < required_items:
-        return
-
-    base_items = items[:base_item_count]
-    content_items = items[base_item_count:base_item_count + content_item_count]
-    ordered_items = base_items + content_items
-
-    max_resource_id = 0
-    for node in list(resources):
-        rid = node.attrib.get("id")
-        if rid and rid.isdigit():
-            max_resource_id = max(max_resource_id, int(rid))
-    material_resource_id = str(max_resource_id + 1)
-
-    basematerials = ET.Element(
-        f"{{{THREEMF_MATERIAL_NS}}}basematerials",
-        {"id": material_resource_id}
-    )
-    basematerials.append(
-        ET.Element(
-            f"{{{THREEMF_MATERIAL_NS}}}base",
-            {"name": "Base_Black", "displaycolor": "#000000"}
-        )
-    )
-    basematerials.append(
-        ET.Element(
-            f"{{{THREEMF_MATERIAL_NS}}}base",
-            {"name": "Content_White", "displaycolor": "#FFFFFF"}
-        )
+    return base_part, content_part
+
+# Structured labels. Library icons are imported once per worker and kept as
+# faces in SVG user units, keyed on file name and mtime so an edited icon is
+# re-imported; a spec only places (scales and moves) them and builds its text
+# runs fresh. Entry sizes are estimated from the serialized BREP and the cache
+# is held under ICON_GEOMETRY_CACHE_MB, least recently used first out.
+SVG_LENGTH_RE = re.compile(r"^\s*([0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)")
+LABEL_TEXT_ANCHORS = ("start", "middle", "end")
+# The editor strokes text with max(0.04, size * 0.04) mm (createTextSVGElement
+# in app.js), half of it outside the glyphs; spec text is grown to match.
+# Glyph outlines are flattened within LABEL_TEXT_FLATTEN_MM for the offset.
+LABEL_TEXT_STROKE_RATIO = 0.04
+LABEL_TEXT_MIN_STROKE_MM = 0.04
+LABEL_TEXT_FLATTEN_MM = 0.01
+_icon_geometry_cache = OrderedDict()
+_icon_geometry_cache_bytes = 0
+
+def _svg_view_box(svg_path: Path):
+    """``(x, y, width, height)`` of the SVG viewBox, falling back to width/height."""
+    root = ET.parse(svg_path).getroot()
+    values = re.split(r"[\s,]+", (root.get("viewBox") or "").strip())
+    if len(values) == 4:
+        view_box = tuple(float(v) for v in values)
+        if view_box[2] > 0 and view_box[3] > 0:
+            return view_box
+    size = [SVG_LENGTH_RE.match(root.get(attr) or "") for attr in ("width", "height")]
+    if not all(size):
+        raise ValueError(f"Icon '{svg_path.name}' has no usable viewBox or size")
+    return (0.0, 0.0, float(size[0].group(1)), float(size[1].group(1)))
+
+def _get_icon_geometry(name: str, mtime_ns: int):
+    """``(faces, view_box)`` of a library icon, from the geometry cache when warm."""
+    global _icon_geometry_cache_bytes
+    from build123d import Face, import_svg
+    from build123d.persistence import serialize_shape
+
+    key = (name, mtime_ns)
+    entry = _icon_geometry_cache.get(key)
+    if entry is not None:
+        _icon_geometry_cache.move_to_end(key)
+        return entry[0], entry[1]
+
+    svg_path = ICONS_FOLDER / name
+    view_box = _svg_view_box(svg_path)
+    # flip_y only negates y, so faces stay in viewBox units.
+    faces = [shape for shape in import_svg(str(svg_path), align=None) if isinstance(shape, Face)]
+    size = sum(len(serialize_shape(face.wrapped) or b"") for face in faces)
+    budget = int(ICON_GEOMETRY_CACHE_MB * 1024 * 1024)
+    if size <= budget:
+        _icon_geometry_cache[key] = (faces, view_box, size)
+        _icon_geometry_cache_bytes += size
+        while _icon_geometry_cache_bytes > budget:
+            _, (_, _, evicted) = _icon_geometry_cache.popitem(last=False)
+            _icon_geometry_cache_bytes -= evicted
+    return faces, view_box
+
+def _place_icon_faces(icon: dict, w: float, h: float):
+    """Icon faces fitted into its box, in the centered label coordinates."""
+    from build123d import Location
+
+    faces, (vb_x, vb_y, vb_w, vb_h) = _get_icon_geometry(icon["name"], icon["mtime_ns"])
+    # Same fit as the editor's nested <svg>: preserveAspectRatio="xMidYMid meet".
+    scale = min(icon["width"] / vb_w, icon["height"] / vb_h)
+    left = icon["x"] + (icon["width"] - vb_w * scale) / 2 - vb_x * scale - w / 2
+    top = h / 2 - icon["y"] - (icon["height"] - vb_h * scale) / 2 + vb_y * scale
+    return [face.scale(scale).moved(Location((left, top))) for face in faces]
+
+def _text_run_faces(run: dict, w: float, h: float):
+    """
+    Glyph faces of one text run, anchored at ``(x, y)`` and centered
+    vertically on y, grown by half the editor's text stroke.
+    """
+    import pyclipper
+    from build123d import Face, Location, Text, TextAlign, Wire
+    from OCP.BRepAdaptor import BRepAdaptor_CompCurve
+    from OCP.GCPnts import GCPnts_QuasiUniformDeflection
+
+    horizontal = {"start": TextAlign.LEFT, "middle": TextAlign.CENTER, "end": TextAlign.RIGHT}[run["anchor"]]
+    text = Text(
+        run["text"],
+        font_size=run["size"],
+        font_path=str(TEXT_FONT_PATH),
+        text_align=(horizontal, TextAlign.CENTER),
     )
-    resources.insert(0, basematerials)
-
-    objects_by_id = {
-        obj.attrib.get("id"): obj
-        for obj in resources.findall(f"{{{THREEMF_CORE_NS}}}object")
-    }
-
-    for i, item in enumerate(base_items):
-        obj_id = item.attrib.get("objectid")
-        item.attrib["pid"] = material_resource_id
-        item.attrib["pindex"] = "0"
-        obj = objects_by_id.get(obj_id)
-        if obj is not None:
-            obj.attrib["name"] = f"Base_Black_{i + 1}"
-            obj.attrib["pid"] = material_resource_id
-            obj.attrib["pindex"] = "0"
-
-    for i, item in enumerate(content_items):
-        obj_id = item.attrib.get("objectid")
-        item.attrib["pid"] = material_resource_id
-        item.attrib["pindex"] = "1"
-        obj = objects_by_id.get(obj_id)
-        if obj is not None:
-            obj.attrib["name"] = f"Content_White_{i + 1}"
-            obj.attrib["pid"] = material_resource_id
-            obj.attrib["pindex"] = "1"
-
-    root.attrib["requiredextensions"] = "m"
-
-    # Build a Bambu/Orca-friendly assembly object with explicit components.
-    # Many slicers (including Orca/Bambu family) read part/extruder metadata
-    # from this structure more reliably than core 3MF materials alone.
-    max_obj_id = 0
-    for obj_id in objects_by_id.keys():
-        if obj_id and obj_id.isdigit():
-            max_obj_id = max(max_obj_id, int(obj_id))
-    assembly_obj_id = str(max_obj_id + 1)
-    assembly_obj = ET.Element(
-        f"{{{THREEMF_CORE_NS}}}object",
-        {"id": assembly_obj_id, "type": "model"}
+    glyphs = text.moved(Location((run["x"] - w / 2, h / 2 - run["y"]))).faces()
+
+    # OCCT's 2D offset is slow on the font's Bezier outlines and fails on
+    # some glyphs; flatten them and grow the polygons instead.
+    paths = []
+    for glyph in glyphs:
+        rings = []
+        for wire in [glyph.outer_wire(), *glyph.inner_wires()]:
+            sampler = GCPnts_QuasiUniformDeflection(BRepAdaptor_CompCurve(wire.wrapped), LABEL_TEXT_FLATTEN_MM)
+            points = [sampler.Value(i) for i in range(1, sampler.NbPoints())]
+            rings.append([(round(p.X() * FAST_MESH_SCALE), round(p.Y() * FAST_MESH_SCALE)) for p in points])
+        tree = _clipper_union(rings, pyclipper.PFT_EVENODD)
+        if tree is not None:
+            paths.extend(pyclipper.PolyTreeToPaths(tree))
+    stroke = max(LABEL_TEXT_MIN_STROKE_MM, run["size"] * LABEL_TEXT_STROKE_RATIO)
+    grow = pyclipper.PyclipperOffset()
+    grow.ArcTolerance = LABEL_TEXT_FLATTEN_MM * FAST_MESH_SCALE
+    grow.AddPaths(paths, pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+    grown = grow.Execute2(stroke / 2 * FAST_MESH_SCALE)
+
+    def polygon(ring):
+        return Wire.make_polygon([(float(x), float(y)) for x, y in ring], close=True)
+
+    return [
+        Face(polygon(outer), [polygon(hole) for hole in holes])
+        for outer, holes in _from_clipper(_polytree_polygons(grown))
+    ]
+
+def _label_spec_sketch(spec: dict, progress=None):
+    """Content faces of a structured label spec, centered on the origin."""
+    from build123d import BuildSketch, add
+
+    _report_stage(progress, "layout")
+    w = float(spec["width"])
+    h = float(spec["height"])
+    faces = []
+    for icon in spec["icons"]:
+        faces.extend(_place_icon_faces(icon, w, h))
+    for run in spec["texts"]:
+        if run["text"].strip():
+            faces.extend(_text_run_faces(run, w, h))
+    if not faces:
+        raise ValueError("Label spec has no icon or text geometry")
+    with BuildSketch() as sketch:
+        add(faces)
+    return sketch.sketch
+
+# 3MF export. Parts are tessellated straight into NumPy arrays and the final
+# Orca/Bambu package is written in one pass: shared basematerials, one mesh
+# object per part, an assembly object referencing them and the project
+# metadata files that carry the part-to-extruder mapping.
+# Same BRepMesh settings the build123d Mesher uses (relative deflection).
+THREEMF_LINEAR_DEFLECTION = 0.001
+THREEMF_ANGULAR_DEFLECTION = 0.1
+# Named (linear, angular) deflection presets. Draft is about 9x fewer triangles
+# on text-heavy labels with a content volume error well under 0.1%.
+THREEMF_QUALITY_PRESETS = {
+    "draft": (0.01, 0.5),
+    "normal": (THREEMF_LINEAR_DEFLECTION, THREEMF_ANGULAR_DEFLECTION),
+    "fine": (0.0005, 0.05),
+}
+if EXPORT_MESH_QUALITY not in THREEMF_QUALITY_PRESETS:
+    print(f"Warning: unknown EXPORT_MESH_QUALITY '{EXPORT_MESH_QUALITY}', using 'normal'")
+    EXPORT_MESH_QUALITY = "normal"
+# Vertices closer than build123d's TOLERANCE (1e-6 mm) are merged.
+THREEMF_VERTEX_DIGITS = 6
+# Rows formatted per chunk while writing the model XML.
+THREEMF_WRITE_CHUNK = 8192
+THREEMF_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="config" ContentType="application/octet-stream"/>'
+    '</Types>\n'
+)
+THREEMF_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel" '
+    'Target="/3D/3dmodel.model" Id="rel0"/>'
+    '</Relationships>\n'
+)
+THREEMF_MATERIALS = (("Base_Black", "#000000"), ("Content_White", "#FFFFFF"))
+
+def _fmt_3mf_number(v: float):
+    s = f"{float(v):.9f}".rstrip("0").rstrip(".")
+    return s if s else "0"
+
+def _3mf_component_transform(offset):
+    """``transform`` attribute for a translated component, empty for identity."""
+    if not any(offset):
+        return ""
+    return ' transform="' + " ".join(
+        ["1", "0", "0", "0", "1", "0", "0", "0", "1"] + [_fmt_3mf_number(v) for v in offset]
+    ) + '"'
+
+def _xml_escape(value: str):
+    return (
+        str(value)
+        .replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+        .replace("\n", "&#10;")
     )
-    assembly_components = ET.SubElement(assembly_obj, f"{{{THREEMF_CORE_NS}}}components")
 
-    def _parse_transform12(transform_text: str):
-        if not transform_text:
-            return [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0]
-        vals = []
-        for p in str(transform_text).split():
-            try:
-                vals.append(float(p))
-            except Exception:
-                pass
-        if len(vals) != 12:
-            return [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0]
-        return vals
-
-    def _fmt_num(v: float):
-        s = f"{float(v):.9f}".rstrip("0").rstrip(".")
-        return s if s else "0"
-
-    component_infos = []
-    global_min_x = None
-    global_min_y = None
-    global_min_z = None
-
-    def _extract_object_bounds(obj_node):
-        mesh_node = obj_node.find(f"{{{THREEMF_CORE_NS}}}mesh")
-        if mesh_node is None:
-            return None
-        verts_node = mesh_node.find(f"{{{THREEMF_CORE_NS}}}vertices")
-        if verts_node is None:
-            return None
-        xs, ys, zs = [], [], []
-        for v in verts_node.findall(f"{{{THREEMF_CORE_NS}}}vertex"):
-            try:
-                xs.append(float(v.attrib.get("x", "0")))
-                ys.append(float(v.attrib.get("y", "0")))
-                zs.append(float(v.attrib.get("z", "0")))
-            except Exception:
-                continue
-        if not xs:
-            return None
-        return (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
-
-    object_bounds = {}
-    for obj_id, obj in objects_by_id.items():
-        if obj_id:
-            b = _extract_object_bounds(obj)
-            if b is not None:
-                object_bounds[obj_id] = b
-
-    for idx, item in enumerate(ordered_items):
-        obj_id = item.attrib.get("objectid")
-        if not obj_id:
+def _tessellate_part(part, linear_deflection=THREEMF_LINEAR_DEFLECTION, angular_deflection=THREEMF_ANGULAR_DEFLECTION):
+    """
+    Triangulate a part into ``(vertices, triangles)`` arrays of shape (n, 3).
+    Coincident vertices are merged and degenerate triangles dropped.
+    """
+    from OCP.BRep import BRep_Tool
+    from OCP.BRepMesh import BRepMesh_IncrementalMesh
+    from OCP.TopAbs import TopAbs_REVERSED
+    from OCP.TopLoc import TopLoc_Location
+
+    BRepMesh_IncrementalMesh(part.wrapped, linear_deflection, True, angular_deflection, True)
+    face_points = []
+    face_triangles = []
+    offset = 0
+    for face in part.faces():
+        loc = TopLoc_Location()
+        poly = BRep_Tool.Triangulation_s(face.wrapped, loc)
+        if poly is None:
             continue
-        transform_text = item.attrib.get("transform")
-        comp_attrs = {"objectid": obj_id}
-        if transform_text:
-            comp_attrs["transform"] = transform_text
-        ET.SubElement(assembly_components, f"{{{THREEMF_CORE_NS}}}component", comp_attrs)
-        transform_vals = _parse_transform12(transform_text)
-        tx, ty, tz = transform_vals[9], transform_vals[10], transform_vals[11]
-        matrix16 = " ".join([
-            _fmt_num(transform_vals[0]), _fmt_num(transform_vals[1]), _fmt_num(transform_vals[2]), _fmt_num(tx),
-            _fmt_num(transform_vals[3]), _fmt_num(transform_vals[4]), _fmt_num(transform_vals[5]), _fmt_num(ty),
-            _fmt_num(transform_vals[6]), _fmt_num(transform_vals[7]), _fmt_num(transform_vals[8]), _fmt_num(tz),
-            "0", "0", "0", "1"
-        ])
-        obj = objects_by_id.get(obj_id)
-        part_name = obj.attrib.get("name") if obj is not None else ""
-        if not part_name:
-            part_name = f"Part_{idx + 1}"
-        extruder = "1" if idx < base_item_count else "2"
-
-        bounds = object_bounds.get(obj_id)
-        if bounds is not None:
-            min_x = bounds[0] + tx
-            min_y = bounds[1] + ty
-            min_z = bounds[2] + tz
-            global_min_x = min_x if global_min_x is None else min(global_min_x, min_x)
-            global_min_y = min_y if global_min_y is None else min(global_min_y, min_y)
-            global_min_z = min_z if global_min_z is None else min(global_min_z, min_z)
-
-        component_infos.append({
-            "part_name": part_name,
-            "object_id": obj_id,
-            "matrix16": matrix16,
-            "tx": _fmt_num(tx),
-            "ty": _fmt_num(ty),
-            "tz": _fmt_num(tz),
-            "extruder": extruder
-        })
-
-    resources.append(assembly_obj)
+        node_count = poly.NbNodes()
+        points = np.array([poly.Node(i).Coord() for i in range(1, node_count + 1)], dtype=np.float64)
+        if not loc.IsIdentity():
+            trsf = loc.Transformation()
+            matrix = np.array([[trsf.Value(r, c) for c in range(1, 5)] for r in range(1, 4)])
+            points = points @ matrix[:, :3].T + matrix[:, 3]
+        triangles = np.array(
+            [poly.Triangle(i).Get() for i in range(1, poly.NbTriangles() + 1)], dtype=np.int64
+        ).reshape(-1, 3) - 1 + offset
+        if face.wrapped.Orientation() == TopAbs_REVERSED:
+            triangles = triangles[:, [0, 2, 1]]
+        face_points.append(points)
+        face_triangles.append(triangles)
+        offset += node_count
+
+    if not face_points:
+        return np.empty((0, 3)), np.empty((0, 3), dtype=np.int64)
+    return _weld_mesh(np.concatenate(face_points), np.concatenate(face_triangles))
+
+def _weld_mesh(points, triangles):
+    """Merge coincident vertices of a triangle soup and drop degenerate triangles."""
+    points = np.round(points, THREEMF_VERTEX_DIGITS)
+    vertices, remap = np.unique(points, axis=0, return_inverse=True)
+    triangles = remap.reshape(-1)[triangles]
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    triangles = triangles[(a != b) & (b != c) & (c != a)]
+    return vertices, triangles
+
+def _write_3mf_rows(out, template: str, rows: np.ndarray):
+    for start in range(0, len(rows), THREEMF_WRITE_CHUNK):
+        chunk = rows[start:start + THREEMF_WRITE_CHUNK].tolist()
+        out.write("".join([template % tuple(row) for row in chunk]).encode("utf-8"))
+
+def _write_3mf_model(out, meshes: list, assemblies: list, items: list, material_id: str):
+    """
+    Model XML: mesh objects ``1..M``, then one assembly object per entry of
+    ``assemblies`` (``(name, [(mesh index, translation), ...])``), then a
+    build item per ``(assembly index, translation)`` in ``items``.
+    """
+    header = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<model unit="millimeter" xml:lang="en-US" xmlns="{THREEMF_CORE_NS}" '
+        f'xmlns:m="{THREEMF_MATERIAL_NS}" xmlns:BambuStudio="{BAMBU_NS}" requiredextensions="m">'
+        '<metadata name="Application">OrcaSlicer</metadata>'
+        '<metadata name="BambuStudio:3mfVersion">1</metadata>'
+        f'<resources><basematerials id="{material_id}">'
+        + "".join(f'<base name="{name}" displaycolor="{color}"/>' for name, color in THREEMF_MATERIALS)
+        + '</basematerials>'
+    )
+    out.write(header.encode("utf-8"))
+    for object_id, (name, material_index, vertices, triangles) in enumerate(meshes, start=1):
+        out.write((
+            f'<object id="{object_id}" name="{_xml_escape(name)}" type="model" '
+            f'pid="{material_id}" pindex="{material_index}"><mesh><vertices>'
+        ).encode("utf-8"))
+        _write_3mf_rows(out, '<vertex x="%.9g" y="%.9g" z="%.9g"/>', vertices)
+        out.write(b"</vertices><triangles>")
+        _write_3mf_rows(out, '<triangle v1="%d" v2="%d" v3="%d"/>', triangles)
+        out.write(b"</triangles></mesh></object>")
+    for assembly_id, (name, components) in enumerate(assemblies, start=len(meshes) + 1):
+        components = "".join(
+            f'<component objectid="{index + 1}"{_3mf_component_transform(offset)}/>'
+            for index, offset in components
+        )
+        name_attr = f' name="{_xml_escape(name)}"' if name else ""
+        out.write((
+            f'<object id="{assembly_id}"{name_attr} type="model"><components>{components}</components></object>'
+        ).encode("utf-8"))
+    out.write(b"</resources><build>")
+    for assembly_index, shift in items:
+        transform = " ".join(["1", "0", "0", "0", "1", "0", "0", "0", "1"] + [_fmt_3mf_number(v) for v in shift])
+        out.write((
+            f'<item objectid="{len(meshes) + 1 + assembly_index}" printable="1" transform="{transform}"/>'
+        ).encode("utf-8"))
+    out.write(b"</build></model>\n")
+
+def _write_3mf_package(meshes: list, assemblies: list, items: list):
+    """
+    Zip the model and the Orca/Bambu project files. Assembly ids follow the
+    meshes (``M+1..``) so part ids match the mesh object ids; the shared
+    materials take the next id.
+    """
+    material_id = str(len(meshes) + len(assemblies) + 1)
+    objects = []
+    for assembly_id, (name, components) in enumerate(assemblies, start=len(meshes) + 1):
+        component_infos = []
+        for index, offset in components:
+            tx, ty, tz = (_fmt_3mf_number(v) for v in offset)
+            component_infos.append({
+                "part_id": str(index + 1),
+                "part_name": meshes[index][0],
+                "matrix16": f"1 0 0 {tx} 0 1 0 {ty} 0 0 1 {tz} 0 0 0 1",
+                "source_object_id": str(index),
+                "tx": tx,
+                "ty": ty,
+                "tz": tz,
+                "extruder": "1" if meshes[index][1] == 0 else "2",
+                "face_count": str(len(meshes[index][3])),
+            })
+        objects.append((str(assembly_id), name or "InfinityGrid_Label", component_infos))
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zout:
+        zout.writestr("[Content_Types].xml", THREEMF_CONTENT_TYPES)
+        zout.writestr("_rels/.rels", THREEMF_RELS)
+        with zout.open("3D/3dmodel.model", "w") as model_out:
+            _write_3mf_model(model_out, meshes, assemblies, items, material_id)
+        for name, payload in _3mf_project_configs(objects).items():
+            zout.writestr(name, payload)
+    return out.getvalue()
 
-    # Replace build with one assembly item (Bambu/Orca-style packaging).
-    for item in list(build.findall(f"{{{THREEMF_CORE_NS}}}item")):
-        build.remove(item)
-    build_item_attrs = {"objectid": assembly_obj_id, "printable": "1"}
+def _write_label_3mf(meshes: list):
+    """
+    Write the label package. ``meshes`` holds ``(name, material_index,
+    vertices, triangles)`` per part, in build order; material 0 is the base
+    and 1 the content.
+    """
     # Move model into positive XY with a small margin so slicers using corner-origin
     # beds don't flag "object over boundary" on import.
     margin_xy = 5.0
-    shift_x = 0.0
-    shift_y = 0.0
-    shift_z = 0.0
-    if global_min_x is not None and global_min_x < margin_xy:
-        shift_x = margin_xy - global_min_x
-    if global_min_y is not None and global_min_y < margin_xy:
-        shift_y = margin_xy - global_min_y
-    if global_min_z is not None and global_min_z < 0.0:
-        shift_z = -global_min_z
-    if shift_x or shift_y or shift_z:
-        build_item_attrs["transform"] = " ".join([
-            "1", "0", "0",
-            "0", "1", "0",
-            "0", "0", "1",
-            _fmt_num(shift_x),
-            _fmt_num(shift_y),
-            _fmt_num(shift_z)
-        ])
-    ET.SubElement(build, f"{{{THREEMF_CORE_NS}}}item", build_item_attrs)
-
-    # Drop unreferenced wrapper objects emitted by the mesher. Orca can treat
-    # those as extra parts (often black/default), which causes the duplicate
-    # InfinityGrid_Label_* entries and wrong color assignment in the object tree.
-    keep_object_ids = {assembly_obj_id}
-    for info in component_infos:
-        keep_object_ids.add(info["object_id"])
-    for obj in list(resources.findall(f"{{{THREEMF_CORE_NS}}}object")):
-        oid = obj.attrib.get("id")
-        if oid not in keep_object_ids:
-            resources.remove(obj)
-
-    # Renumber kept objects contiguously (1..N for mesh parts, N+1 for assembly).
-    # Orca/Bambu metadata uses source_object_id that aligns with contiguous object
-    # numbering in common project files.
-    mesh_old_ids = [info["object_id"] for info in component_infos]
-    id_map = {old_id: str(i + 1) for i, old_id in enumerate(mesh_old_ids)}
-    new_assembly_id = str(len(mesh_old_ids) + 1)
-    id_map[assembly_obj_id] = new_assembly_id
-
-    for obj in resources.findall(f"{{{THREEMF_CORE_NS}}}object"):
-        old_id = obj.attrib.get("id")
-        if old_id in id_map:
-            obj.attrib["id"] = id_map[old_id]
-
-    for comp in assembly_components.findall(f"{{{THREEMF_CORE_NS}}}component"):
-        old_ref = comp.attrib.get("objectid")
-        if old_ref in id_map:
-            comp.attrib["objectid"] = id_map[old_ref]
-
-    for item in build.findall(f"{{{THREEMF_CORE_NS}}}item"):
-        old_ref = item.attrib.get("objectid")
-        if old_ref in id_map:
-            item.attrib["objectid"] = id_map[old_ref]
-
-    assembly_obj_id = new_assembly_id
-    for idx, info in enumerate(component_infos):
-        mapped_obj_id = id_map.get(info["object_id"], info["object_id"])
-        info["mapped_object_id"] = mapped_obj_id
-        try:
-            info["source_object_id"] = str(int(mapped_obj_id) - 1)
-        except Exception:
-            info["source_object_id"] = str(idx)
-
-    def _upsert_model_metadata(meta_name: str, meta_value: str):
-        md_tag = f"{{{THREEMF_CORE_NS}}}metadata"
-        for node in root.findall(md_tag):
-            if node.attrib.get("name") == meta_name:
-                node.text = meta_value
-                return
-        new_node = ET.Element(md_tag, {"name": meta_name})
-        new_node.text = meta_value
-        resources_node = root.find(f"{{{THREEMF_CORE_NS}}}resources")
-        if resources_node is not None:
-            insert_at = list(root).index(resources_node)
-            root.insert(insert_at, new_node)
-        else:
-            root.append(new_node)
-
-    _upsert_model_metadata("Application", "OrcaSlicer")
-    _upsert_model_metadata("BambuStudio:3mfVersion", "1")
-
-    entries[model_path] = ET.tostring(root, encoding="utf-8", xml_declaration=True)
-
-    # Add Orca/Bambu project metadata files for part-to-extruder mapping.
+    shift = (0.0, 0.0, 0.0)
+    if meshes:
+        global_min = np.min([vertices.min(axis=0) for _, _, vertices, _ in meshes], axis=0)
+        floor = np.array([margin_xy, margin_xy, 0.0])
+        shift = tuple(round(float(v), THREEMF_VERTEX_DIGITS) for v in np.maximum(floor - global_min, 0.0))
+    components = [(index, (0.0, 0.0, 0.0)) for index in range(len(meshes))]
+    return _write_3mf_package(meshes, [(None, components)], [(0, shift)])
+
+def _3mf_project_configs(objects: list):
+    """
+    Orca/Bambu project metadata files for part-to-extruder mapping.
+    ``objects`` holds ``(assembly object id, name, component infos)``.
+    """
     model_settings_root = ET.Element("config")
-    object_cfg = ET.SubElement(model_settings_root, "object", {"id": assembly_obj_id})
-    ET.SubElement(object_cfg, "metadata", {"key": "name", "value": "InfinityGrid_Label"})
-    ET.SubElement(object_cfg, "metadata", {"key": "extruder", "value": "1"})
-    for idx, info in enumerate(component_infos, start=1):
-        part_node = ET.SubElement(
-            object_cfg,
-            "part",
-            {"id": str(idx), "subtype": "normal_part"}
-        )
-        ET.SubElement(part_node, "metadata", {"key": "name", "value": info["part_name"]})
-        ET.SubElement(part_node, "metadata", {"key": "matrix", "value": info["matrix16"]})
-        ET.SubElement(part_node, "metadata", {"key": "source_file", "value": "multicolor_label.3mf"})
-        ET.SubElement(part_node, "metadata", {"key": "source_object_id", "value": info["source_object_id"]})
-        ET.SubElement(part_node, "metadata", {"key": "source_volume_id", "value": "0"})
-        ET.SubElement(part_node, "metadata", {"key": "source_offset_x", "value": info["tx"]})
-        ET.SubElement(part_node, "metadata", {"key": "source_offset_y", "value": info["ty"]})
-        ET.SubElement(part_node, "metadata", {"key": "source_offset_z", "value": info["tz"]})
-        ET.SubElement(part_node, "metadata", {"key": "extruder", "value": info["extruder"]})
+    for assembly_obj_id, object_name, component_infos in objects:
+        object_cfg = ET.SubElement(model_settings_root, "object", {"id": assembly_obj_id})
+        ET.SubElement(object_cfg, "metadata", {"key": "name", "value": object_name})
+        ET.SubElement(object_cfg, "metadata", {"key": "extruder", "value": "1"})
+        for info in component_infos:
+            part_node = ET.SubElement(
+                object_cfg,
+                "part",
+                {"id": info["part_id"], "subtype": "normal_part"}
+            )
+            ET.SubElement(part_node, "metadata", {"key": "name", "value": info["part_name"]})
+            ET.SubElement(part_node, "metadata", {"key": "matrix", "value": info["matrix16"]})
+            ET.SubElement(part_node, "metadata", {"key": "source_file", "value": "multicolor_label.3mf"})
+            ET.SubElement(part_node, "metadata", {"key": "source_object_id", "value": info["source_object_id"]})
+            ET.SubElement(part_node, "metadata", {"key": "source_volume_id", "value": "0"})
+            ET.SubElement(part_node, "metadata", {"key": "source_offset_x", "value": info["tx"]})
+            ET.SubElement(part_node, "metadata", {"key": "source_offset_y", "value": info["ty"]})
+            ET.SubElement(part_node, "metadata", {"key": "source_offset_z", "value": info["tz"]})
+            ET.SubElement(part_node, "metadata", {"key": "extruder", "value": info["extruder"]})
+            ET.SubElement(part_node, "mesh_stat", {"face_count": info["face_count"]})
 
     plate_node = ET.SubElement(model_settings_root, "plate")
     ET.SubElement(plate_node, "metadata", {"key": "plater_id", "value": "1"})
@@ -483,66 +1003,1668 @@ def _apply_3mf_materials(three_mf_path: Path, base_item_count: int, content_item
         "</config>\n"
     )
 
-    entries["Metadata/model_settings.config"] = ET.tostring(
-        model_settings_root, encoding="utf-8", xml_declaration=True
+    return {
+        "Metadata/model_settings.config": ET.tostring(
+            model_settings_root, encoding="utf-8", xml_declaration=True
+        ),
+        "Metadata/project_settings.config": json.dumps(
+            project_settings, indent=2
+        ).encode("utf-8"),
+        "Metadata/slice_info.config": slice_info_xml.encode("utf-8"),
+    }
+
+
+EXPORT_FORMATS = ("step", "3mf", "svg")
+EXPORT_MEDIA_TYPES = {
+    "step": "application/octet-stream",
+    "3mf": "model/3mf",
+    "svg": "image/svg+xml",
+}
+
+def _step_bytes(base_part, content_part):
+    from build123d import Compound, export_step
+
+    base_solids = base_part.solids()
+    content_solids = content_part.solids()
+
+    my_assembly = Compound(
+        label="InfinityGrid_Label",
+        children=base_solids + content_solids
     )
-    entries["Metadata/project_settings.config"] = json.dumps(
-        project_settings, indent=2
-    ).encode("utf-8")
-    entries["Metadata/slice_info.config"] = slice_info_xml.encode("utf-8")
+    out = io.BytesIO()
+    export_step(my_assembly, out)
+    return out.getvalue()
+
+def _label_meshes(base_part, content_part, progress=None, quality="normal"):
+    """``(name, material_index, vertices, triangles)`` for each non-empty part."""
+    _report_stage(progress, "mesh")
+    linear_deflection, angular_deflection = THREEMF_QUALITY_PRESETS[quality]
+    meshes = []
+    for name, material_index, part in (
+        ("Base_Black_1", 0, base_part),
+        ("Content_White_1", 1, content_part),
+    ):
+        vertices, triangles = _tessellate_part(part, linear_deflection, angular_deflection)
+        if len(triangles):
+            meshes.append((name, material_index, vertices, triangles))
+    return meshes
+
+def _3mf_bytes(base_part, content_part, progress=None, quality="normal"):
+    meshes = _label_meshes(base_part, content_part, progress, quality)
+    _report_stage(progress, "3mf_write")
+    return _write_label_3mf(meshes)
+
+def _3mf_triangle_count(payload: bytes):
+    """Total triangles in a label 3MF, from the per-part ``mesh_stat`` metadata."""
+    with zipfile.ZipFile(io.BytesIO(payload)) as zf:
+        root = ET.fromstring(zf.read("Metadata/model_settings.config"))
+    return sum(int(stat.get("face_count", "0")) for stat in root.iter("mesh_stat"))
+
+def _svg_profile_bytes(base_outline, content_part):
+    """Top-view SVG: black base outline with the white content profile on top."""
+    from build123d import ExportSVG, Unit, Axis, Location
+
+    # Topmost content faces are exactly the label content as seen from above;
+    # drop them onto z=0 since the exporter draws the XY plane.
+    top_faces = content_part.faces().filter_by(Axis.Z).group_by(Axis.Z)[-1]
+    content_faces = [face.moved(Location((0, 0, -face.center().Z))) for face in top_faces]
+    exporter = ExportSVG(unit=Unit.MM, margin=1)
+    exporter.add_layer("Base_Black", fill_color=(0, 0, 0), line_color=None)
+    exporter.add_layer("Content_White", fill_color=(255, 255, 255), line_color=None)
+    exporter.add_shape(base_outline, layer="Base_Black")
+    exporter.add_shape(content_faces, layer="Content_White")
+    out = io.BytesIO()
+    exporter.write(out)
+    return out.getvalue()
+
+# Fast mesh engine. A 3MF only needs triangles, so mesh-only exports can skip
+# the B-rep pipeline: the SVG is flattened into polygons (curves sampled to
+# the quality preset's deflections), content is unioned and the pocket cut
+# with pyclipper, and base and content are extruded and triangulated with
+# earcut directly. The base chamfers are approximated by bands between the
+# outline and a copy inset along its vertex miters.
+MESH_ENGINES = ("occt", "fast")
+# Formats the fast engine can write; exports that include any other are built with OCCT.
+MESH_ENGINE_FORMATS = ("3mf", "meshes")
+if EXPORT_MESH_ENGINE not in MESH_ENGINES:
+    print(f"Warning: unknown EXPORT_MESH_ENGINE '{EXPORT_MESH_ENGINE}', using 'occt'")
+    EXPORT_MESH_ENGINE = "occt"
+# pyclipper works on integers; one unit is a nanometre.
+FAST_MESH_SCALE = 1e6
+FAST_MESH_MAX_CURVE_STEPS = 512
+# Pocket outlines stay this far inside the top chamfer so the top face keeps a rim.
+FAST_MESH_RIM_MM = 0.01
+
+def _curve_steps(sweep: float, quality: str):
+    """
+    Segments for a curve turning by ``sweep`` radians. Like BRepMesh with
+    relative deflection, the sagitta is bounded relative to the curve size,
+    which makes the count independent of scale.
+    """
+    linear_deflection, angular_deflection = THREEMF_QUALITY_PRESETS[quality]
+    if sweep <= 0:
+        return 1
+    steps = max(sweep / angular_deflection, math.sqrt(sweep / (8 * linear_deflection)))
+    return max(1, min(FAST_MESH_MAX_CURVE_STEPS, math.ceil(steps)))
+
+def _segment_points(segment, quality: str):
+    """Points along an svgelements curve segment, after its start point."""
+    probe = np.asarray(segment.npoint(np.linspace(0, 1, 17)), dtype=np.float64)
+    steps = np.diff(probe, axis=0)
+    headings = np.arctan2(steps[:, 1], steps[:, 0])[np.hypot(steps[:, 0], steps[:, 1]) > 1e-12]
+    turns = (np.diff(headings) + math.pi) % (2 * math.pi) - math.pi
+    count = _curve_steps(float(np.abs(turns).sum()), quality)
+    points = np.asarray(segment.npoint(np.linspace(0, 1, count + 1)[1:]), dtype=np.float64)
+    return [tuple(point) for point in points.tolist()]
+
+def _svg_path_rings(path, quality: str):
+    """Closed point rings of each subpath of a reified svgelements path."""
+    from svgelements import Close, Line, Move
+
+    rings = []
+    ring = []
+    for segment in path:
+        if isinstance(segment, Move):
+            rings.append(ring)
+            ring = [(segment.end.x, segment.end.y)]
+        elif isinstance(segment, Close):
+            rings.append(ring)
+            ring = []
+        else:
+            if not ring:
+                ring = [(segment.start.x, segment.start.y)]
+            if isinstance(segment, Line):
+                ring.append((segment.end.x, segment.end.y))
+            else:
+                ring.extend(_segment_points(segment, quality))
+    rings.append(ring)
+    return [ring for ring in rings if len(ring) >= 3]
+
+def _svg_content_tree(svg_text: str, w: float, h: float, quality: str):
+    """
+    Filled label content as a pyclipper PolyTree, placed like
+    ``_import_svg_sketch`` places the faces, or None if nothing is filled.
+    """
+    import pyclipper
 
-    with zipfile.ZipFile(three_mf_path, "w", compression=zipfile.ZIP_DEFLATED) as zout:
-        for name, payload in entries.items():
-            zout.writestr(name, payload)
+    def to_clipper(rings):
+        # Document coordinates (y up, origin bottom left) to label coordinates.
+        return pyclipper.scale_to_clipper(
+            [[(x - w / 2, y - h / 2) for x, y in ring] for ring in rings], FAST_MESH_SCALE
+        )
 
-def build_step_worker(svg_text, w, h, sty, queue):
+    compat = _compat_svg_rects(svg_text) if EXPORT_COMPAT_MERGE else None
+    if compat is not None:
+        (vx, vy, _, vh), rects = compat
+        # Traced outlines wind opposite to their holes, so a nonzero union nests them.
+        rings = [
+            [(x - vx, vy + vh - y) for x, y in _simplify_ring(ring, EXPORT_COMPAT_SIMPLIFY_MM)]
+            for ring in _rect_union_rings(rects)
+        ]
+        return _clipper_union(to_clipper(rings), pyclipper.PFT_NONZERO)
+
+    from ocpsvg.svg import find_shapes_svg_in_document
+    from svgelements import Path as SvgPath
+
+    document = find_shapes_svg_in_document(io.StringIO(svg_text))
+    doc_height = document.viewbox.height
+    paths = []
+    for element, _parents in document:
+        if element.fill.value is None:
+            continue
+        path = SvgPath(element)
+        path.reify()
+        rings = [[(x, doc_height - y) for x, y in ring] for ring in _svg_path_rings(path, quality)]
+        # Each shape fills even-odd, like import_svg nests its subpaths.
+        shape = _clipper_union(to_clipper(rings), pyclipper.PFT_EVENODD) if rings else None
+        if shape is not None:
+            paths += pyclipper.PolyTreeToPaths(shape)
+    return _clipper_union(paths, pyclipper.PFT_NONZERO) if paths else None
+
+def _clipper_union(paths, fill_type):
+    """Union of integer ``paths`` as a pyclipper PolyTree, or None if none is valid."""
+    import pyclipper
+
+    clipper = pyclipper.Pyclipper()
+    # Touching contours would leave T-junctions between the caps and walls.
+    clipper.StrictlySimple = True
     try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_dir_path = Path(temp_dir)
-            svg_path = temp_dir_path / "label_content.svg"
-            with open(svg_path, "w", encoding="utf-8") as f:
-                f.write(svg_text)
-            base_part, content_part = _build_label_parts_from_svg(svg_path, w, h, sty)
-            base_solids = base_part.solids()
-            content_solids = content_part.solids()
-
-            my_assembly = Compound(
-                label="InfinityGrid_Label",
-                children=base_solids + content_solids
+        clipper.AddPaths(paths, pyclipper.PT_SUBJECT, True)
+    except pyclipper.ClipperException:
+        return None
+    return clipper.Execute2(pyclipper.CT_UNION, fill_type, fill_type)
+
+def _polytree_polygons(node):
+    """``[(outer, [holes])]`` for every outer contour of a PolyTree, at any depth."""
+    return [(outer.Contour, [hole.Contour for hole in outer.Childs]) for outer in _polytree_nodes(node)]
+
+def _polytree_holes(node):
+    """``[(hole, [outers directly inside it])]`` for every hole of a PolyTree."""
+    return [
+        (hole.Contour, [island.Contour for island in hole.Childs])
+        for outer in _polytree_nodes(node) for hole in outer.Childs
+    ]
+
+def _polytree_nodes(node):
+    """Every outer contour node of a PolyTree, at any depth."""
+    nodes = []
+    stack = list(node.Childs)
+    while stack:
+        outer = stack.pop()
+        nodes.append(outer)
+        for hole in outer.Childs:
+            stack.extend(hole.Childs)
+    return nodes
+
+def _from_clipper(polygons):
+    return [
+        (np.asarray(outer, dtype=np.float64) / FAST_MESH_SCALE,
+         [np.asarray(hole, dtype=np.float64) / FAST_MESH_SCALE for hole in holes])
+        for outer, holes in polygons
+    ]
+
+def _base_plate_rings(length: float, quality: str):
+    """
+    Counter-clockwise base plate outline (``_base_plate_outline``) and the
+    same outline inset by the chamfer, vertex for vertex. Rounded corners
+    shrink about their centers; at the concave corners where the tabs meet
+    the body the chamfer faces meet along a miter.
+    """
+    chamfer_val = BASE_PLATE_CHAMFER
+    steps = _curve_steps(math.pi / 2, quality)
+    outline = []
+    inset = []
+
+    def arc(cx, cy, radius, start):
+        inner = max(radius - chamfer_val, 0.0)
+        for k in range(steps + 1):
+            angle = start + math.pi / 2 * k / steps
+            ux, uy = math.cos(angle), math.sin(angle)
+            outline.append((cx + radius * ux, cy + radius * uy))
+            inset.append((cx + inner * ux, cy + inner * uy))
+
+    def notch(x, y, dx, dy):
+        outline.append((x, y))
+        inset.append((x + dx * chamfer_val, y + dy * chamfer_val))
+
+    body_x, body_y = length / 2, BASE_PLATE_WIDTH / 2
+    tab_x, tab_y = body_x + BASE_PLATE_TAB_OVERHANG, BASE_PLATE_TAB_WIDTH / 2
+    radius, tab_radius = BASE_PLATE_CORNER_RADIUS, BASE_PLATE_TAB_RADIUS
+    # Right end, from the bottom right body corner to the top right one; the
+    # left end is the same half turned by 180 degrees.
+    arc(body_x - radius, -body_y + radius, radius, -math.pi / 2)
+    notch(body_x, -tab_y, -1, 1)
+    arc(tab_x - tab_radius, -tab_y + tab_radius, tab_radius, -math.pi / 2)
+    arc(tab_x - tab_radius, tab_y - tab_radius, tab_radius, 0.0)
+    notch(body_x, tab_y, -1, -1)
+    arc(body_x - radius, body_y - radius, radius, 0.0)
+    outline = np.asarray(outline, dtype=np.float64)
+    inset = np.asarray(inset, dtype=np.float64)
+    return np.concatenate([outline, -outline]), np.concatenate([inset, -inset])
+
+def _oriented(ring, counter_clockwise: bool):
+    ring = np.asarray(ring, dtype=np.float64)
+    return ring if (_ring_area(ring) > 0) == counter_clockwise else ring[::-1]
+
+class _TriangleSoup:
+    """Triangles added as caps and bands around shared rings, welded at the end."""
+
+    def __init__(self):
+        self.points = []
+        self.triangles = []
+        self.count = 0
+
+    def add(self, points, triangles):
+        self.points.append(points)
+        self.triangles.append(triangles + self.count)
+        self.count += len(points)
+
+    def cap(self, polygons, z: float, up: bool):
+        """Flat faces at height ``z`` for ``[(outer, [holes])]`` point rings."""
+        import mapbox_earcut
+
+        for outer, holes in polygons:
+            rings = [_without_repeats(ring) for ring in [outer] + holes]
+            points = np.concatenate(rings)
+            ends = np.cumsum([len(ring) for ring in rings]).astype(np.uint32)
+            triangles = mapbox_earcut.triangulate_float64(points, ends).astype(np.int64).reshape(-1, 3)
+            # Earcut winds all triangles of a polygon the same way, slivers included.
+            a, b, c = (points[triangles[:, k]] for k in range(3))
+            cross = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+            if (cross.sum() > 0) != up:
+                triangles = triangles[:, [0, 2, 1]]
+            self.add(np.column_stack([points, np.full(len(points), z)]), triangles)
+
+    def band(self, lower, upper, reverse: bool = False):
+        """
+        Quads between two (n, 3) rings with matching vertices, facing away
+        from the region left of the rings' direction (out of a CCW outline).
+        """
+        n = len(lower)
+        i = np.arange(n)
+        j = (i + 1) % n
+        triangles = np.concatenate([np.column_stack([i, j, n + j]), np.column_stack([i, n + j, n + i])])
+        if reverse:
+            triangles = triangles[:, [0, 2, 1]]
+        self.add(np.concatenate([lower, upper]), triangles)
+
+    def wall(self, ring, z0: float, z1: float, reverse: bool = False):
+        self.band(_at_height(ring, z0), _at_height(ring, z1), reverse)
+
+    def welded(self):
+        vertices, triangles = _weld_mesh(np.concatenate(self.points), np.concatenate(self.triangles))
+        return vertices, _split_t_junctions(vertices, triangles)
+
+def _without_repeats(ring):
+    """``ring`` without points equal to the one before them, such as collapsed arcs."""
+    ring = np.asarray(ring, dtype=np.float64)
+    keep = np.any(np.round(ring, THREEMF_VERTEX_DIGITS) != np.round(np.roll(ring, 1, axis=0), THREEMF_VERTEX_DIGITS), axis=1)
+    return ring[keep]
+
+def _split_t_junctions(vertices, triangles):
+    """
+    Split triangles along whose edge another vertex lies. Earcut can leave
+    such T-junctions where hole vertices are collinear with outline edges;
+    only the rare edges without a reversed twin are candidates.
+    """
+    count = len(vertices)
+    for _ in range(4):
+        edges = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+        unpaired = np.flatnonzero(~np.isin(edges[:, 1] * count + edges[:, 0], edges[:, 0] * count + edges[:, 1]))
+        if not len(unpaired):
+            break
+        loose = np.unique(edges[unpaired])
+        splits = {}
+        for index in unpaired.tolist():
+            a, b = edges[index].tolist()
+            direction = vertices[b] - vertices[a]
+            offsets = vertices[loose] - vertices[a]
+            t = offsets @ direction / float(direction @ direction)
+            off_line = np.linalg.norm(offsets - np.outer(t, direction), axis=1)
+            inner = (t > 1e-9) & (t < 1 - 1e-9) & (off_line < 10 ** -THREEMF_VERTEX_DIGITS)
+            if inner.any():
+                # Edge k of triangle i is row k * len(triangles) + i of ``edges``.
+                splits[index % len(triangles)] = (index // len(triangles), loose[inner][np.argsort(t[inner])].tolist())
+        if not splits:
+            break
+        rows = []
+        for row, (k, points) in splits.items():
+            triangle = triangles[row].tolist()
+            a, b, c = triangle[k], triangle[(k + 1) % 3], triangle[(k + 2) % 3]
+            chain = [a] + points + [b]
+            rows += [[p, q, c] for p, q in zip(chain, chain[1:])]
+        keep = np.ones(len(triangles), dtype=bool)
+        keep[list(splits)] = False
+        triangles = np.concatenate([triangles[keep], np.asarray(rows, dtype=np.int64).reshape(-1, 3)])
+    return triangles
+
+def _at_height(ring, z: float):
+    return np.column_stack([ring, np.full(len(ring), z)])
+
+def _fast_label_meshes(svg_text: str, w: float, h: float, sty: str, progress=None, quality: str = "normal"):
+    """``_label_meshes`` of a label SVG, built from polygons without OCCT."""
+    import pyclipper
+
+    _report_stage(progress, "svg_import")
+    content = _svg_content_tree(svg_text, w, h, quality)
+    if content is None or not content.Childs:
+        raise SvgRejected("SVG has no closed, filled shapes to build")
+
+    _report_stage(progress, "base_plate")
+    outline, inset = _base_plate_rings(_base_plate_length(w), quality)
+
+    _report_stage(progress, "boolean")
+    rim = pyclipper.PyclipperOffset()
+    rim.AddPath(pyclipper.scale_to_clipper(inset.tolist(), FAST_MESH_SCALE), pyclipper.JT_MITER, pyclipper.ET_CLOSEDPOLYGON)
+    clipper = pyclipper.Pyclipper()
+    clipper.StrictlySimple = True
+    clipper.AddPaths(pyclipper.PolyTreeToPaths(content), pyclipper.PT_SUBJECT, True)
+    clipper.AddPaths(rim.Execute(-FAST_MESH_RIM_MM * FAST_MESH_SCALE), pyclipper.PT_CLIP, True)
+    pocket = clipper.Execute2(pyclipper.CT_INTERSECTION, pyclipper.PFT_NONZERO, pyclipper.PFT_NONZERO)
+
+    _report_stage(progress, "mesh")
+    thickness = BASE_PLATE_THICKNESS
+    chamfer_val = BASE_PLATE_CHAMFER
+    pocket_depth, content_z, content_depth = _label_layers(sty)
+    floor_z = thickness - pocket_depth
+    oriented = lambda polygons: [
+        (_oriented(outer, True), [_oriented(hole, False) for hole in holes]) for outer, holes in polygons
+    ]
+    content_polygons = oriented(_from_clipper(_polytree_polygons(content)))
+    pocket_polygons = oriented(_from_clipper(_polytree_polygons(pocket)))
+    # Top of the base: the inset outline with the pocket openings as holes,
+    # plus the islands left standing inside holes of the pocket.
+    openings = [(child.Contour, []) for child in pocket.Childs]
+    top_polygons = [(inset, [outer for outer, _ in _from_clipper(openings)])]
+    top_polygons += _from_clipper(_polytree_holes(pocket))
+
+    base = _TriangleSoup()
+    base.cap([(inset, [])], 0.0, up=False)
+    base.band(_at_height(inset, 0.0), _at_height(outline, chamfer_val))
+    base.wall(outline, chamfer_val, thickness - chamfer_val)
+    base.band(_at_height(outline, thickness - chamfer_val), _at_height(inset, thickness))
+    base.cap(top_polygons, thickness, up=True)
+    base.cap(pocket_polygons, floor_z, up=True)
+    for outer, holes in pocket_polygons:
+        for ring in [outer] + holes:
+            base.wall(ring, floor_z, thickness, reverse=True)
+
+    content_mesh = _TriangleSoup()
+    content_mesh.cap(content_polygons, content_z, up=False)
+    content_mesh.cap(content_polygons, content_z + content_depth, up=True)
+    for outer, holes in content_polygons:
+        for ring in [outer] + holes:
+            content_mesh.wall(ring, content_z, content_z + content_depth)
+
+    meshes = []
+    for name, material_index, soup in (("Base_Black_1", 0, base), ("Content_White_1", 1, content_mesh)):
+        vertices, triangles = soup.welded()
+        if len(triangles):
+            meshes.append((name, material_index, vertices, triangles))
+    return meshes
+
+def _export_formats(svg_text, w, h, sty, formats, progress=None, quality="normal", engine="occt"):
+    """Build the label geometry once and write it out in each of ``formats``, all in memory."""
+    if engine == "fast" and all(fmt in MESH_ENGINE_FORMATS for fmt in formats):
+        try:
+            meshes = _fast_label_meshes(svg_text, float(w), float(h), sty, progress, quality)
+        except SvgRejected:
+            raise
+        except Exception as e:
+            print(f"Warning: fast mesh engine failed, building with OCCT: {e}")
+        else:
+            outputs = {}
+            for fmt in formats:
+                if fmt == "3mf":
+                    _report_stage(progress, "3mf_write")
+                    outputs[fmt] = _write_label_3mf(meshes)
+                else:
+                    outputs[fmt] = meshes
+            return outputs
+    base_part, content_part = _build_label_parts_from_svg(svg_text, w, h, sty, progress)
+    return _write_export_formats(base_part, content_part, w, formats, progress, quality)
+
+def _export_label_spec_formats(spec: dict, formats, progress=None):
+    """Build a structured label spec once and write it out in each of ``formats``."""
+    content_sketch = _label_spec_sketch(spec, progress)
+    base_part, content_part = _build_label_parts(content_sketch, spec["width"], spec["style"], progress)
+    return _write_export_formats(base_part, content_part, spec["width"], formats, progress, spec["quality"])
+
+def _write_export_formats(base_part, content_part, w, formats, progress=None, quality="normal"):
+    outputs = {}
+    for fmt in formats:
+        if fmt == "step":
+            _report_stage(progress, "step_export")
+            outputs[fmt] = _step_bytes(base_part, content_part)
+        elif fmt == "3mf":
+            outputs[fmt] = _3mf_bytes(base_part, content_part, progress, quality)
+        elif fmt == "meshes":
+            # Raw tessellation for the plate writer, which packs many labels into one 3MF.
+            outputs[fmt] = _label_meshes(base_part, content_part, progress, quality)
+        elif fmt == "svg":
+            _report_stage(progress, "svg_profile")
+            base_outline = _base_plate_outline(
+                _base_plate_length(float(w)), BASE_PLATE_WIDTH, BASE_PLATE_CORNER_RADIUS
             )
-            step_path = temp_dir_path / "multicolor_label.step"
-            export_step(my_assembly, str(step_path))
-            with open(step_path, "rb") as f:
-                queue.put(("ok", f.read()))
+            outputs[fmt] = _svg_profile_bytes(base_outline, content_part)
+        else:
+            raise ValueError(f"Unsupported export format '{fmt}'")
+    return outputs
+
+# Worker entry points. Besides the final ("ok", payload) / ("err", message)
+# they put ("stage", name) on the queue as the pipeline progresses.
+def _queue_progress(queue):
+    return lambda stage: queue.put(("stage", stage))
+
+def build_step_worker(svg_text, w, h, sty, quality, engine, queue):
+    try:
+        outputs = _export_formats(svg_text, w, h, sty, ["step"], _queue_progress(queue), quality, engine)
+        queue.put(("ok", outputs["step"]))
+    except SvgRejected as e:
+        queue.put(("rejected", str(e)))
     except Exception as e:
         queue.put(("err", str(e)))
 
-def build_3mf_worker(svg_text, w, h, sty, queue):
+def build_3mf_worker(svg_text, w, h, sty, quality, engine, queue):
     try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_dir_path = Path(temp_dir)
-            svg_path = temp_dir_path / "label_content.svg"
-            with open(svg_path, "w", encoding="utf-8") as f:
-                f.write(svg_text)
-
-            base_part, content_part = _build_label_parts_from_svg(svg_path, w, h, sty)
-            mesh = Mesher()
-            mesh.add_shape(base_part)
-            mesh.add_shape(content_part)
-
-            three_mf_path = temp_dir_path / "multicolor_label.3mf"
-            mesh.write(three_mf_path)
-            _apply_3mf_materials(
-                three_mf_path,
-                base_item_count=len(base_part.solids()),
-                content_item_count=len(content_part.solids())
-            )
+        outputs = _export_formats(svg_text, w, h, sty, ["3mf"], _queue_progress(queue), quality, engine)
+        queue.put(("ok", outputs["3mf"]))
+    except SvgRejected as e:
+        queue.put(("rejected", str(e)))
+    except Exception as e:
+        queue.put(("err", str(e)))
+
+def build_bundle_worker(svg_text, w, h, sty, formats, quality, engine, queue):
+    try:
+        queue.put(("ok", _export_formats(svg_text, w, h, sty, formats, _queue_progress(queue), quality, engine)))
+    except SvgRejected as e:
+        queue.put(("rejected", str(e)))
+    except Exception as e:
+        queue.put(("err", str(e)))
+
+def build_label_spec_worker(spec, formats, queue):
+    try:
+        queue.put(("ok", _export_label_spec_formats(spec, formats, _queue_progress(queue))))
+    except Exception as e:
+        queue.put(("err", str(e)))
 
-            with open(three_mf_path, "rb") as f:
-                queue.put(("ok", f.read()))
+def preflight_worker(svg_text, queue):
+    try:
+        queue.put(("ok", _svg_face_report(svg_text, _queue_progress(queue))))
+    except SvgRejected as e:
+        queue.put(("rejected", str(e)))
     except Exception as e:
         queue.put(("err", str(e)))
 
+EXPORT_JOB_TARGETS = {
+    "preflight": preflight_worker,
+    "step": build_step_worker,
+    "3mf": build_3mf_worker,
+    "bundle": build_bundle_worker,
+    "label_spec": build_label_spec_worker,
+}
+
+# Metrics, served at /metrics in the Prometheus text format. Workers time
+# their own stages and send the timings back with each result; the pool
+# records them together with queue wait, job time and output sizes. Export
+# requests also get the timings of the jobs they ran as a Server-Timing header.
+METRICS_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRICS_BYTES_BUCKETS = (1e3, 1e4, 1e5, 3e5, 1e6, 3e6, 1e7, 3e7, 1e8)
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+def _metric_labels(names, values):
+    if not names:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+def _metric_value(value):
+    return f"{value:.9g}" if isinstance(value, float) else str(value)
+
+class MetricCounter:
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_metric_labels(self.label_names, labels)} {_metric_value(value)}")
+        return lines
+
+class MetricHistogram:
+    def __init__(self, name: str, help_text: str, buckets, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        # labels -> [per-bucket cumulative counts, count, sum]
+        self.series = {}
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0, 0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bucket_names = self.label_names + ("le",)
+        for labels, (counts, count, total) in sorted(self.series.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(
+                    f"{self.name}_bucket{_metric_labels(bucket_names, labels + (f'{bound:g}',))} {bucket_count}"
+                )
+            lines.append(f"{self.name}_bucket{_metric_labels(bucket_names, labels + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_count{_metric_labels(self.label_names, labels)} {count}")
+            lines.append(f"{self.name}_sum{_metric_labels(self.label_names, labels)} {_metric_value(total)}")
+        return lines
+
+class ExportMetrics:
+    """Counters and histograms for export jobs; only touched from the event loop."""
+
+    def __init__(self):
+        self.stage_seconds = MetricHistogram(
+            "export_stage_seconds", "Time spent in each export pipeline stage.",
+            METRICS_SECONDS_BUCKETS, ("format", "stage")
+        )
+        self.job_seconds = MetricHistogram(
+            "export_job_seconds", "Time an export job ran on a worker.",
+            METRICS_SECONDS_BUCKETS, ("format", "status")
+        )
+        self.queue_seconds = MetricHistogram(
+            "export_queue_wait_seconds", "Time an export job waited for a free worker.",
+            METRICS_SECONDS_BUCKETS, ("format",)
+        )
+        self.output_bytes = MetricHistogram(
+            "export_output_bytes", "Size of export results.",
+            METRICS_BYTES_BUCKETS, ("format",)
+        )
+        self.rejected = MetricCounter(
+            "export_jobs_rejected_total", "Export jobs refused because the queue was full.", ("format",)
+        )
+        self.coalesced = MetricCounter(
+            "export_requests_coalesced_total", "Export requests served by an identical build already running.",
+            ("format",)
+        )
+        self.abandoned = MetricCounter(
+            "export_builds_abandoned_total", "Export builds cancelled because every waiting client left.",
+            ("format",)
+        )
+
+    def record_job(self, fmt: str, status: str, wait: float, elapsed: float, stages: list, payload):
+        self.queue_seconds.observe(wait, fmt)
+        self.job_seconds.observe(elapsed, fmt, status)
+        for stage, seconds in stages:
+            self.stage_seconds.observe(seconds, fmt, stage)
+        if status == "ok":
+            outputs = payload if isinstance(payload, dict) else {fmt: payload}
+            for output_format, output in outputs.items():
+                if isinstance(output, bytes):
+                    self.output_bytes.observe(len(output), output_format)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append(("queue", wait))
+            timings.extend(stages)
+
+    def render(self, pool, cache, scratch):
+        lines = []
+        for metric in (
+            self.stage_seconds, self.job_seconds, self.queue_seconds, self.output_bytes,
+            self.rejected, self.coalesced, self.abandoned,
+        ):
+            lines.extend(metric.render())
+        readiness = pool.readiness()
+        lines += [
+            "# HELP export_queue_depth Export jobs waiting for a free worker.",
+            "# TYPE export_queue_depth gauge",
+            f"export_queue_depth {max(0, pool.pending - pool.in_flight)}",
+            "# HELP export_jobs_in_flight Export jobs running on a worker.",
+            "# TYPE export_jobs_in_flight gauge",
+            f"export_jobs_in_flight {pool.in_flight}",
+            "# HELP export_workers Export worker processes by state.",
+            "# TYPE export_workers gauge",
+            f'export_workers{{state="configured"}} {readiness["workers"]}',
+            f'export_workers{{state="ready"}} {readiness["ready_workers"]}',
+            "# HELP export_worker_rss_bytes Private memory of each export worker after its last job.",
+            "# TYPE export_worker_rss_bytes gauge",
+        ]
+        for worker in sorted(pool.workers(), key=lambda worker: worker.index):
+            lines.append(f'export_worker_rss_bytes{{worker="{worker.index}"}} {worker.rss_bytes}')
+        lines += [
+            "# HELP export_worker_jobs Jobs run by each export worker since it started.",
+            "# TYPE export_worker_jobs gauge",
+        ]
+        for worker in sorted(pool.workers(), key=lambda worker: worker.index):
+            lines.append(f'export_worker_jobs{{worker="{worker.index}"}} {worker.jobs_done}')
+        lines += [
+            "# HELP export_memory_anon_bytes Anonymous Pss of the web tier, fork server and workers, and its budget.",
+            "# TYPE export_memory_anon_bytes gauge",
+            f'export_memory_anon_bytes{{state="used"}} {_process_tree_anon_bytes()}',
+            f'export_memory_anon_bytes{{state="budget"}} {pool.memory_budget_bytes}',
+        ]
+        stats = cache.stats()
+        lines += [
+            "# HELP export_cache_lookups_total Export result cache lookups by outcome.",
+            "# TYPE export_cache_lookups_total counter",
+            f'export_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+            f'export_cache_lookups_total{{result="disk_hit"}} {stats["disk_hits"]}',
+            f'export_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+            "# HELP export_cache_hit_ratio Share of export cache lookups served from memory or disk.",
+            "# TYPE export_cache_hit_ratio gauge",
+            f"export_cache_hit_ratio {_metric_value(float(stats['hit_ratio']))}",
+        ]
+        scratch_stats = scratch.stats()
+        lines += [
+            "# HELP export_scratch_bytes Scratch space budget and bytes reserved by spooled uploads.",
+            "# TYPE export_scratch_bytes gauge",
+            f'export_scratch_bytes{{state="budget"}} {scratch_stats["budget_bytes"]}',
+            f'export_scratch_bytes{{state="used"}} {scratch_stats["used_bytes"]}',
+            "# HELP export_scratch_waiting Uploads waiting for scratch space.",
+            "# TYPE export_scratch_waiting gauge",
+            f"export_scratch_waiting {scratch_stats['waiting']}",
+            "# HELP export_scratch_rejected_total Uploads refused for lack of scratch space.",
+            "# TYPE export_scratch_rejected_total counter",
+            f"export_scratch_rejected_total {scratch_stats['rejected']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+export_metrics = ExportMetrics()
+
+def _export_job_format(target_name: str, args):
+    """Metric label for a job: the format(s) it writes."""
+    if target_name == "bundle":
+        return ",".join(args[4])
+    if target_name == "label_spec":
+        return ",".join(args[1])
+    return target_name
+
+def _server_timing_header(timings: list):
+    totals = OrderedDict()
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+class ServerTimingMiddleware:
+    """Adds the stage timings of export jobs run for a request as ``Server-Timing``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and timings:
+                header = _server_timing_header(timings + [("total", time.perf_counter() - started)])
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode("ascii"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+
+class ScratchSpaceFull(Exception):
+    def __init__(self, message: str, retry: bool):
+        super().__init__(message)
+        self.retry = retry
+
+class ScratchSpace:
+    """
+    Byte budget for temporary files in TMP_DIR. ``reserve`` waits until the
+    size fits next to the current reservations; sizes larger than the whole
+    budget are refused outright.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.used = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._released = None
+
+    @classmethod
+    def for_directory(cls, directory: Path, budget_mb: float):
+        if budget_mb:
+            return cls(int(budget_mb * 1024 * 1024))
+        try:
+            return cls(shutil.disk_usage(directory).total // 2)
+        except OSError:
+            return cls(256 * 1024 * 1024)
+
+    async def reserve(self, size: int, timeout: float):
+        if size > self.budget_bytes:
+            self.rejected += 1
+            raise ScratchSpaceFull(
+                f"Upload of {size} bytes exceeds the scratch budget of {self.budget_bytes} bytes", retry=False
+            )
+        deadline = time.monotonic() + timeout
+        while self.used + size > self.budget_bytes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise ScratchSpaceFull("Scratch space is busy, please retry shortly", retry=True)
+            if self._released is None:
+                self._released = asyncio.Event()
+            released = self._released
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(released.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.waiting -= 1
+        self.used += size
+
+    def release(self, size: int):
+        self.used = max(0, self.used - size)
+        if self._released is not None:
+            self._released.set()
+            self._released = None
+
+    def stats(self):
+        return {
+            "budget_bytes": self.budget_bytes,
+            "used_bytes": self.used,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+        }
+
+scratch_space = ScratchSpace.for_directory(TMP_DIR, EXPORT_SCRATCH_MB)
+
+class ScratchBudgetMiddleware:
+    """
+    Holds a scratch reservation for multipart requests large enough to be
+    spooled to disk, sized by ``Content-Length``, until the response is done.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        from starlette.formparsers import MultiPartParser
+
+        size = 0
+        if scope["type"] == "http" and scope["method"] == "POST":
+            headers = dict(scope["headers"])
+            if headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+                try:
+                    size = int(headers.get(b"content-length", b"0"))
+                except ValueError:
+                    size = 0
+        if size <= MultiPartParser.spool_max_size:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await scratch_space.reserve(size, EXPORT_SCRATCH_WAIT)
+        except ScratchSpaceFull as e:
+            response = JSONResponse(
+                status_code=503 if e.retry else 413,
+                content={"detail": str(e)},
+                headers={"Retry-After": "5"} if e.retry else None
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            scratch_space.release(size)
+
+class ExportPoolFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Export queue is full")
+        self.retry_after = retry_after
+
+class ExportPoolUnavailable(Exception):
+    pass
+
+class ExportJobTimeout(Exception):
+    pass
+
+class ExportWorkerCrashed(Exception):
+    pass
+
+class _ResultQueue:
+    """
+    Collects what an export worker function puts on its ``queue``. Stage
+    reports are forwarded to the parent immediately instead of collected,
+    and timed: each stage lasts until the next one or the result.
+    """
+
+    def __init__(self, conn=None):
+        self.conn = conn
+        self.items = []
+        self.stages = []
+
+    def put(self, value):
+        if value and value[0] == "stage":
+            self.stages.append((value[1], time.perf_counter()))
+            if self.conn is not None:
+                self.conn.send(value)
+            return
+        self.items.append(value)
+
+    def stage_seconds(self):
+        """``[(stage, seconds), ...]`` for the stages reported so far."""
+        marks = self.stages + [(None, time.perf_counter())]
+        return [(stage, end - start) for (stage, start), (_, end) in zip(marks, marks[1:])]
+
+def _worker_rss_bytes():
+    """Private resident memory of this process (what recycling it would free)."""
+    try:
+        private_kb = 0
+        with open("/proc/self/smaps_rollup", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    private_kb += int(line.split()[1])
+        return private_kb * 1024
+    except Exception:
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, reported in KiB on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except Exception:
+        return 0
+
+def _process_tree_anon_bytes():
+    """Anonymous Pss of this process and its descendants, 0 where /proc has no smaps_rollup."""
+    total = 0
+    pending = [os.getpid()]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f"/proc/{pid}/smaps_rollup", "r", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("Pss_Anon:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children", "r", encoding="ascii") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+def _export_worker_main(conn):
+    """Worker process loop: run export jobs received over ``conn`` until told to stop."""
+    # Ctrl+C goes to the whole process group; let the parent decide when we stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    started = time.monotonic()
+    if EXPORT_WORKER_WARMUP:
+        try:
+            _warm_up_worker()
+        except Exception as e:
+            print(f"Warning: export worker warm-up failed: {e}")
+    try:
+        conn.send(("ready", time.monotonic() - started))
+    except (EOFError, OSError):
+        return
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        target_name, args = job
+        target = EXPORT_JOB_TARGETS.get(target_name)
+        queue = _ResultQueue(conn)
+        if target is None:
+            queue.put(("err", f"Unknown export job '{target_name}'"))
+        else:
+            target(*args, queue)
+        status, payload = queue.items[0] if queue.items else ("err", "Export failed without details")
+        try:
+            conn.send((status, payload, _worker_rss_bytes(), queue.stage_seconds()))
+        except (EOFError, OSError):
+            break
+
+class _ExportWorkerProcess:
+    def __init__(self, ctx, index: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_export_worker_main,
+            args=(child_conn,),
+            name=f"export-worker-{index}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.index = index
+        self.jobs_done = 0
+        self.rss_bytes = 0
+        self.busy = False
+        self.ready = False
+        self.warmup_seconds = None
+
+    def wait_ready(self, timeout: float):
+        """Block until the worker reports it finished warming up; False if it died or timed out."""
+        try:
+            if not self.conn.poll(timeout):
+                return False
+            message = self.conn.recv()
+        except (EOFError, OSError):
+            return False
+        self.ready = message[0] == "ready"
+        self.warmup_seconds = message[1]
+        return self.ready
+
+    def run(self, target_name: str, args, timeout: float, on_stage=None):
+        self.busy = True
+        deadline = time.monotonic() + timeout
+        try:
+            self.conn.send((target_name, args))
+            while True:
+                if not self.conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise ExportJobTimeout(f"Export did not finish within {timeout:g} seconds")
+                message = self.conn.recv()
+                if message[0] != "stage":
+                    break
+                if on_stage is not None:
+                    on_stage(message[1])
+            status, payload, rss_bytes, stages = message
+        finally:
+            self.busy = False
+        self.jobs_done += 1
+        self.rss_bytes = rss_bytes
+        return status, payload, stages
+
+    def stop(self, kill: bool = False):
+        if not kill:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=5)
+            except Exception:
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+class ExportPool:
+    """
+    Fixed-size pool of pre-forked export processes with bounded admission.
+
+    At most ``size`` jobs run at once and ``queue_limit`` more may wait for a
+    worker; anything beyond that is rejected immediately with a retry hint.
+    A job that exceeds ``job_timeout`` has its worker killed and replaced.
+    Workers are recycled after ``max_jobs`` jobs, once their private RSS
+    passes ``max_rss_bytes`` or once the whole process tree's anonymous Pss
+    passes ``memory_budget_bytes`` (0 disables any of these limits).
+
+    Workers start in the background and only take jobs once they report
+    ready, so starting the pool never delays the web tier.
+    """
+
+    def __init__(
+        self, size: int, job_timeout: float, queue_limit: int, max_jobs: int, max_rss_bytes: int,
+        memory_budget_bytes: int = 0
+    ):
+        self.size = size
+        self.job_timeout = job_timeout
+        self.queue_limit = queue_limit
+        self.max_jobs = max_jobs
+        self.max_rss_bytes = max_rss_bytes
+        self.memory_budget_bytes = memory_budget_bytes
+        self.pending = 0
+        self.in_flight = 0
+        self._ctx = None
+        self._idle = None
+        self._executor = None
+        self._workers = set()
+        self._starting = set()
+        self._next_index = 0
+        # Consecutive worker start-ups that failed; reset by the next success.
+        self._failed_starts = 0
+        self._avg_job_seconds = 5.0
+        self._started = False
+        self._closing = False
+
+    def start(self):
+        if self._started:
+            return
+        self._ctx = multiprocessing.get_context(EXPORT_START_METHOD)
+        if EXPORT_START_METHOD == "forkserver":
+            # Import the CAD stack once in the fork server; workers fork from it.
+            self._ctx.set_forkserver_preload([__name__, "build123d"])
+        self._idle = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="export")
+        self._started = True
+        self._closing = False
+        for _ in range(self.size):
+            self._start_worker()
+        print(f"Export pool starting: {self.size} worker(s), start method '{EXPORT_START_METHOD}'")
+
+    def readiness(self):
+        ready = sum(1 for worker in self._workers if worker.ready)
+        return {
+            "ready": self._started and not self._closing and ready > 0,
+            "workers": self.size,
+            "ready_workers": ready,
+            "warmup": EXPORT_WORKER_WARMUP,
+        }
+
+    def _start_worker(self):
+        task = asyncio.get_running_loop().create_task(self._add_worker())
+        self._starting.add(task)
+        task.add_done_callback(self._starting.discard)
+
+    def _spawn_ready_worker(self, index: int):
+        worker = self._spawn_worker(index)
+        if worker.wait_ready(EXPORT_WORKER_READY_TIMEOUT):
+            return worker
+        self._workers.discard(worker)
+        worker.stop(kill=True)
+        return None
+
+    async def _add_worker(self):
+        delay = 1.0
+        attempt = 1
+        while True:
+            index = self._next_index
+            self._next_index += 1
+            worker = await asyncio.get_running_loop().run_in_executor(None, self._spawn_ready_worker, index)
+            if worker is not None or self._closing or not self._started:
+                break
+            self._failed_starts += 1
+            print(f"Export worker {index} failed to start (attempt {attempt}), retrying in {delay:g}s")
+            await asyncio.sleep(delay)
+            if self._closing or not self._started:
+                return
+            delay = min(delay * 2, EXPORT_WORKER_RESPAWN_MAX_DELAY)
+            attempt += 1
+        if worker is None:
+            return
+        self._failed_starts = 0
+        if self._closing or not self._started:
+            self._workers.discard(worker)
+            worker.stop()
+            return
+        print(f"Export worker {worker.index} ready in {worker.warmup_seconds:.1f}s")
+        self._idle.put_nowait(worker)
+
+    def shutdown(self):
+        if not self._started:
+            return
+        self._closing = True
+        for task in list(self._starting):
+            task.cancel()
+        for worker in list(self._workers):
+            worker.stop(kill=worker.busy)
+        self._workers.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._started = False
+
+    def retry_after(self):
+        waiting = max(1, self.pending - self.size + 1)
+        return max(1, math.ceil(self._avg_job_seconds * waiting / self.size))
+
+    async def submit(self, target_name: str, *args, on_stage=None, timeout=None):
+        """
+        Run ``target_name`` with ``args`` on a worker and return ``(status, payload)``.
+
+        ``on_stage`` is called on the event loop with each stage name the
+        worker reports while the job runs. ``timeout`` overrides the pool's
+        job timeout for this job.
+        """
+        if not self._started or self._closing:
+            raise ExportPoolUnavailable("Export workers are not running")
+        if self._failed_starts and not self.readiness()["ready_workers"]:
+            # Workers are failing to come up; answer now instead of queueing.
+            raise ExportPoolUnavailable("No export workers are available")
+        fmt = _export_job_format(target_name, args)
+        if self.pending >= self.size + self.queue_limit:
+            export_metrics.rejected.inc(fmt)
+            raise ExportPoolFull(self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        queued = time.monotonic()
+        self.pending += 1
+        try:
+            try:
+                worker = await asyncio.wait_for(self._idle.get(), self.job_timeout)
+            except asyncio.TimeoutError:
+                raise ExportPoolUnavailable("No export worker became free in time") from None
+            self.in_flight += 1
+            started = time.monotonic()
+            kill = False
+            outcome, payload, stages = "cancelled", None, []
+            stage_callback = None
+            if on_stage is not None:
+                stage_callback = lambda stage: loop.call_soon_threadsafe(on_stage, stage)
+            try:
+                status, payload, stages = await loop.run_in_executor(
+                    self._executor, worker.run, target_name, args, timeout or self.job_timeout, stage_callback
+                )
+                elapsed = time.monotonic() - started
+                self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+                outcome = status
+                return status, payload
+            except ExportJobTimeout:
+                kill = True
+                outcome = "timeout"
+                raise
+            except (EOFError, OSError) as err:
+                kill = True
+                outcome = "crashed"
+                raise ExportWorkerCrashed(f"Export worker exited unexpectedly: {err!r}") from err
+            except BaseException:
+                # Cancelled while the worker is mid-job: it can't be reused safely.
+                kill = True
+                raise
+            finally:
+                self.in_flight -= 1
+                export_metrics.record_job(
+                    fmt, outcome, started - queued, time.monotonic() - started, stages, payload
+                )
+                if kill or self._needs_recycle(worker):
+                    loop.create_task(self._replace_worker(worker, kill=kill))
+                else:
+                    self._idle.put_nowait(worker)
+        finally:
+            self.pending -= 1
+
+    def workers(self):
+        return list(self._workers)
+
+    def _spawn_worker(self, index: int):
+        worker = _ExportWorkerProcess(self._ctx, index)
+        self._workers.add(worker)
+        return worker
+
+    def _needs_recycle(self, worker: _ExportWorkerProcess):
+        if self.max_jobs and worker.jobs_done >= self.max_jobs:
+            return True
+        if self.max_rss_bytes and worker.rss_bytes >= self.max_rss_bytes:
+            return True
+        if self.memory_budget_bytes and _process_tree_anon_bytes() >= self.memory_budget_bytes:
+            return True
+        return False
+
+    async def _replace_worker(self, worker: _ExportWorkerProcess, kill: bool):
+        loop = asyncio.get_running_loop()
+        self._workers.discard(worker)
+        reason = "killed" if kill else f"recycled after {worker.jobs_done} job(s), {worker.rss_bytes // (1024 * 1024)} MB"
+        print(f"Export worker {worker.index} {reason}")
+        await loop.run_in_executor(None, worker.stop, kill)
+        if self._closing:
+            return
+        await self._add_worker()
+
+export_pool = ExportPool(
+    size=EXPORT_WORKERS,
+    job_timeout=EXPORT_JOB_TIMEOUT,
+    queue_limit=EXPORT_QUEUE_LIMIT,
+    max_jobs=EXPORT_WORKER_MAX_JOBS,
+    max_rss_bytes=EXPORT_WORKER_MAX_RSS_MB * 1024 * 1024,
+    memory_budget_bytes=EXPORT_MEMORY_BUDGET_MB * 1024 * 1024
+)
+
+# SVG preflight. The structural check needs no CAD and runs in the web tier
+# before any export job is queued, so input that can never build (not XML,
+# nothing to draw, far too large) is answered with 422 instead of taking a
+# worker. /api/preflight adds face construction in a worker.
+EXPORT_SVG_MAX_SHAPES = max(1, int(os.environ.get("EXPORT_SVG_MAX_SHAPES", "20000")))
+EXPORT_SVG_MAX_SEGMENTS = max(1, int(os.environ.get("EXPORT_SVG_MAX_SEGMENTS", "200000")))
+EXPORT_PREFLIGHT_TIMEOUT = float(os.environ.get("EXPORT_PREFLIGHT_TIMEOUT", "10"))
+SVG_SHAPE_ELEMENTS = ("path", "rect", "circle", "ellipse", "line", "polyline", "polygon")
+# Skipped by the SVG importer; whatever they draw is missing from the export.
+SVG_UNSUPPORTED_ELEMENTS = ("text", "image", "foreignObject", "clipPath", "mask", "pattern", "filter")
+SVG_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+def _svg_static_report(svg_text: str):
+    """
+    Structure of ``svg_text`` without any CAD work: element, shape and path
+    segment counts, elements the importer ignores, and errors that make a
+    build pointless.
+    """
+    report = {
+        "mode": "compat" if _compat_svg_rects(svg_text) is not None else "vector",
+        "elements": 0,
+        "shapes": 0,
+        "segments": 0,
+        "unsupported": [],
+        "errors": [],
+        "warnings": [],
+    }
+    try:
+        root = ET.fromstring(svg_text)
+    except ET.ParseError as e:
+        report["errors"].append(f"SVG is not well-formed XML: {e}")
+        return report
+    if root.tag.rsplit("}", 1)[-1] != "svg":
+        report["errors"].append("Root element is not <svg>")
+        return report
+
+    unsupported = set()
+    for element in root.iter():
+        tag = element.tag.rsplit("}", 1)[-1]
+        report["elements"] += 1
+        if tag in SVG_SHAPE_ELEMENTS:
+            report["shapes"] += 1
+            if tag in ("path", "polyline", "polygon"):
+                numbers = SVG_NUMBER_RE.findall(element.get("d" if tag == "path" else "points", ""))
+                report["segments"] += len(numbers) // 2
+            else:
+                report["segments"] += 4
+        elif tag in SVG_UNSUPPORTED_ELEMENTS:
+            unsupported.add(tag)
+    report["unsupported"] = sorted(unsupported)
+
+    if not report["shapes"]:
+        report["errors"].append("SVG contains no shapes to build")
+    if report["shapes"] > EXPORT_SVG_MAX_SHAPES:
+        report["errors"].append(f"SVG has {report['shapes']} shapes, the limit is {EXPORT_SVG_MAX_SHAPES}")
+    if report["segments"] > EXPORT_SVG_MAX_SEGMENTS:
+        report["errors"].append(
+            f"SVG has about {report['segments']} path segments, the limit is {EXPORT_SVG_MAX_SEGMENTS}"
+        )
+    if unsupported:
+        report["warnings"].append(
+            "Not imported, so missing from the export: " + ", ".join(f"<{tag}>" for tag in report["unsupported"])
+        )
+    return report
+
+async def _reject_unbuildable_svg(svg_text: str):
+    report = await asyncio.to_thread(_svg_static_report, svg_text)
+    if report["errors"]:
+        raise HTTPException(status_code=422, detail="; ".join(report["errors"]))
+
+async def _run_export_job(target_name: str, *args, on_stage=None, timeout=None):
+    """Run an export job on the pool, mapping pool failures to HTTP errors."""
+    if target_name in ("step", "3mf", "bundle"):
+        await _reject_unbuildable_svg(args[0])
+    try:
+        status, payload = await export_pool.submit(target_name, *args, on_stage=on_stage, timeout=timeout)
+    except ExportPoolFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Export queue is full, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ExportPoolUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ExportJobTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ExportWorkerCrashed as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if status == "rejected":
+        raise HTTPException(status_code=422, detail=payload)
+    if status != "ok":
+        raise HTTPException(status_code=500, detail=payload)
+    return payload
+
+def _normalize_svg_payload(svg_text: str):
+    text = svg_text.lstrip("\ufeff").replace("\r\n", "\n").replace("\r", "\n").strip()
+    # Whitespace between tags carries no geometry.
+    return re.sub(r">\s+<", "><", text)
+
+def export_cache_key(fmt: str, svg_text: str, width, height, style: str, quality: str = "normal", engine: str = "occt"):
+    """Content hash identifying one export result."""
+    if fmt in ("step", "svg"):
+        # Only meshes depend on the tessellation settings.
+        quality, engine = "", ""
+    digest = hashlib.sha256()
+    for part in (
+        EXPORT_CODE_VERSION,
+        fmt,
+        f"{float(width):.4f}",
+        f"{float(height):.4f}",
+        # Anything other than "flush" is built as raised.
+        "flush" if style == "flush" else "raised",
+        quality,
+        engine,
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(_normalize_svg_payload(svg_text).encode("utf-8"))
+    return digest.hexdigest()
+
+def label_spec_cache_key(fmt: str, spec: dict):
+    """Content hash identifying one structured label export result."""
+    if fmt in ("step", "svg"):
+        spec = {name: value for name, value in spec.items() if name != "quality"}
+    digest = hashlib.sha256()
+    for part in (EXPORT_CODE_VERSION, fmt, "label_spec"):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    # Resolved specs carry each icon's content ETag, so an edited icon is a miss.
+    digest.update(json.dumps(spec, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+class ExportResultCache:
+    """
+    Two-tier LRU cache of finished export payloads.
+
+    The memory tier is bounded by total payload bytes. The optional disk tier
+    (``disk_dir``) survives restarts and is pruned oldest-first once it grows
+    past ``disk_max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str = "", disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # 3MF triangle counts of memory-tier entries, so hits don't re-read the archive.
+        self._triangles = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.disk_dir is not None:
+            try:
+                self.disk_dir.mkdir(parents=True, exist_ok=True)
+            except Exception as e:
+                print(f"Export cache disk tier disabled ({self.disk_dir}): {e}")
+                self.disk_dir = None
+
+    def get(self, key: str):
+        payload = self._entries.get(key)
+        if payload is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+        payload = self._disk_get(key)
+        if payload is not None:
+            self.disk_hits += 1
+            self._memory_put(key, payload)
+            return payload
+        self.misses += 1
+        return None
+
+    def put(self, key: str, payload: bytes):
+        self._memory_put(key, payload)
+        self._disk_put(key, payload)
+
+    def triangle_count(self, key: str, payload: bytes):
+        """Triangles in the 3MF ``payload`` cached under ``key``, counted once per entry."""
+        count = self._triangles.get(key)
+        if count is None:
+            count = _3mf_triangle_count(payload)
+            if key in self._entries:
+                self._triangles[key] = count
+        return count
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "disk_enabled": self.disk_dir is not None,
+        }
+
+    def _memory_put(self, key: str, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+            self._triangles.pop(key, None)
+        self._entries[key] = payload
+        self._bytes += len(payload)
+        while self._bytes > self.max_bytes and self._entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._triangles.pop(evicted_key, None)
+            self.evictions += 1
+
+    def _disk_path(self, key: str):
+        return self.disk_dir / f"{key}.bin"
+
+    def _disk_get(self, key: str):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            payload = path.read_bytes()
+            os.utime(path)
+            return payload
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Export cache read failed for {path}: {e}")
+            return None
+
+    def _disk_put(self, key: str, payload: bytes):
+        if self.disk_dir is None or len(payload) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+            self._disk_prune()
+        except Exception as e:
+            print(f"Export cache write failed for {path}: {e}")
+            try:
+                tmp_path.unlink()
+            except Exception:
+                pass
+
+    def _disk_prune(self):
+        files = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".bin"):
+                st = entry.stat()
+                files.append((st.st_mtime_ns, st.st_size, entry.path))
+                total += st.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+
+export_cache = ExportResultCache(
+    max_bytes=EXPORT_CACHE_MAX_MB * 1024 * 1024,
+    disk_dir=EXPORT_CACHE_DIR,
+    disk_max_bytes=EXPORT_CACHE_DISK_MAX_MB * 1024 * 1024
+)
+
+# Single-flight builds. Identical exports that arrive while one is building
+# (a double-clicked download, several people exporting the same tag set) wait
+# for that build instead of each taking a worker.
+EXPORT_DISCONNECT_POLL_SECONDS = 0.5
+
+class _ExportFlight:
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self.task = None
+        self.waiters = 0
+        self.listeners = []
+
+    def stage(self, stage: str):
+        for listener in list(self.listeners):
+            listener(stage)
+
+class ExportFlights:
+    """
+    Export builds in progress, keyed like the result cache.
+
+    ``run`` starts a build for a new key and otherwise attaches to the one
+    already running; every waiter gets the same payload or error and the
+    stages it reports. A build whose waiters have all gone is cancelled,
+    which frees its worker.
+    """
+
+    def __init__(self):
+        self._flights = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    async def run(self, key: str, fmt: str, build, on_stage=None):
+        """Return ``(result, shared)`` of ``build(on_stage)``, shared when it was already running."""
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if shared:
+            export_metrics.coalesced.inc(fmt)
+        else:
+            flight = self._flights[key] = _ExportFlight(fmt)
+            flight.task = asyncio.get_running_loop().create_task(build(flight.stage))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        flight.waiters += 1
+        if on_stage is not None:
+            flight.listeners.append(on_stage)
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if on_stage is not None:
+                flight.listeners.remove(on_stage)
+            if not flight.waiters and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+                export_metrics.abandoned.inc(fmt)
+
+    def _forget(self, key: str, flight: _ExportFlight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+export_flights = ExportFlights()
+
+async def _unless_disconnected(request: Request, awaitable):
+    """
+    Await ``awaitable`` while watching the client; if it disconnects first,
+    the work is cancelled and the request ends with 499.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=EXPORT_DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client closed the request")
+    finally:
+        task.cancel()
+
+def _etag_matches(request: Request, etag: str):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+async def _build_export(
+    fmt: str, svg_content: str, width, height, style: str, quality: str, engine: str = "occt", on_stage=None
+):
+    if fmt in EXPORT_JOB_TARGETS:
+        return await _run_export_job(fmt, svg_content, width, height, style, quality, engine, on_stage=on_stage)
+    built = await _run_export_job(
+        "bundle", svg_content, width, height, style, [fmt], quality, engine, on_stage=on_stage
+    )
+    return built[fmt]
+
+async def _cached_export(
+    fmt: str, svg_content: str, width, height, style: str, quality: str, engine: str = "occt", on_stage=None
+):
+    """
+    Return ``(payload, cache_status)`` for one export, building it on a miss
+    or waiting for an identical build that is already running (``shared``).
+    """
+    key = export_cache_key(fmt, svg_content, width, height, style, quality, engine)
+    payload = export_cache.get(key)
+    if payload is not None:
+        return payload, "hit"
+
+    async def build(on_stage):
+        payload = await _build_export(fmt, svg_content, width, height, style, quality, engine, on_stage=on_stage)
+        export_cache.put(key, payload)
+        return payload
+
+    payload, shared = await export_flights.run(key, fmt, build, on_stage=on_stage)
+    return payload, "shared" if shared else "miss"
+
+def _mesh_headers(fmt: str, key: str, payload: bytes, quality: str, engine: str = "occt"):
+    """``X-Mesh-Quality`` / ``X-Mesh-Engine`` / ``X-Mesh-Triangles`` for 3MF responses."""
+    if fmt != "3mf":
+        return {}
+    return {
+        "X-Mesh-Quality": quality,
+        "X-Mesh-Engine": engine,
+        "X-Mesh-Triangles": str(export_cache.triangle_count(key, payload)),
+    }
+
+async def _cached_export_response(
+    request: Request, fmt: str, svg_content: str, width, height, style: str, quality: str,
+    media_type: str, filename: str, engine: str = "occt"
+):
+    """Serve an export from the result cache, building it on a miss."""
+    key = export_cache_key(fmt, svg_content, width, height, style, quality, engine)
+    etag = f'"{key}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    payload, cache_status = await _unless_disconnected(
+        request, _cached_export(fmt, svg_content, width, height, style, quality, engine)
+    )
+    return Response(
+        content=payload,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "ETag": etag,
+            "X-Export-Cache": cache_status,
+            **_mesh_headers(fmt, key, payload, quality, engine),
+        }
+    )
+
 # Setup CORS
 app.add_middleware(
     CORSMiddleware,
@@ -551,35 +2673,223 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ScratchBudgetMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+
+SVG_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+# Only a DOCTYPE without an internal subset is dropped; entity definitions stay.
+SVG_PROLOG_RE = re.compile(r"<\?xml.*?\?>|<!DOCTYPE[^\[>]*>", re.S)
+SVG_TAG_GAP_RE = re.compile(r">\s+<")
+SVG_GEOMETRY_ATTR_RE = re.compile(r'\b(d|points)="([^"]*)"')
+# "10.0.5" is 10 and .5 in path shorthand, so ".0" stays when a "." follows.
+SVG_TRAILING_ZEROS_RE = re.compile(r"(\d)\.0+(?![\d.])|(\.\d*?[1-9])0+(?!\d)")
+
+def _svg_numbers(data: str):
+    return [float(v) for v in SVG_NUMBER_RE.findall(data)]
+
+def _trim_geometry_zeros(match):
+    data = match.group(2)
+    trimmed = SVG_TRAILING_ZEROS_RE.sub(lambda n: n.group(1) or n.group(2), data)
+    # Keep the attribute as is unless it still parses to the same numbers.
+    if _svg_numbers(trimmed) != _svg_numbers(data):
+        trimmed = data
+    return f'{match.group(1)}="{trimmed}"'
+
+def _minify_svg(text: str):
+    """Drop prolog/comments and inter-tag whitespace, trim zeros in path data."""
+    text = SVG_COMMENT_RE.sub("", text)
+    text = SVG_PROLOG_RE.sub("", text)
+    text = SVG_TAG_GAP_RE.sub("><", text)
+    text = SVG_GEOMETRY_ATTR_RE.sub(_trim_geometry_zeros, text)
+    text = re.sub(r"\s+", " ", text).replace(" />", "/>")
+    return text.strip()
+
+def _compressed_variants(data: bytes):
+    """Identity, gzip and (if the brotli package is installed) br encodings of ``data``."""
+    variants = {"identity": data, "gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return variants
+
+def _negotiate_encoding(request: Request, variants: dict):
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+class IconIndex:
+    """
+    In-process index of the icon library: file names, the version token the
+    editor uses for cache busting, and strong ETags (content hashes) for the
+    listing and each icon, plus the precompressed bundle of all icons.
+    ``refresh`` rescans with one stat per file and only re-reads files whose
+    size or mtime changed.
+    """
 
-def get_icon_files():
-    """Get all SVG files from Icons_SVG folder."""
-    if not ICONS_FOLDER.exists():
-        print(f"Icons folder not found: {ICONS_FOLDER}")
-        return []
-    files = [f.name for f in ICONS_FOLDER.iterdir() if f.suffix.lower() == ".svg"]
-    return sorted(files)
-
-def get_icons_version():
-    """Version token that changes when icon files are added/updated/removed."""
-    if not ICONS_FOLDER.exists():
-        return "0-0"
-    latest_mtime_ns = 0
-    count = 0
-    for f in ICONS_FOLDER.iterdir():
-        if f.suffix.lower() == ".svg":
-            count += 1
-            latest_mtime_ns = max(latest_mtime_ns, f.stat().st_mtime_ns)
-    return f"{count}-{latest_mtime_ns}"
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.entries = {}
+        self.files = []
+        self.version = "0-0"
+        self.listing = b'{"files": [], "version": "0-0"}'
+        self.etag = '"0"'
+        self.bundle = _compressed_variants(b'{"version": "0-0", "icons": {}}')
+        self._signature = None
+
+    def _scan(self):
+        if not self.folder.exists():
+            return ()
+        found = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.name.lower().endswith(".svg") and entry.is_file():
+                    st = entry.stat()
+                    found.append((entry.name, st.st_size, st.st_mtime_ns))
+        return tuple(sorted(found))
+
+    def refresh(self, compress: bool = True):
+        """
+        Rescan the folder; returns True if the library changed. With
+        ``compress=False`` the bundle is left uncompressed for ``compress_bundle``.
+        """
+        signature = self._scan()
+        if signature == self._signature:
+            return False
+        if not signature and not self.folder.exists():
+            print(f"Icons folder not found: {self.folder}")
+
+        entries = {}
+        for name, size, mtime_ns in signature:
+            previous = self.entries.get(name)
+            if previous and previous["size"] == size and previous["mtime_ns"] == mtime_ns:
+                entries[name] = previous
+                continue
+            try:
+                data = (self.folder / name).read_bytes()
+            except OSError:
+                continue
+            entries[name] = {
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "etag": f'"{hashlib.sha256(data).hexdigest()[:24]}"',
+                "minified": _minify_svg(data.decode("utf-8", errors="replace")),
+            }
+
+        files = sorted(entries)
+        latest_mtime_ns = max((e["mtime_ns"] for e in entries.values()), default=0)
+        version = f"{len(files)}-{latest_mtime_ns}"
+        listing = json.dumps({
+            "files": files,
+            "version": version,
+            "bundle_url": f"/api/icons/bundle?v={version}",
+        }).encode("utf-8")
+        digest = hashlib.sha256(listing)
+        for name in files:
+            digest.update(entries[name]["etag"].encode("ascii"))
+
+        self.entries = entries
+        self.files = files
+        self.version = version
+        self.listing = listing
+        self.etag = f'"{digest.hexdigest()[:24]}"'
+        bundle = json.dumps(
+            {"version": version, "icons": {name: entries[name]["minified"] for name in files}},
+            separators=(",", ":")
+        ).encode("utf-8")
+        self.bundle = _compressed_variants(bundle) if compress else {"identity": bundle}
+        self._signature = signature
+        return True
+
+    def compress_bundle(self):
+        # In place, so a bundle that a refresh replaced meanwhile stays replaced.
+        self.bundle.update(_compressed_variants(self.bundle["identity"]))
+
+icon_index = IconIndex(ICONS_FOLDER)
+
+async def _watch_icon_library():
+    """Poll the icon folder and refresh the index when it changes."""
+    while True:
+        await asyncio.sleep(ICONS_POLL_SECONDS)
+        try:
+            if await asyncio.to_thread(icon_index.refresh):
+                print(f"Icon library changed: {len(icon_index.files)} icon(s), version {icon_index.version}")
+        except Exception as e:
+            print(f"Icon index refresh failed: {e}")
+
+def _precompress_static_payloads():
+    icon_index.compress_bundle()
+    static_assets.compress()
+
+def _revalidating_headers(etag: str):
+    # Cached copies must be revalidated; an unchanged library costs a 304.
+    return {"ETag": etag, "Cache-Control": "no-cache"}
 
 @app.get("/api/icons")
-async def list_icons():
+async def list_icons(request: Request):
     """API endpoint to list available icons."""
-    icons = get_icon_files()
-    return JSONResponse(content={"files": icons, "version": get_icons_version()})
+    headers = _revalidating_headers(icon_index.etag)
+    if _etag_matches(request, icon_index.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=icon_index.listing, media_type="application/json", headers=headers)
+
+@app.get("/api/icons/bundle")
+async def icons_bundle(request: Request, v: str = ""):
+    """
+    Every icon as one minified JSON map ``{"version", "icons": {file: svg}}``,
+    precompressed. Cacheable forever when requested with the current version.
+    """
+    encoding = _negotiate_encoding(request, icon_index.bundle)
+    etag = f'{icon_index.etag[:-1]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=31536000, immutable" if v == icon_index.version else "no-cache",
+    }
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=icon_index.bundle[encoding], media_type="application/json", headers=headers)
+
+@app.get("/icons/{file_name}")
+async def get_icon(file_name: str, request: Request):
+    """Serve one icon from the library index."""
+    entry = icon_index.entries.get(file_name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Icon not found")
+    headers = _revalidating_headers(entry["etag"])
+    if _etag_matches(request, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(ICONS_FOLDER / file_name, media_type="image/svg+xml", headers=headers)
+
+@app.get("/api/ready")
+async def readiness():
+    """Readiness probe: 200 once at least one export worker has warmed up, 503 before."""
+    status = export_pool.readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/api/export_cache")
+async def export_cache_stats():
+    """Hit/miss counters and size of the export result cache, plus builds in flight."""
+    return JSONResponse(content={**export_cache.stats(), "builds_in_flight": len(export_flights)})
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Export pipeline metrics in the Prometheus text exposition format."""
+    return Response(
+        content=export_metrics.render(export_pool, export_cache, scratch_space),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 @app.post("/api/export_step")
 async def export_step_endpoint(
+    request: Request,
     svg_file: UploadFile = File(...),
     width: float = Form(...),
     height: float = Form(...),
@@ -594,28 +2904,12 @@ async def export_step_endpoint(
         # Read the uploaded file content bytes
         svg_content_bytes = await svg_file.read()
         svg_content = svg_content_bytes.decode('utf-8')
-        
-        class _Q:
-            def __init__(self):
-                self.items = []
-            def put(self, value):
-                self.items.append(value)
-
-        q = _Q()
-        build_step_worker(svg_content, width, height, style, q)
-        if not q.items:
-            raise HTTPException(status_code=500, detail="STEP export failed without details")
-        status, payload = q.items[0]
-        if status != "ok":
-            raise HTTPException(status_code=500, detail=payload)
-        step_data = payload
-                
+
         # Return the STEP file as a downloadable response
-        from fastapi import Response
-        return Response(
-            content=step_data,
+        return await _cached_export_response(
+            request, "step", svg_content, width, height, style, _mesh_quality(None),
             media_type="application/octet-stream",
-            headers={"Content-Disposition": f"attachment; filename=multicolor_label.step"}
+            filename="multicolor_label.step"
         )
     except HTTPException:
         raise
@@ -627,57 +2921,1060 @@ async def export_step_endpoint(
 
 @app.post("/api/export_3mf")
 async def export_3mf_endpoint(
+    request: Request,
     svg_file: UploadFile = File(...),
     width: float = Form(...),
     height: float = Form(...),
-    style: str = Form("flush")
+    style: str = Form("flush"),
+    quality: str = Form(""),
+    engine: str = Form("")
 ):
     """
     Receives SVG File and dimensions, builds base/content as separate meshes,
     and returns a downloadable .3mf file with black/white material assignment.
+    ``quality`` picks a tessellation preset (draft, normal, fine) and
+    ``engine`` how the meshes are built (occt, fast).
     """
     svg_content = ""
     try:
+        quality = _mesh_quality(quality)
+        engine = _mesh_engine(engine)
         svg_content_bytes = await svg_file.read()
         svg_content = svg_content_bytes.decode("utf-8")
 
-        class _Q:
-            def __init__(self):
-                self.items = []
+        return await _cached_export_response(
+            request, "3mf", svg_content, width, height, style, quality,
+            media_type="model/3mf",
+            filename="multicolor_label.3mf",
+            engine=engine
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        _save_failed_svg_debug("failed_3mf.svg", svg_content)
+        raise HTTPException(status_code=500, detail=str(e))
 
-            def put(self, value):
-                self.items.append(value)
+@app.post("/api/preflight")
+async def preflight_endpoint(svg_file: UploadFile = File(...)):
+    """
+    Checks an SVG without building it: structure first, then face
+    construction in an export worker within EXPORT_PREFLIGHT_TIMEOUT. Reports
+    counts, problems and a rough build time; ``ok`` means an export should
+    succeed with all of its geometry, ``warnings`` are informational.
+    """
+    svg_content = (await svg_file.read()).decode("utf-8", errors="replace")
+    report = await asyncio.to_thread(_svg_static_report, svg_content)
+    report.update(faces=None, contours=None, edges=None, self_intersections=None, estimated_seconds=None)
+    if not report["errors"]:
+        try:
+            report.update(await _run_export_job("preflight", svg_content, timeout=EXPORT_PREFLIGHT_TIMEOUT))
+        except HTTPException as e:
+            # Rejected or too slow to even import: a finding, not a failure.
+            if e.status_code not in (422, 504):
+                raise
+            report["errors"].append(str(e.detail))
+    if report["self_intersections"]:
+        report["warnings"].append(f"{report['self_intersections']} self-intersecting contour(s)")
+    if report["estimated_seconds"] is not None and report["estimated_seconds"] > EXPORT_JOB_TIMEOUT:
+        report["warnings"].append(
+            f"Estimated build time {report['estimated_seconds']:g}s exceeds the export timeout of {EXPORT_JOB_TIMEOUT:g}s"
+        )
+    # Warnings (self-intersections, a long build) are for information: such
+    # SVGs still build. Unsupported elements would drop geometry.
+    report["ok"] = not report["errors"] and not report["unsupported"]
+    return JSONResponse(content=report)
+
+def _mesh_quality(value: Optional[str]):
+    """Tessellation preset name for ``value``, the server default when empty."""
+    quality = (value or "").strip().lower() or EXPORT_MESH_QUALITY
+    if quality not in THREEMF_QUALITY_PRESETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported quality '{value}', expected one of: {', '.join(THREEMF_QUALITY_PRESETS)}"
+        )
+    return quality
 
-        q = _Q()
-        build_3mf_worker(svg_content, width, height, style, q)
-        if not q.items:
-            raise HTTPException(status_code=500, detail="3MF export failed without details")
+def _mesh_engine(value: Optional[str], formats=("3mf",)):
+    """
+    Mesh engine for an export of ``formats``, the server default when empty.
+    Exports writing anything besides meshes always build with OCCT.
+    """
+    engine = (value or "").strip().lower() or EXPORT_MESH_ENGINE
+    if engine not in MESH_ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported engine '{value}', expected one of: {', '.join(MESH_ENGINES)}"
+        )
+    return engine if all(fmt in MESH_ENGINE_FORMATS for fmt in formats) else "occt"
 
-        status, payload = q.items[0]
-        if status != "ok":
-            raise HTTPException(status_code=500, detail=payload)
+def _parse_export_formats(formats: str):
+    requested = []
+    for token in re.split(r"[\s,]+", formats.lower()):
+        if not token:
+            continue
+        if token not in EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported format '{token}', expected any of: {', '.join(EXPORT_FORMATS)}"
+            )
+        if token not in requested:
+            requested.append(token)
+    if not requested:
+        raise HTTPException(status_code=400, detail="No export formats requested")
+    return requested
+
+@app.post("/api/export")
+async def export_bundle_endpoint(
+    request: Request,
+    svg_file: UploadFile = File(...),
+    width: float = Form(...),
+    height: float = Form(...),
+    style: str = Form("flush"),
+    formats: str = Form("step,3mf,svg"),
+    quality: str = Form(""),
+    engine: str = Form("")
+):
+    """
+    Receives SVG File and dimensions, builds the label geometry once and returns
+    a ZIP with one file per requested format (any of step, 3mf, svg).
+    """
+    svg_content = ""
+    try:
+        requested = _parse_export_formats(formats)
+        quality = _mesh_quality(quality)
+        engine = _mesh_engine(engine, requested)
+        svg_content_bytes = await svg_file.read()
+        svg_content = svg_content_bytes.decode("utf-8")
 
-        from fastapi import Response
-        return Response(
-            content=payload,
-            media_type="model/3mf",
-            headers={"Content-Disposition": "attachment; filename=multicolor_label.3mf"}
+        etag = f'"{export_cache_key("bundle:" + ",".join(requested), svg_content, width, height, style, quality, engine)}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        payloads = {}
+        missing = []
+        for fmt in requested:
+            cached = export_cache.get(export_cache_key(fmt, svg_content, width, height, style, quality, engine))
+            if cached is None:
+                missing.append(fmt)
+            else:
+                payloads[fmt] = cached
+        cache_status = "hit"
+        if missing:
+            async def build(on_stage):
+                built = await _run_export_job(
+                    "bundle", svg_content, width, height, style, missing, quality, engine, on_stage=on_stage
+                )
+                for fmt in missing:
+                    export_cache.put(export_cache_key(fmt, svg_content, width, height, style, quality, engine), built[fmt])
+                return built
+
+            flight_key = export_cache_key("bundle:" + ",".join(missing), svg_content, width, height, style, quality, engine)
+            built, shared = await _unless_disconnected(
+                request, export_flights.run(flight_key, ",".join(missing), build)
+            )
+            cache_status = "shared" if shared else "miss"
+            payloads.update((fmt, built[fmt]) for fmt in missing)
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zout:
+            for fmt in requested:
+                zout.writestr(f"multicolor_label.{fmt}", payloads[fmt])
+        headers = {
+            "Content-Disposition": "attachment; filename=multicolor_label.zip",
+            "ETag": etag,
+            "X-Export-Cache": cache_status,
+        }
+        if "3mf" in payloads:
+            headers.update(_mesh_headers(
+                "3mf", export_cache_key("3mf", svg_content, width, height, style, quality, engine),
+                payloads["3mf"], quality, engine,
+            ))
+        return Response(content=buffer.getvalue(), media_type="application/zip", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        _save_failed_svg_debug("failed_bundle.svg", svg_content)
+        raise HTTPException(status_code=500, detail=str(e))
+
+class LabelIcon(BaseModel):
+    # Library file name, e.g. "mechanical_screw_pan_head.svg".
+    name: str
+    # Box in label millimetres, origin top-left, y down (as in the editor SVG).
+    x: float
+    y: float
+    width: float
+    height: float
+
+class LabelText(BaseModel):
+    text: str
+    # Anchor point in label millimetres; the run is centered vertically on y.
+    x: float
+    y: float
+    size: float
+    anchor: str = "start"
+
+class LabelSpec(BaseModel):
+    name: str = ""
+    width: float
+    height: float
+    style: str = "flush"
+    format: str = "3mf"
+    quality: Optional[str] = None
+    icons: List[LabelIcon] = []
+    texts: List[LabelText] = []
+
+def _resolve_label_spec(spec: LabelSpec):
+    """Validated spec as sent to the workers, each icon pinned to its current file."""
+    if spec.width <= 0 or spec.height <= 0:
+        raise HTTPException(status_code=400, detail="Label width and height must be positive")
+    icons = []
+    for icon in spec.icons:
+        entry = icon_index.entries.get(icon.name)
+        if entry is None:
+            raise HTTPException(status_code=404, detail=f"Unknown icon '{icon.name}'")
+        if icon.width <= 0 or icon.height <= 0:
+            raise HTTPException(status_code=400, detail=f"Icon '{icon.name}' needs a positive width and height")
+        icons.append({**icon.model_dump(), "mtime_ns": entry["mtime_ns"], "etag": entry["etag"]})
+    texts = []
+    for run in spec.texts:
+        if run.anchor not in LABEL_TEXT_ANCHORS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported text anchor '{run.anchor}', expected one of: {', '.join(LABEL_TEXT_ANCHORS)}"
+            )
+        if run.size <= 0:
+            raise HTTPException(status_code=400, detail="Text size must be positive")
+        texts.append(run.model_dump())
+    if not icons and not any(run["text"].strip() for run in texts):
+        raise HTTPException(status_code=400, detail="Label spec has no icons or text")
+    return {
+        "width": spec.width,
+        "height": spec.height,
+        # Anything other than "flush" is built as raised.
+        "style": "flush" if spec.style == "flush" else "raised",
+        "quality": _mesh_quality(spec.quality),
+        "icons": icons,
+        "texts": texts,
+    }
+
+@app.post("/api/export_label")
+async def export_label_endpoint(spec: LabelSpec, request: Request):
+    """
+    Builds a label from a structured spec (library icons by name plus text
+    runs) instead of a flattened SVG, and returns one file in ``format``.
+    """
+    fmt = spec.format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{spec.format}', expected one of: {', '.join(EXPORT_FORMATS)}"
         )
+    resolved = _resolve_label_spec(spec)
+    key = label_spec_cache_key(fmt, resolved)
+    etag = f'"{key}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        payload = export_cache.get(key)
+        cache_status = "hit"
+        if payload is None:
+            async def build(on_stage):
+                built = await _run_export_job("label_spec", resolved, [fmt], on_stage=on_stage)
+                export_cache.put(key, built[fmt])
+                return built[fmt]
+
+            payload, shared = await _unless_disconnected(request, export_flights.run(key, fmt, build))
+            cache_status = "shared" if shared else "miss"
     except HTTPException:
         raise
     except Exception as e:
         import traceback
         traceback.print_exc()
-        _save_failed_svg_debug("failed_3mf.svg", svg_content)
         raise HTTPException(status_code=500, detail=str(e))
+    filename = re.sub(r"[^a-zA-Z0-9]", "_", spec.name) if spec.name else "multicolor_label"
+    return Response(
+        content=payload,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}.{fmt}",
+            "ETag": etag,
+            "X-Export-Cache": cache_status,
+            **_mesh_headers(fmt, key, payload, resolved["quality"]),
+        }
+    )
 
-# Serve the Icons directory
-app.mount("/icons", StaticFiles(directory=str(ICONS_FOLDER)), name="icons")
+EXPORT_BATCH_MAX_LABELS = max(1, int(os.environ.get("EXPORT_BATCH_MAX_LABELS", "500")))
+
+# Asynchronous export jobs: submit, follow progress by polling or Server-Sent
+# Events, then download. Finished jobs are kept for EXPORT_JOB_TTL seconds
+# and their results are bounded in total size.
+EXPORT_JOB_TTL = float(os.environ.get("EXPORT_JOB_TTL", "600"))
+EXPORT_JOB_STORE_MAX_MB = max(1, int(os.environ.get("EXPORT_JOB_STORE_MAX_MB", "64")))
+EXPORT_JOB_MAX_ACTIVE = max(1, int(os.environ.get("EXPORT_JOB_MAX_ACTIVE", "32")))
+
+# Rough share of the work done once a stage starts, for progress reporting.
+EXPORT_STAGE_PROGRESS = {
+    "queued": 0.0,
+    "running": 0.05,
+    "svg_import": 0.1,
+    "layout": 0.1,
+    "base_plate": 0.3,
+    "boolean": 0.35,
+    "mesh": 0.55,
+    "step_export": 0.55,
+    "svg_profile": 0.55,
+    "3mf_write": 0.85,
+    "done": 1.0,
+}
+
+class BatchLabel(BaseModel):
+    name: str = ""
+    svg: str
+    # Tried when ``svg`` fails to build (e.g. the vector variant of a compat SVG).
+    fallback_svg: Optional[str] = None
+    width: float
+    height: float
+    style: str = "flush"
+    format: Optional[str] = None
+    quality: Optional[str] = None
+    engine: Optional[str] = None
+
+class BatchExportRequest(BaseModel):
+    labels: List[BatchLabel]
+    format: str = "3mf"
+    quality: Optional[str] = None
+    engine: Optional[str] = None
+
+class _ZipStreamSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that ZipFile streams entries into."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _batch_file_name(index: int, name: str, fmt: str):
+    safe_name = re.sub(r"[^a-zA-Z0-9]", "_", name or f"tag_{index + 1}")
+    return f"{index + 1}_{safe_name}.{fmt}"
+
+async def _export_batch_entry(label: BatchLabel, fmt: str, on_stage=None):
+    """Build one batch entry, returning ``(payload, cache_status, triangles, errors)``."""
+    errors = []
+    quality, engine = _mesh_quality(label.quality), _mesh_engine(label.engine, [fmt])
+    for svg_content in (label.svg, label.fallback_svg):
+        if not svg_content:
+            continue
+        while True:
+            try:
+                payload, cache_status = await _cached_export(
+                    fmt, svg_content, label.width, label.height, label.style, quality, engine, on_stage=on_stage
+                )
+                triangles = None
+                if fmt == "3mf":
+                    key = export_cache_key(fmt, svg_content, label.width, label.height, label.style, quality, engine)
+                    triangles = export_cache.triangle_count(key, payload)
+                return payload, cache_status, triangles, errors
+            except HTTPException as e:
+                if e.status_code == 429:
+                    # Share the queue fairly with interactive exports.
+                    await asyncio.sleep(min(5, int((e.headers or {}).get("Retry-After", "1"))))
+                    continue
+                errors.append(str(e.detail))
+                break
+            except Exception as e:
+                errors.append(str(e))
+                break
+    return None, None, None, errors
+
+async def _stream_batch_zip(labels: List[BatchLabel], default_format: str):
+    """
+    Yield a ZIP archive entry by entry as labels finish building.
+
+    At most one job per pool worker is in flight, so server memory stays
+    bounded by the pool size rather than the batch size. Failures are
+    recorded in ``manifest.json`` instead of aborting the batch.
+    """
+    sink = _ZipStreamSink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    manifest = []
+    pending = {}
+    next_index = 0
+    try:
+        while next_index < len(labels) or pending:
+            while next_index < len(labels) and len(pending) < export_pool.size:
+                label = labels[next_index]
+                fmt = (label.format or default_format).lower()
+                task = asyncio.create_task(_export_batch_entry(label, fmt))
+                pending[task] = (next_index, label, fmt)
+                next_index += 1
+
+            done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, label, fmt = pending.pop(task)
+                payload, cache_status, triangles, errors = task.result()
+                entry = {"index": index, "name": label.name, "format": fmt}
+                if payload is not None:
+                    file_name = _batch_file_name(index, label.name, fmt)
+                    await asyncio.to_thread(archive.writestr, file_name, payload)
+                    entry.update({"status": "ok", "file": file_name, "bytes": len(payload), "cache": cache_status})
+                    if triangles is not None:
+                        entry["triangles"] = triangles
+                else:
+                    entry["status"] = "error"
+                if errors:
+                    entry["errors"] = errors
+                manifest.append(entry)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+
+        manifest.sort(key=lambda item: item["index"])
+        summary = {
+            "total": len(labels),
+            "succeeded": sum(1 for item in manifest if item["status"] == "ok"),
+            "failed": sum(1 for item in manifest if item["status"] != "ok"),
+            "labels": manifest,
+        }
+        archive.writestr("manifest.json", json.dumps(summary, indent=2))
+        archive.close()
+        yield sink.drain()
+    finally:
+        for task in pending:
+            task.cancel()
+
+@app.post("/api/export_batch")
+async def export_batch_endpoint(batch: BatchExportRequest):
+    """
+    Receives a list of label specs (SVG, size, style, format) and streams back
+    a ZIP with one file per label plus a manifest.json with per-label status.
+    """
+    if not batch.labels:
+        raise HTTPException(status_code=400, detail="No labels to export")
+    if len(batch.labels) > EXPORT_BATCH_MAX_LABELS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many labels ({len(batch.labels)}), limit is {EXPORT_BATCH_MAX_LABELS}"
+        )
+    for label in [batch] + list(batch.labels):
+        fmt = (label.format or batch.format).lower()
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported format '{fmt}', expected any of: {', '.join(EXPORT_FORMATS)}"
+            )
+        label.quality = _mesh_quality(label.quality or batch.quality)
+        label.engine = _mesh_engine(label.engine or batch.engine)
+    return StreamingResponse(
+        _stream_batch_zip(batch.labels, batch.format.lower()),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=infinitygrid_labels.zip"}
+    )
+
+# Plate export: many labels packed onto one print bed in a single 3MF.
+EXPORT_PLATE_BED_MM = float(os.environ.get("EXPORT_PLATE_BED_MM", "256"))
+EXPORT_PLATE_SPACING_MM = max(0.0, float(os.environ.get("EXPORT_PLATE_SPACING_MM", "3")))
+
+class PlateLabel(BatchLabel):
+    copies: int = 1
+
+class PlateExportRequest(BaseModel):
+    labels: List[PlateLabel]
+    bed_width: float = EXPORT_PLATE_BED_MM
+    bed_depth: float = EXPORT_PLATE_BED_MM
+    spacing: float = EXPORT_PLATE_SPACING_MM
+    quality: Optional[str] = None
+    engine: Optional[str] = None
+
+def _plate_label_key(label: PlateLabel):
+    return (
+        _normalize_svg_payload(label.svg),
+        _normalize_svg_payload(label.fallback_svg) if label.fallback_svg else "",
+        f"{float(label.width):.4f}",
+        f"{float(label.height):.4f}",
+        "flush" if label.style == "flush" else "raised",
+        label.quality,
+        label.engine,
+    )
 
-# Serve the 'assets' directory properly
-assets_dir = BASE_DIR / "assets"
-if assets_dir.exists():
-    app.mount("/assets", StaticFiles(directory=str(assets_dir)), name="assets")
+def plate_cache_key(plate: PlateExportRequest, unique: list):
+    """Content hash identifying one packed plate."""
+    digest = hashlib.sha256()
+    for part in (
+        EXPORT_CODE_VERSION,
+        "plate",
+        f"{plate.bed_width:.4f}",
+        f"{plate.bed_depth:.4f}",
+        f"{plate.spacing:.4f}",
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(json.dumps(
+        [[list(key), label.name, copies] for key, label, copies in unique],
+        separators=(",", ":")
+    ).encode("utf-8"))
+    return digest.hexdigest()
+
+async def _plate_label_meshes(label: PlateLabel, semaphore: asyncio.Semaphore):
+    """Tessellate one plate label, falling back like batch entries do."""
+    errors = []
+    async with semaphore:
+        for svg_content in (label.svg, label.fallback_svg):
+            if not svg_content:
+                continue
+            flight_key = export_cache_key(
+                "meshes", svg_content, label.width, label.height, label.style, label.quality, label.engine
+            )
+
+            def build(on_stage):
+                return _run_export_job(
+                    "bundle", svg_content, label.width, label.height, label.style, ["meshes"],
+                    label.quality, label.engine, on_stage=on_stage
+                )
+
+            while True:
+                try:
+                    built, _ = await export_flights.run(flight_key, "meshes", build)
+                    return built["meshes"]
+                except HTTPException as e:
+                    if e.status_code == 429:
+                        await asyncio.sleep(min(5, int((e.headers or {}).get("Retry-After", "1"))))
+                        continue
+                    errors.append(str(e.detail))
+                    break
+    raise HTTPException(
+        status_code=500,
+        detail=f"Label '{label.name or 'unnamed'}' failed to build: {'; '.join(errors) or 'no SVG'}"
+    )
+
+def _pack_plate(footprints: list, bed_width: float, bed_depth: float, spacing: float):
+    """
+    First-fit decreasing-height shelf packing. ``footprints`` holds
+    ``(width, depth)`` per item; returns the lower-left corner of each item,
+    with the packed block centred on the bed, or None if it does not fit.
+    """
+    order = sorted(range(len(footprints)), key=lambda i: (-footprints[i][1], -footprints[i][0]))
+    shelves = []  # [y, depth, used width]
+    positions = [None] * len(footprints)
+    top = 0.0
+    for i in order:
+        width, depth = footprints[i]
+        if width > bed_width or depth > bed_depth:
+            return None
+        for shelf in shelves:
+            x = shelf[2] + spacing if shelf[2] else 0.0
+            if depth <= shelf[1] and x + width <= bed_width:
+                positions[i] = (x, shelf[0])
+                shelf[2] = x + width
+                break
+        else:
+            y = top + spacing if shelves else 0.0
+            if y + depth > bed_depth:
+                return None
+            shelves.append([y, depth, width])
+            positions[i] = (0.0, y)
+            top = y + depth
+
+    used_width = max(shelf[2] for shelf in shelves)
+    offset_x = (bed_width - used_width) / 2
+    offset_y = (bed_depth - top) / 2
+    return [(x + offset_x, y + offset_y) for x, y in positions]
+
+def _mesh_fingerprint(material_index: int, vertices, triangles):
+    """
+    Hash of a mesh up to translation, and the corner it was taken from.
+    The mesh is put in canonical order first (vertices sorted, triangles
+    rotated to start at their lowest vertex and sorted), so equal solids
+    hash equal whichever order they were tessellated or welded in.
+    """
+    low = vertices.min(axis=0)
+    # Adding 0.0 folds -0.0 into 0.0 so both hash the same.
+    relative = np.round(vertices - low, THREEMF_VERTEX_DIGITS) + 0.0
+    order = np.lexsort(relative.T[::-1])
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    faces = rank[np.asarray(triangles, dtype=np.int64)]
+    # Rotating keeps the winding, so flipped faces still hash differently.
+    shift = np.argmin(faces, axis=1)
+    faces = np.take_along_axis(faces, (shift[:, None] + np.arange(3)) % 3, axis=1)
+    faces = faces[np.lexsort(faces.T[::-1])]
+    digest = hashlib.sha256()
+    digest.update(str(material_index).encode("utf-8"))
+    digest.update(np.ascontiguousarray(relative[order]).tobytes())
+    digest.update(np.ascontiguousarray(faces).tobytes())
+    return digest.hexdigest(), low
+
+def _round_offset(values):
+    return tuple(round(float(v), THREEMF_VERTEX_DIGITS) + 0.0 for v in values)
+
+def _write_plate_3mf(unique_meshes: list, names: list, copies: list, positions: list):
+    """
+    Write a packed plate. Parts are deduplicated by geometric hash: a solid
+    seen before is referenced again through a translated component, and a
+    label whose parts all match an earlier one reuses its assembly, so
+    repeated labels are instanced rather than copied. Every copy is a build
+    item; ``positions`` holds their lower-left corners in label order.
+    """
+    meshes = []
+    mesh_ids = {}
+    assemblies = []
+    assembly_ids = {}
+    assembly_lows = []
+    label_assemblies = []
+    for label_index, label_meshes in enumerate(unique_meshes, start=1):
+        label_low = np.min([vertices.min(axis=0) for _, _, vertices, _ in label_meshes], axis=0)
+        components = []
+        for name, material_index, vertices, triangles in label_meshes:
+            fingerprint, low = _mesh_fingerprint(material_index, vertices, triangles)
+            if fingerprint not in mesh_ids:
+                mesh_ids[fingerprint] = (len(meshes), low)
+                meshes.append((name.rsplit("_", 1)[0] + f"_{label_index}", material_index, vertices, triangles))
+            index, shared_low = mesh_ids[fingerprint]
+            components.append((index, _round_offset(low - shared_low), _round_offset(low - label_low)))
+
+        signature = tuple((index, relative) for index, _, relative in components)
+        if signature not in assembly_ids:
+            assembly_ids[signature] = len(assemblies)
+            assemblies.append((names[label_index - 1], [(index, offset) for index, offset, _ in components]))
+            assembly_lows.append(label_low)
+        label_assemblies.append(assembly_ids[signature])
+
+    items = []
+    position = iter(positions)
+    for label_index, assembly_index in enumerate(label_assemblies):
+        low = assembly_lows[assembly_index]
+        for _ in range(copies[label_index]):
+            x, y = next(position)
+            items.append((assembly_index, _round_offset((x - low[0], y - low[1], -low[2]))))
+    return _write_3mf_package(meshes, assemblies, items)
+
+@app.post("/api/export_plate")
+async def export_plate_endpoint(plate: PlateExportRequest, request: Request):
+    """
+    Receives label specs with copy counts and a bed size, and returns one 3MF
+    with every copy packed onto the bed. Identical labels share one mesh.
+    """
+    if not plate.labels:
+        raise HTTPException(status_code=400, detail="No labels to export")
+    if plate.bed_width <= 0 or plate.bed_depth <= 0 or plate.spacing < 0:
+        raise HTTPException(status_code=400, detail="Bed size must be positive and spacing non-negative")
+    total = 0
+    for label in plate.labels:
+        if label.copies < 0:
+            raise HTTPException(status_code=400, detail="Copies must not be negative")
+        total += label.copies
+        label.quality = _mesh_quality(label.quality or plate.quality)
+        label.engine = _mesh_engine(label.engine or plate.engine, ["meshes"])
+    if total == 0:
+        raise HTTPException(status_code=400, detail="No labels to export")
+    if total > EXPORT_BATCH_MAX_LABELS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many labels ({total}), limit is {EXPORT_BATCH_MAX_LABELS}"
+        )
+
+    # Identical labels are built once and placed as instances.
+    grouped = {}
+    for label in plate.labels:
+        if label.copies:
+            key = _plate_label_key(label)
+            if key in grouped:
+                grouped[key][2] += label.copies
+            else:
+                grouped[key] = [key, label, label.copies]
+    unique = list(grouped.values())
+
+    key = plate_cache_key(plate, unique)
+    etag = f'"{key}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    payload = export_cache.get(key)
+    cache_status = "hit"
+    if payload is None:
+        async def build(on_stage):
+            semaphore = asyncio.Semaphore(export_pool.size)
+            tasks = [asyncio.create_task(_plate_label_meshes(label, semaphore)) for _, label, _ in unique]
+            try:
+                unique_meshes = await asyncio.gather(*tasks)
+            finally:
+                # gather leaves the other labels running when one fails; cancel them to free their workers.
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            footprints = []
+            for (_, _, copies), label_meshes in zip(unique, unique_meshes):
+                if not label_meshes:
+                    raise HTTPException(status_code=500, detail="Label produced no geometry")
+                low = np.min([vertices.min(axis=0) for _, _, vertices, _ in label_meshes], axis=0)
+                high = np.max([vertices.max(axis=0) for _, _, vertices, _ in label_meshes], axis=0)
+                footprints.extend([(float(high[0] - low[0]), float(high[1] - low[1]))] * copies)
+            positions = _pack_plate(footprints, plate.bed_width, plate.bed_depth, plate.spacing)
+            if positions is None:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"{total} label(s) do not fit on a {plate.bed_width:g} x {plate.bed_depth:g} mm bed"
+                )
+            names = [label.name or f"Label_{index}" for index, (_, label, _) in enumerate(unique, start=1)]
+            payload = await asyncio.to_thread(
+                _write_plate_3mf, unique_meshes, names, [copies for _, _, copies in unique], positions
+            )
+            export_cache.put(key, payload)
+            return payload
+
+        payload, shared = await _unless_disconnected(request, export_flights.run(key, "3mf", build))
+        cache_status = "shared" if shared else "miss"
+    return Response(
+        content=payload,
+        media_type=EXPORT_MEDIA_TYPES["3mf"],
+        headers={
+            "Content-Disposition": "attachment; filename=infinitygrid_plate.3mf",
+            "ETag": etag,
+            "X-Export-Cache": cache_status,
+            "X-Plate-Labels": str(total),
+            "X-Plate-Meshes": str(len(unique)),
+            "X-Mesh-Triangles": str(export_cache.triangle_count(key, payload)),
+        }
+    )
+
+class ExportJob:
+    def __init__(self, fmt: str):
+        self.id = uuid.uuid4().hex
+        self.format = fmt
+        self.state = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.error = None
+        self.payload = None
+        self.cache_status = None
+        self.triangles = None
+        self.timings = []
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def emit(self, stage: str, **extra):
+        self.stage = stage
+        self.progress = max(self.progress, EXPORT_STAGE_PROGRESS.get(stage, self.progress))
+        self.events.append({
+            "stage": stage,
+            "state": self.state,
+            "progress": round(self.progress, 3),
+            "elapsed": round(time.time() - self.created, 3),
+            **extra,
+        })
+        # Wake every waiter, then arm a fresh event for the next change.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, seen: int, timeout: float):
+        """Wait for an event beyond the first ``seen``; returns at once if one is already there."""
+        if len(self.events) > seen:
+            return
+        await asyncio.wait_for(self._changed.wait(), timeout)
+
+    @property
+    def is_finished(self):
+        return self.state in ("done", "error")
+
+    def summary(self):
+        base_url = f"/api/jobs/{self.id}"
+        info = {
+            "id": self.id,
+            "format": self.format,
+            "state": self.state,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "created": self.created,
+            "status_url": base_url,
+            "events_url": f"{base_url}/events",
+            "result_url": f"{base_url}/result",
+        }
+        if self.finished is not None:
+            info["finished"] = self.finished
+            info["expires"] = self.finished + EXPORT_JOB_TTL
+        if self.payload is not None:
+            info["bytes"] = len(self.payload)
+            info["cache"] = self.cache_status
+        if self.triangles is not None:
+            info["triangles"] = self.triangles
+        if self.error:
+            info["error"] = self.error
+        return info
+
+class ExportJobStore:
+    """Job registry with TTL expiry and a byte bound on stored results."""
+
+    def __init__(self, ttl: float, max_result_bytes: int, max_active: int):
+        self.ttl = ttl
+        self.max_result_bytes = max_result_bytes
+        self.max_active = max_active
+        self._jobs = OrderedDict()
+
+    def active_count(self):
+        return sum(1 for job in self._jobs.values() if not job.is_finished)
+
+    def create(self, fmt: str):
+        self.prune()
+        if self.active_count() >= self.max_active:
+            raise ExportPoolFull(export_pool.retry_after())
+        job = ExportJob(fmt)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str):
+        self.prune()
+        return self._jobs.get(job_id)
+
+    def prune(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.is_finished and now - job.finished > self.ttl:
+                del self._jobs[job_id]
+        stored = sum(len(job.payload) for job in self._jobs.values() if job.payload is not None)
+        for job_id, job in list(self._jobs.items()):
+            if stored <= self.max_result_bytes:
+                break
+            if job.payload is not None:
+                stored -= len(job.payload)
+                del self._jobs[job_id]
+
+export_jobs = ExportJobStore(
+    ttl=EXPORT_JOB_TTL,
+    max_result_bytes=EXPORT_JOB_STORE_MAX_MB * 1024 * 1024,
+    max_active=EXPORT_JOB_MAX_ACTIVE
+)
+
+async def _run_export_job_task(job: ExportJob, label: BatchLabel):
+    # The task copied the submitting request's context; time this job on its own.
+    _request_timings.set(job.timings)
+    job.state = "running"
+    job.emit("running")
+    try:
+        payload, cache_status, triangles, errors = await _export_batch_entry(label, job.format, on_stage=job.emit)
+    except Exception as e:
+        payload, cache_status, triangles, errors = None, None, None, [str(e)]
+    job.finished = time.time()
+    if payload is not None:
+        job.payload = payload
+        job.cache_status = cache_status
+        job.triangles = triangles
+        job.state = "done"
+        job.emit("done", bytes=len(payload), cache=cache_status, triangles=job.triangles)
+    else:
+        job.error = "; ".join(errors) or "Export failed without details"
+        job.state = "error"
+        job.emit("failed", error=job.error)
+    export_jobs.prune()
+
+def _get_export_job(job_id: str):
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+@app.post("/api/jobs", status_code=202)
+async def create_export_job(
+    svg_file: UploadFile = File(...),
+    width: float = Form(...),
+    height: float = Form(...),
+    style: str = Form("flush"),
+    format: str = Form("3mf"),
+    quality: str = Form(""),
+    engine: str = Form("")
+):
+    """
+    Receives SVG File, dimensions and a format and starts the export in the
+    background. Returns the job id and URLs for status, events and result.
+    """
+    fmt = _parse_export_formats(format)[0]
+    quality = _mesh_quality(quality)
+    engine = _mesh_engine(engine, [fmt])
+    svg_content = (await svg_file.read()).decode("utf-8")
+    await _reject_unbuildable_svg(svg_content)
+    try:
+        job = export_jobs.create(fmt)
+    except ExportPoolFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many export jobs in progress, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    job.emit("queued")
+    label = BatchLabel(
+        svg=svg_content, width=width, height=height, style=style, format=fmt, quality=quality, engine=engine
+    )
+    job.task = asyncio.create_task(_run_export_job_task(job, label))
+    return JSONResponse(status_code=202, content=job.summary())
+
+@app.get("/api/jobs/{job_id}")
+async def get_export_job(job_id: str):
+    """State, current stage and progress (0..1) of an export job."""
+    return JSONResponse(content=_get_export_job(job_id).summary())
+
+@app.get("/api/jobs/{job_id}/events")
+async def export_job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of job stages. Sends every event so far, then
+    live ones until the job ends with a ``done`` or ``failed`` event.
+    """
+    job = _get_export_job(job_id)
+
+    async def event_stream():
+        sent = 0
+        while True:
+            while sent < len(job.events):
+                event = job.events[sent]
+                sent += 1
+                name = event["stage"] if event["stage"] in ("done", "failed") else "progress"
+                yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+            if await request.is_disconnected():
+                return
+            # Events emitted while checking the client are sent on the next pass.
+            if job.is_finished and sent == len(job.events):
+                return
+            try:
+                await job.wait_for_change(sent, timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/jobs/{job_id}/result")
+async def export_job_result(job_id: str):
+    """Download the finished export of a job."""
+    job = _get_export_job(job_id)
+    if job.state == "error":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.payload is None:
+        raise HTTPException(status_code=409, detail=f"Job is not finished (state: {job.state})")
+    headers = {"Content-Disposition": f"attachment; filename=multicolor_label.{job.format}"}
+    if job.triangles is not None:
+        headers["X-Mesh-Triangles"] = str(job.triangles)
+    if job.timings:
+        headers["Server-Timing"] = _server_timing_header(job.timings)
+    return Response(content=job.payload, media_type=EXPORT_MEDIA_TYPES[job.format], headers=headers)
+
+# Static assets. Everything under assets/ is read once at start-up, fingerprinted
+# and precompressed; index.html is rewritten to the fingerprinted URLs, which are
+# cached immutably. The plain paths keep working but revalidate like index.html.
+ASSETS_FOLDER = BASE_DIR / "assets"
+ASSET_COMPRESSIBLE_TYPES = {
+    "application/javascript", "text/javascript", "application/json",
+    "image/svg+xml", "font/ttf", "font/otf",
+}
+ASSET_URL_RE = re.compile(r"""(url\(\s*["']?|\b(?:href|src)=["'])(/?assets/)([^"')?#]+)""")
+
+class StaticAssets:
+    """
+    Fingerprinted copies of assets/ and the rewritten index.html. ``load``
+    only reads and hashes; ``compress`` adds the gzip/brotli variants later.
+    """
+
+    def __init__(self, folder: Path, index_path: Path):
+        self.folder = folder
+        self.index_path = index_path
+        self.files = {}
+        self.index = None
+
+    @staticmethod
+    def _entry(data: bytes, media_type: str, immutable: bool):
+        return {
+            "media_type": media_type,
+            "etag": f'"{hashlib.sha256(data).hexdigest()[:24]}"',
+            "variants": {"identity": data},
+            "compressible": media_type.startswith("text/") or media_type in ASSET_COMPRESSIBLE_TYPES,
+            "immutable": immutable,
+        }
+
+    def load(self):
+        files = {}
+        fingerprinted = {}
+
+        def rewrite(text: str):
+            def replace(match):
+                name = fingerprinted.get(match.group(3))
+                return f"{match.group(1)}/assets/{name}" if name else match.group(0)
+            return ASSET_URL_RE.sub(replace, text)
+
+        paths = [p for p in self.folder.rglob("*") if p.is_file()] if self.folder.exists() else []
+        # Stylesheets last, so their url() references resolve to fingerprinted files.
+        for path in sorted(paths, key=lambda p: (p.suffix == ".css", str(p))):
+            rel = path.relative_to(self.folder).as_posix()
+            data = path.read_bytes()
+            if path.suffix == ".css":
+                data = rewrite(data.decode("utf-8")).encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            hashed = path.with_name(f"{path.stem}.{digest}{path.suffix}").relative_to(self.folder).as_posix()
+            media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            files[rel] = self._entry(data, media_type, immutable=False)
+            files[hashed] = {**files[rel], "immutable": True}
+            fingerprinted[rel] = hashed
+
+        index = None
+        if self.index_path.exists():
+            html = rewrite(self.index_path.read_text(encoding="utf-8")).encode("utf-8")
+            index = self._entry(html, "text/html; charset=utf-8", immutable=False)
+        self.files = files
+        self.index = index
+        return len(fingerprinted)
+
+    def compress(self):
+        entries = list(self.files.values()) + ([self.index] if self.index else [])
+        done = set()
+        for entry in entries:
+            # Plain and fingerprinted paths share one variants dict.
+            variants = entry["variants"]
+            if entry["compressible"] and id(variants) not in done:
+                done.add(id(variants))
+                variants.update(_compressed_variants(variants["identity"]))
+
+static_assets = StaticAssets(ASSETS_FOLDER, BASE_DIR / "index.html")
+
+def _precompressed_response(request: Request, entry: dict):
+    encoding = _negotiate_encoding(request, entry["variants"])
+    etag = f'{entry["etag"][:-1]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=31536000, immutable" if entry["immutable"] else "no-cache",
+    }
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=entry["variants"][encoding], media_type=entry["media_type"], headers=headers)
+
+@app.get("/assets/{asset_path:path}", include_in_schema=False)
+async def get_asset(asset_path: str, request: Request):
+    entry = static_assets.files.get(asset_path)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return _precompressed_response(request, entry)
 
 @app.get("/favicon.ico", include_in_schema=False)
 async def favicon_ico():
@@ -704,15 +4001,14 @@ async def app_icon_png():
     raise HTTPException(status_code=404, detail="File not found")
 
 @app.get("/")
-async def serve_index():
-    index_path = BASE_DIR / "index.html"
-    if index_path.exists():
-        return FileResponse(index_path)
+async def serve_index(request: Request):
+    if static_assets.index is not None:
+        return _precompressed_response(request, static_assets.index)
     raise HTTPException(status_code=404, detail="Index.html not found")
 
 
 if __name__ == "__main__":
-    icons = get_icon_files()
+    icons = icon_index._scan()
     print()
     print("InfinityGrid Sticker Designer (FastAPI + Build123d)")
     print("-" * 50)